@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Per-call cost of host LoggingClient: the compiled scanner vs. the rule-by-rule scan it replaced.
+
+    PYTHONPATH=src python3 benchmarks/logging_client_bench.py [--calls 200000]
+"""
+import argparse
+import logging
+import re
+import time
+
+from signal_assistant.host.logging_client import (
+    FORBIDDEN_KEYWORDS,
+    PII_PATTERNS,
+    LoggingClient,
+    check_loggable,
+    check_metadata,
+)
+
+MESSAGE = "Host EnclaveProxy sending command: PROCESS_MESSAGE"
+METADATA = {"request_id": 4821, "response_len": 1536, "worker": "enclave-0"}
+
+
+def legacy_check(text: str, where: str):
+    # The original per-call scan: one `in` per keyword and one uncompiled re.search per pattern.
+    for keyword in list(FORBIDDEN_KEYWORDS):
+        if keyword in text.lower():
+            raise ValueError(f"Attempted to log forbidden keyword '{keyword}' in {where}.")
+    for pattern_str in list(PII_PATTERNS):
+        if re.search(pattern_str, text):
+            raise ValueError(f"Attempted to log potential PII pattern '{pattern_str}' in {where}.")
+
+
+def _per_call(fn, calls: int) -> float:
+    started = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - started) / calls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--calls", type=int, default=200_000)
+    args = parser.parse_args()
+
+    client = LoggingClient("LoggingBench")
+    client.logger.handlers = [logging.NullHandler()]
+    client.logger.propagate = False
+
+    rows = [
+        ("legacy scan (message + metadata)", lambda: (legacy_check(MESSAGE, "message"),
+                                                      legacy_check(str(METADATA).lower(), "metadata"))),
+        ("compiled scan (message + metadata)", lambda: (check_loggable(MESSAGE, "message"),
+                                                        check_loggable(str(METADATA).lower(), "metadata"))),
+        ("metadata: str() + scan", lambda: check_loggable(str(METADATA).lower(), "metadata")),
+        ("metadata: structured walk", lambda: check_metadata(METADATA)),
+        ("LoggingClient.info (emitted)", lambda: client.info(None, MESSAGE, metadata=METADATA)),
+        ("LoggingClient.debug (level off)", lambda: client.debug(None, MESSAGE, metadata=METADATA)),
+    ]
+    for label, fn in rows:
+        print(f"  {label:<40} {_per_call(fn, args.calls):8.2f} us/call")
+
+
+if __name__ == "__main__":
+    main()
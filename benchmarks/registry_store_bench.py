@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Registry backend benchmark: JSON file vs. SQLite store at 100k measurements.
+
+    PYTHONPATH=src python3 benchmarks/registry_store_bench.py [--entries 100000]
+"""
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "tools"))
+
+from registry_store import JsonRegistryStore, SqliteRegistryStore, write_registry_file  # noqa: E402
+from signal_assistant.registry_merkle import merkle_root  # noqa: E402
+
+
+def _entry(i: int) -> dict:
+    return {
+        "name": "signal-assistant-enclave",
+        "mrenclave": f"sha256:{i:064x}",
+        "version": f"{i // 1000}.{i % 1000}.0",
+        "tag": f"v{i // 1000}.{i % 1000}.0",
+        "git_commit": f"{i:07x}",
+        "build_timestamp": "2025-12-09T20:50:23.651990Z",
+        "profile": ("DEV", "TEST", "STAGE", "PROD")[i % 4],
+        "status": "revoked" if i % 10 == 0 else "active",
+        "revocation_reason": None,
+    }
+
+
+def _timed(label: str, fn, repeat: int = 1):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    per_call = (time.perf_counter() - started) / repeat
+    unit, scale = ("ms", 1e3) if per_call >= 1e-3 else ("us", 1e6)
+    print(f"  {label:<32} {per_call * scale:10.2f} {unit}")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--entries", type=int, default=100_000)
+    args = parser.parse_args()
+
+    n = args.entries
+    registry = {"schema_version": "1.0", "measurements": [_entry(i) for i in range(n)], "signatures": []}
+    probe = f"sha256:{n // 2:064x}"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path, db_path = Path(tmp) / "measurement_registry.json", Path(tmp) / "registry.db"
+        write_registry_file(json_path, registry)
+
+        print(f"JSON file ({n} entries)")
+        def load_json():
+            with open(json_path) as f:
+                return JsonRegistryStore(json_path, json.load(f))
+        json_store = _timed("load", load_json, repeat=3)
+        _timed("lookup by mrenclave (load+scan)", lambda: load_json().get(probe), repeat=3)
+        _timed("canonical signing bytes", json_store.canonical_bytes, repeat=3)
+        _timed("merkle root", lambda: merkle_root(json_store.leaf_hashes()))
+        _timed("append (rewrite file)", lambda: json_store.add(_entry(n)))
+
+        print(f"SQLite store ({n} entries)")
+        sqlite_store = SqliteRegistryStore(db_path)
+        _timed("import", lambda: sqlite_store.import_registry(registry))
+        _timed("open + lookup by mrenclave", lambda: SqliteRegistryStore(db_path).get(probe), repeat=100)
+        _timed("lookup by mrenclave", lambda: sqlite_store.get(probe), repeat=1000)
+        _timed("find by version", lambda: sqlite_store.find(version="50.0.0"), repeat=1000)
+        _timed("find by profile (n/4 rows)", lambda: sqlite_store.find(profile="PROD"), repeat=3)
+        _timed("canonical signing bytes", sqlite_store.canonical_bytes, repeat=3)
+        _timed("merkle root (stored leaves)", lambda: merkle_root(sqlite_store.leaf_hashes()))
+        counter = iter(range(n + 1, n + 1001))
+        _timed("append (one transaction)", lambda: sqlite_store.add(_entry(next(counter))), repeat=1000)
+        sqlite_store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,45 @@
 import argparse
+import json
+import os
 import sys
+from datetime import datetime, timezone
 from signal_assistant.main import run_host
 
+def _timestamp(value: str) -> float:
+    """Parses an ISO date or datetime (UTC unless it carries an offset) to a Unix timestamp."""
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+def run_logs(args, parser):
+    """
+    Queries or expires the host operational log store.
+    """
+    from signal_assistant.config import host_settings
+    from signal_assistant.host.storage.log_store import DEFAULT_RETENTION_DAYS, LogStore
+
+    path = args.path or (host_settings.log_store_path if host_settings is not None else None)
+    if not path:
+        parser.error("No log store configured: pass --path or set LOG_STORE_PATH.")
+    retention_days = host_settings.log_retention_days if host_settings is not None else DEFAULT_RETENTION_DAYS
+    # A query only reads: it must not create the directory or drop expired partitions.
+    read_only = args.logs_command == "query"
+    if read_only and not os.path.isdir(path):
+        parser.error(f"No log store at {path}.")
+    store = LogStore(path, retention_days=retention_days, read_only=read_only)
+    try:
+        if args.logs_command == "query":
+            for record in store.query(args.user, since=args.since, until=args.until):
+                print(json.dumps(record, sort_keys=True))
+        elif args.logs_command == "expire":
+            for day in store.expire():
+                print(f"Dropped log partition {day.isoformat()}")
+        else:
+            parser.print_help()
+    finally:
+        store.close()
+
 def main():
     parser = argparse.ArgumentParser(description="Signal Assistant CLI")
     subparsers = parser.add_subparsers(dest="command", help="Available commands")
@@ -12,6 +50,16 @@ def main():
     # Simulation command
     sim_parser = subparsers.add_parser("simulate", help="Run the Assistant in local simulation mode")
 
+    # Host operational log store
+    logs_parser = subparsers.add_parser("logs", help="Query or expire the Host operational log store")
+    logs_parser.add_argument("--path", help="Log store directory (default: LOG_STORE_PATH)")
+    logs_subparsers = logs_parser.add_subparsers(dest="logs_command")
+    query_parser = logs_subparsers.add_parser("query", help="Print one internal_user_id's records as JSON lines")
+    query_parser.add_argument("--user", required=True, help="internal_user_id to look up")
+    query_parser.add_argument("--since", type=_timestamp, help="Earliest record time (ISO date or datetime, UTC)")
+    query_parser.add_argument("--until", type=_timestamp, help="Latest record time, exclusive (ISO date or datetime, UTC)")
+    logs_subparsers.add_parser("expire", help="Drop partitions older than the retention period")
+
     # Legacy argument support
     parser.add_argument("--start", action="store_true", help="Start the Host Sidecar (Legacy)")
     
@@ -19,6 +67,8 @@ def main():
     
     if args.command == "host" or args.start:
         run_host()
+    elif args.command == "logs":
+        run_logs(args, logs_parser)
     elif args.command == "simulate":
         # Lazy import to avoid side effects or dependencies when not simulating
         from signal_assistant.simulate import main as run_simulation
@@ -1,6 +1,6 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import SecretStr, Field
-from typing import Optional
+from typing import Dict, List, Optional
 
 class HostSettings(BaseSettings):
     """Configuration for the Untrusted Host Sidecar."""
@@ -11,6 +11,34 @@ class HostSettings(BaseSettings):
     
     # We might need to listen on a port for VSock (simulated via TCP in dev)
     vsock_port: int = Field(5000, description="Port for VSock communication")
+    vsock_fallback_host: str = Field("127.0.0.1", description="TCP bind address used when AF_VSOCK is unavailable")
+    channel_transport: str = Field("vsock", description="Host-Enclave transport: vsock (TCP fallback), tcp, or shm for a co-located Enclave")
+    shm_ring_path: str = Field("/dev/shm/signal-assistant", description="Path prefix for the shared-memory ring and doorbell files")
+    shm_ring_capacity: int = Field(4 * 1024 * 1024, description="Size in bytes of each shared-memory ring; frames may be up to half of it")
+    channel_coalesce_window_ms: float = Field(0.0, description="Coalesce Host-Enclave commands sent within this window into one frame (0 disables)")
+    channel_coalesce_max_bytes: int = Field(64 * 1024, description="Flush a coalesced frame once it holds this many bytes")
+    channel_compression: bool = Field(False, description="Offer payload compression (zstd if installed, else zlib) on the Host-Enclave channel")
+    channel_compress_threshold: int = Field(1024, description="Only compress channel frames of at least this many bytes")
+    channel_receive_window: int = Field(0, description="Credit-based flow control: frames the Enclave may have outstanding towards the Host (0 disables)")
+    enclave_pool_balancing: str = Field("p2c", description="How commands are spread over connected Enclaves: p2c or least-outstanding")
+    enclave_pool_ejection_seconds: float = Field(10.0, description="How long an ejected Enclave worker waits before it is health-checked for re-admission")
+    enclave_hedge_percentile: float = Field(0.0, description="Resend a slow idempotent command to a second Enclave after this percentile of recent latency (0 disables hedging)")
+    enclave_hedge_budget: float = Field(0.05, description="Largest share of commands that may be hedged")
+    channel_rekey_after_frames: int = Field(0, description="Rotate the AEAD channel key after this many frames (0 disables)")
+    channel_rekey_after_seconds: float = Field(0.0, description="Rotate the AEAD channel key after this many seconds (0 disables)")
+    registry_watch_interval: float = Field(1.0, description="Seconds between measurement registry checks when inotify is unavailable (0 disables hot reload)")
+    registry_drain_seconds: float = Field(5.0, description="How long a revoked Enclave may finish in-flight commands before its channel is closed")
+    log_pipeline: bool = Field(False, description="Write host logs from a background thread through a bounded queue instead of on the calling thread")
+    log_queue_capacity: int = Field(10000, description="Records the log pipeline queue holds before its overflow policy applies")
+    log_queue_overflow: str = Field("drop-oldest", description="What the log pipeline does when its queue is full: drop-oldest or block")
+    log_queue_block_timeout: float = Field(0.1, description="With the block overflow policy, seconds a log call waits for queue space before its record is dropped")
+    log_rate_limits: Dict[str, float] = Field({}, description="Per-level cap on records per second from any one log call site, e.g. {\"INFO\": 20} (levels not listed are unlimited)")
+    log_sample_rates: Dict[str, float] = Field({}, description="Per-level fraction of records kept from each log call site, e.g. {\"DEBUG\": 0.1}")
+    log_rate_limit_burst: float = Field(20.0, description="Records a log call site may emit in a burst before its rate limit applies")
+    log_summary_interval_seconds: float = Field(60.0, description="How often suppressed-record counts are logged per call site")
+    log_store_path: Optional[str] = Field(None, description="Directory for the day-partitioned host operational log store (unset disables it)")
+    log_retention_days: int = Field(30, description="Days host operational log partitions are kept before they are dropped")
+    channel_ciphers: List[str] = Field(["fernet"], description="Host-Enclave channel ciphers offered in preference order (aes-256-gcm, chacha20-poly1305, fernet)")
 
     model_config = SettingsConfigDict(env_file=".env.host", env_file_encoding="utf-8", extra='ignore')
 
@@ -0,0 +1,218 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from queue import Empty
+from typing import Any, Callable, Deque, List, Optional, Tuple
+
+
+class ChannelQueue:
+    """
+    In-process frame queue for SecureChannel.
+
+    O(1) put/get on a deque, safe for any number of producer and consumer
+    threads, with consumers woken by a condition variable instead of polling.
+    `get_async` lets coroutines wait without blocking their event loop.
+    The `put`/`get(timeout=...)` surface matches `queue.Queue`, so the same
+    object can be handed to either side of the channel.
+    """
+    def __init__(self):
+        self._items: Deque[bytes] = deque()
+        self._not_empty = threading.Condition(threading.Lock())
+        self._async_waiters: Deque[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = deque()
+
+    def put(self, item: bytes):
+        with self._not_empty:
+            self._items.append(item)
+            self._not_empty.notify()
+            waiter = self._pop_async_waiter()
+        if waiter is not None:
+            loop, future = waiter
+            loop.call_soon_threadsafe(wake_future, future)
+
+    put_nowait = put
+
+    def get(self, block: bool = True, timeout: Optional[float] = None) -> bytes:
+        with self._not_empty:
+            if not block:
+                if not self._items:
+                    raise Empty
+            elif timeout is None:
+                while not self._items:
+                    self._not_empty.wait()
+            else:
+                deadline = time.monotonic() + timeout
+                while not self._items:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise Empty
+                    self._not_empty.wait(remaining)
+            return self._items.popleft()
+
+    def get_nowait(self) -> bytes:
+        return self.get(block=False)
+
+    async def put_async(self, item: bytes):
+        self.put(item)
+
+    async def get_async(self, timeout: Optional[float] = None) -> bytes:
+        """
+        Awaits the next item. Raises queue.Empty on timeout.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+        while True:
+            with self._not_empty:
+                if self._items:
+                    return self._items.popleft()
+                future = loop.create_future()
+                self._async_waiters.append((loop, future))
+            remaining = None if deadline is None else deadline - loop.time()
+            try:
+                if remaining is not None and remaining <= 0:
+                    raise asyncio.TimeoutError
+                await asyncio.wait_for(future, remaining)
+            except asyncio.TimeoutError:
+                with self._not_empty:
+                    self._discard_async_waiter(future)
+                    if self._items:
+                        return self._items.popleft()
+                raise Empty
+            except asyncio.CancelledError:
+                with self._not_empty:
+                    self._discard_async_waiter(future)
+                    # Pass on a wakeup this coroutine may have consumed.
+                    waiter = self._pop_async_waiter() if self._items else None
+                if waiter is not None:
+                    waiter[0].call_soon_threadsafe(wake_future, waiter[1])
+                raise
+            # Woken: loop round and take an item unless another consumer got there first.
+
+    def qsize(self) -> int:
+        return len(self._items)
+
+    def empty(self) -> bool:
+        return not self._items
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def _pop_async_waiter(self) -> Optional[Tuple[asyncio.AbstractEventLoop, asyncio.Future]]:
+        # Called with the lock held. Threads blocked in get() are woken by notify();
+        # one coroutine is woken as well, and retries if a thread wins the item.
+        while self._async_waiters:
+            loop, future = self._async_waiters.popleft()
+            if not future.done():
+                return loop, future
+        return None
+
+    def _discard_async_waiter(self, future: asyncio.Future):
+        for waiter in self._async_waiters:
+            if waiter[1] is future:
+                self._async_waiters.remove(waiter)
+                return
+
+
+def wake_future(future: asyncio.Future):
+    """Resolves a waiter future (via loop.call_soon_threadsafe) unless it was already cancelled."""
+    if not future.done():
+        future.set_result(None)
+
+
+async def _poll_async(take: Callable[[], bytes], timeout: Optional[float]) -> bytes:
+    """
+    Calls `take` (which raises queue.Empty when there is nothing to take) with
+    a backoff between tries. Cancellation only lands between tries, so no
+    item is ever taken and then lost.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = None if timeout is None else loop.time() + timeout
+    delay = _ListBackend.MIN_POLL
+    while True:
+        try:
+            return take()
+        except Empty:
+            pass
+        if deadline is not None and loop.time() >= deadline:
+            raise Empty
+        await asyncio.sleep(delay if deadline is None else min(delay, max(0.0, deadline - loop.time())))
+        delay = min(delay * 2, _ListBackend.MAX_POLL)
+
+
+class _QueueBackend:
+    """Adapts a `queue.Queue` (or anything with put/get(timeout=)) to the backend surface."""
+    def __init__(self, queue: Any):
+        self.queue = queue
+
+    def put(self, item: bytes):
+        self.queue.put(item)
+
+    def get(self, timeout: Optional[float] = None) -> bytes:
+        return self.queue.get(timeout=timeout)
+
+    async def put_async(self, item: bytes):
+        self.queue.put(item)
+
+    async def get_async(self, timeout: Optional[float] = None) -> bytes:
+        # Polled from the loop rather than a blocking get on a worker thread: a cancelled
+        # thread would still take the next item and drop it.
+        return await _poll_async(lambda: self.queue.get(timeout=0), timeout)
+
+    def qsize(self) -> int:
+        return self.queue.qsize()
+
+
+class _ListBackend:
+    """
+    Compatibility backend for a plain list shared with a peer that appends to
+    it directly. The peer cannot signal us, so waiting is still a poll, but with
+    a backoff that starts well below the old fixed 10 ms sleep.
+    """
+    MIN_POLL = 0.0005
+    MAX_POLL = 0.01
+
+    def __init__(self, items: List[bytes]):
+        self.items = items
+
+    def put(self, item: bytes):
+        self.items.append(item)
+
+    def get(self, timeout: Optional[float] = None) -> bytes:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        delay = self.MIN_POLL
+        while True:
+            try:
+                return self.items.pop(0)
+            except IndexError:
+                pass
+            if deadline is not None and time.monotonic() >= deadline:
+                raise Empty
+            time.sleep(delay)
+            delay = min(delay * 2, self.MAX_POLL)
+
+    async def put_async(self, item: bytes):
+        self.items.append(item)
+
+    async def get_async(self, timeout: Optional[float] = None) -> bytes:
+        return await _poll_async(self._pop, timeout)
+
+    def _pop(self) -> bytes:
+        try:
+            return self.items.pop(0)
+        except IndexError:
+            raise Empty
+
+    def qsize(self) -> int:
+        return len(self.items)
+
+
+def channel_backend(queue: Any) -> Any:
+    """
+    Returns the backend SecureChannel talks to for `queue`: ChannelQueue and
+    StreamTransport are used as-is, lists and `queue.Queue` objects are adapted.
+    """
+    if hasattr(queue, "get_async") and hasattr(queue, "put_async"):
+        return queue
+    if isinstance(queue, list):
+        return _ListBackend(queue)
+    return _QueueBackend(queue)
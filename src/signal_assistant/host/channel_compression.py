@@ -0,0 +1,66 @@
+import io
+import zlib
+from typing import Tuple
+
+try:
+    import zstandard
+except ImportError:  # Optional: zlib is always available.
+    zstandard = None
+
+COMPRESSION_ZSTD = "zstd"
+COMPRESSION_ZLIB = "zlib"
+
+DEFAULT_COMPRESS_THRESHOLD = 1024
+DEFAULT_MAX_DECOMPRESSED_SIZE = 16 * 1024 * 1024
+ZLIB_LEVEL = 6
+ZSTD_LEVEL = 3
+
+
+class DecompressionError(ValueError):
+    """Raised when a compressed frame is corrupt or expands beyond the configured limit."""
+    pass
+
+
+def available_codecs() -> Tuple[str, ...]:
+    """
+    Codecs this process can use, in preference order.
+    """
+    if zstandard is not None:
+        return (COMPRESSION_ZSTD, COMPRESSION_ZLIB)
+    return (COMPRESSION_ZLIB,)
+
+
+def compress(codec: str, data: bytes) -> bytes:
+    if codec == COMPRESSION_ZLIB:
+        return zlib.compress(data, ZLIB_LEVEL)
+    if codec == COMPRESSION_ZSTD and zstandard is not None:
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    raise ValueError(f"Unsupported compression codec '{codec}'.")
+
+
+def decompress(codec: str, data: bytes, max_size: int) -> bytes:
+    """
+    Decompresses `data`, refusing to produce more than `max_size` bytes.
+    Output is bounded while decoding, so a decompression bomb never gets materialised.
+    """
+    if codec == COMPRESSION_ZLIB:
+        decoder = zlib.decompressobj()
+        try:
+            plaintext = decoder.decompress(data, max_size + 1)
+        except zlib.error as e:
+            raise DecompressionError(f"Corrupt zlib frame: {e}")
+        if len(plaintext) > max_size or decoder.unconsumed_tail:
+            raise DecompressionError(f"Frame expands beyond {max_size} bytes.")
+        if not decoder.eof:
+            raise DecompressionError("Truncated zlib frame.")
+        return plaintext
+    if codec == COMPRESSION_ZSTD and zstandard is not None:
+        try:
+            with zstandard.ZstdDecompressor().stream_reader(io.BytesIO(data)) as reader:
+                plaintext = reader.read(max_size + 1)
+        except zstandard.ZstdError as e:
+            raise DecompressionError(f"Corrupt zstd frame: {e}")
+        if len(plaintext) > max_size:
+            raise DecompressionError(f"Frame expands beyond {max_size} bytes.")
+        return plaintext
+    raise DecompressionError(f"Unsupported compression codec '{codec}'.")
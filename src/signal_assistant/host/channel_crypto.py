@@ -0,0 +1,242 @@
+import os
+import struct
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM, ChaCha20Poly1305
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+from cryptography.exceptions import InvalidTag
+
+from signal_assistant.host.logging_client import LoggingClient
+
+# Instantiate the logger once per module
+host_logger = LoggingClient("HostApp")
+
+CIPHER_FERNET = "fernet"
+CIPHER_AES_GCM = "aes-256-gcm"
+CIPHER_CHACHA20 = "chacha20-poly1305"
+
+AEAD_CIPHERS = {
+    CIPHER_AES_GCM: AESGCM,
+    CIPHER_CHACHA20: ChaCha20Poly1305,
+}
+SUPPORTED_CIPHERS = (CIPHER_AES_GCM, CIPHER_CHACHA20, CIPHER_FERNET)
+
+KEY_SHARE_SIZE = 32
+REPLAY_WINDOW = 64
+REKEY_INFO = b"signal-assistant/channel/v1/rekey"
+# A receiver will ratchet at most this many epochs ahead for one frame.
+MAX_EPOCH_SKIP = 16
+
+
+class FrameAuthenticationError(Exception):
+    """Raised when an AEAD frame is malformed, replayed or fails authentication."""
+    pass
+
+
+def derive_session_keys(cipher: str, initiator_share: bytes, responder_share: bytes):
+    """
+    Derives one key per direction from both handshake key shares.
+    Returns (initiator_to_responder_key, responder_to_initiator_key).
+    """
+    material = HKDF(
+        algorithm=hashes.SHA256(),
+        length=64,
+        salt=None,
+        info=b"signal-assistant/channel/v1/" + cipher.encode("ascii"),
+    ).derive(initiator_share + responder_share)
+    return material[:32], material[32:]
+
+
+def new_key_share() -> bytes:
+    return os.urandom(KEY_SHARE_SIZE)
+
+
+def ratchet_key(key: bytes) -> bytes:
+    """
+    Derives the next epoch's key from the current one. One-way, so a leaked key exposes no earlier epoch.
+    """
+    return HKDF(algorithm=hashes.SHA256(), length=32, salt=None, info=REKEY_INFO).derive(key)
+
+
+class ReplayWindow:
+    """Sliding bitmap of the last REPLAY_WINDOW counters seen under one key."""
+    def __init__(self):
+        self.highest: Optional[int] = None
+        self.bits = 0
+
+    def is_replay(self, counter: int) -> bool:
+        if self.highest is None or counter > self.highest:
+            return False
+        offset = self.highest - counter
+        if offset >= REPLAY_WINDOW:
+            return True
+        return bool(self.bits & (1 << offset))
+
+    def mark(self, counter: int):
+        if self.highest is None:
+            self.highest = counter
+            self.bits = 1
+        elif counter > self.highest:
+            shift = counter - self.highest
+            self.bits = ((self.bits << shift) | 1) & ((1 << REPLAY_WINDOW) - 1)
+            self.highest = counter
+        else:
+            self.bits |= 1 << (self.highest - counter)
+
+
+class _ReceiveEpoch:
+    def __init__(self, cipher: str, key: bytes):
+        self.key = key
+        self.aead = AEAD_CIPHERS[cipher](key)
+        self.window = ReplayWindow()
+        self.retired_at: Optional[float] = None
+
+
+class AeadSession:
+    """
+    Session cipher for negotiated AEAD channels.
+
+    Frames are raw binary: version (u8) | counter (u64) | ciphertext+tag.
+    The 96-bit nonce is the 64-bit send counter, so it never repeats under one
+    key; the header is authenticated as associated data, and the receiver keeps
+    a sliding window of seen counters to reject replays.
+
+    With `epochs=True` frames also carry a key epoch (version 0xA2,
+    version | epoch (u32) | counter). The sender ratchets its key forward with
+    `ratchet_key` after `rekey_after_frames` frames or `rekey_after_seconds`,
+    restarting the counter; the receiver follows the epoch in the header, only
+    once a frame under the new key authenticates, and keeps the previous key
+    for `grace_period` seconds so frames already in flight still open.
+    """
+    FRAME_VERSION = 0xA1
+    HEADER = struct.Struct("!BQ")
+    EPOCH_FRAME_VERSION = 0xA2
+    EPOCH_HEADER = struct.Struct("!BIQ")
+    MAX_COUNTER = 2 ** 64 - 1
+    MAX_EPOCH = 2 ** 32 - 1
+
+    def __init__(self, cipher: str, send_key: bytes, receive_key: bytes, epochs: bool = False,
+                 rekey_after_frames: Optional[int] = None, rekey_after_seconds: Optional[float] = None,
+                 grace_period: float = 5.0, clock: Callable[[], float] = time.monotonic):
+        if cipher not in AEAD_CIPHERS:
+            raise ValueError(f"Unsupported AEAD cipher '{cipher}'.")
+        self.cipher = cipher
+        self.epochs = epochs
+        self.rekey_after_frames = rekey_after_frames
+        self.rekey_after_seconds = rekey_after_seconds
+        self.grace_period = grace_period
+        self._clock = clock
+        self._lock = threading.Lock()
+
+        self._send_key = send_key
+        self._send_aead = AEAD_CIPHERS[cipher](send_key)
+        self._send_counter = 0
+        self.send_epoch = 0
+        self._send_epoch_started = clock()
+
+        self.receive_epoch = 0
+        self._receive_epochs: Dict[int, _ReceiveEpoch] = {0: _ReceiveEpoch(cipher, receive_key)}
+
+    @staticmethod
+    def _nonce(counter: int) -> bytes:
+        return b"\x00\x00\x00\x00" + counter.to_bytes(8, "big")
+
+    def _rekey_due(self) -> bool:
+        if self.rekey_after_frames is not None and self._send_counter >= self.rekey_after_frames:
+            return True
+        if self.rekey_after_seconds is not None and self._clock() - self._send_epoch_started >= self.rekey_after_seconds:
+            return True
+        return self._send_counter >= self.MAX_COUNTER
+
+    def rotate_send_key(self):
+        """
+        Moves the send side to the next key epoch now, regardless of the configured triggers.
+        """
+        if not self.epochs:
+            raise FrameAuthenticationError("Key rotation needs an epoch-tagged session.")
+        with self._lock:
+            self._rotate_send_locked()
+
+    def _rotate_send_locked(self):
+        if self.send_epoch >= self.MAX_EPOCH:
+            raise FrameAuthenticationError("Key epochs exhausted; the session must be re-established.")
+        self._send_key = ratchet_key(self._send_key)
+        self._send_aead = AEAD_CIPHERS[self.cipher](self._send_key)
+        self._send_counter = 0
+        self.send_epoch += 1
+        self._send_epoch_started = self._clock()
+        host_logger.info(None, "Host SecureChannel rotated send key.", metadata={"epoch": self.send_epoch})
+
+    def encrypt(self, plaintext: bytes) -> bytes:
+        with self._lock:
+            if self.epochs and self._rekey_due():
+                self._rotate_send_locked()
+            counter = self._send_counter
+            if counter >= self.MAX_COUNTER:
+                raise FrameAuthenticationError("Send counter exhausted; the session must be re-established.")
+            self._send_counter += 1
+            aead = self._send_aead
+            if self.epochs:
+                header = self.EPOCH_HEADER.pack(self.EPOCH_FRAME_VERSION, self.send_epoch, counter)
+            else:
+                header = self.HEADER.pack(self.FRAME_VERSION, counter)
+        return header + aead.encrypt(self._nonce(counter), plaintext, header)
+
+    def decrypt(self, frame: bytes) -> bytes:
+        header_format = self.EPOCH_HEADER if self.epochs else self.HEADER
+        if len(frame) < header_format.size:
+            raise FrameAuthenticationError("Frame too short.")
+        if self.epochs:
+            version, epoch, counter = header_format.unpack_from(frame)
+            expected = self.EPOCH_FRAME_VERSION
+        else:
+            (version, counter), epoch = header_format.unpack_from(frame), 0
+            expected = self.FRAME_VERSION
+        if version != expected:
+            raise FrameAuthenticationError(f"Unexpected frame version {version:#x}.")
+        header = frame[:header_format.size]
+        with self._lock:
+            state = self._receive_state(epoch)
+        try:
+            plaintext = state.aead.decrypt(self._nonce(counter), frame[header_format.size:], header)
+        except InvalidTag:
+            raise FrameAuthenticationError("Frame failed authentication.")
+        # Only authenticated frames may move the replay window or the receive epoch.
+        with self._lock:
+            if state.window.is_replay(counter):
+                raise FrameAuthenticationError(f"Replayed or stale frame counter {counter}.")
+            state.window.mark(counter)
+            if epoch > self.receive_epoch:
+                self._advance_receive_epoch(epoch, state)
+        return plaintext
+
+    def _receive_state(self, epoch: int) -> _ReceiveEpoch:
+        """
+        Returns the key state for `epoch`, deriving a candidate if it is ahead of the current one.
+        Called with the lock held; a candidate is only installed after a frame authenticates.
+        """
+        now = self._clock()
+        for old_epoch, state in list(self._receive_epochs.items()):
+            if state.retired_at is not None and now - state.retired_at > self.grace_period:
+                del self._receive_epochs[old_epoch]
+        if epoch in self._receive_epochs:
+            return self._receive_epochs[epoch]
+        if epoch < self.receive_epoch:
+            raise FrameAuthenticationError(f"Frame from expired key epoch {epoch}.")
+        if epoch - self.receive_epoch > MAX_EPOCH_SKIP:
+            raise FrameAuthenticationError(f"Frame key epoch {epoch} is too far ahead.")
+        key = self._receive_epochs[self.receive_epoch].key
+        for _ in range(epoch - self.receive_epoch):
+            key = ratchet_key(key)
+        return _ReceiveEpoch(self.cipher, key)
+
+    def _advance_receive_epoch(self, epoch: int, state: _ReceiveEpoch):
+        now = self._clock()
+        for old in self._receive_epochs.values():
+            if old.retired_at is None:
+                old.retired_at = now
+        self._receive_epochs[epoch] = state
+        self.receive_epoch = epoch
@@ -0,0 +1,101 @@
+import struct
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+
+class EnvelopeError(ValueError):
+    """Raised when a multiplexed frame does not carry a well-formed envelope."""
+    pass
+
+
+ENVELOPE_VERSION = 1
+# version (u8) | request_id (u32)
+ENVELOPE_HEADER = struct.Struct("!BI")
+# Extended form, used only when flags, seq or a deadline are set:
+# version (u8) | request_id (u32) | flags (u8) | seq (u32) [| deadline_ms (u64) if FLAG_DEADLINE]
+ENVELOPE_VERSION_EXTENDED = 2
+ENVELOPE_HEADER_EXTENDED = struct.Struct("!BIBI")
+MAX_REQUEST_ID = 0xFFFFFFFF
+
+# On a command: the caller accepts a streamed response.
+# On a response: this is chunk `seq` of a streamed response.
+FLAG_STREAM = 0x01
+# On a streamed response: this is the last chunk.
+FLAG_END = 0x02
+# A wall-clock deadline (Unix epoch milliseconds) follows the header.
+FLAG_DEADLINE = 0x04
+DEADLINE_FIELD = struct.Struct("!Q")
+
+
+@dataclass(frozen=True)
+class Envelope:
+    """
+    Correlation envelope wrapped around a serialized command (Host -> Enclave)
+    or its response (Enclave -> Host) when the proxy runs multiplexed.
+    The Enclave echoes `request_id` back so responses can arrive in any order.
+
+    A streamed response is several envelopes with the same `request_id`,
+    FLAG_STREAM set and increasing `seq`, the last one also carrying FLAG_END.
+    Envelopes without flags or seq keep the original 5-byte header.
+
+    `deadline` is an absolute Unix time in seconds (wall clock, since the Host
+    and Enclave do not share a monotonic clock) after which nobody will read
+    the response; the Enclave should skip work on expired commands.
+    """
+    request_id: int
+    body: bytes
+    flags: int = 0
+    seq: int = 0
+    deadline: Optional[float] = None
+
+    def pack(self) -> bytes:
+        if not self.flags and not self.seq and self.deadline is None:
+            return ENVELOPE_HEADER.pack(ENVELOPE_VERSION, self.request_id) + self.body
+        flags = self.flags
+        trailer = b""
+        if self.deadline is not None:
+            flags |= FLAG_DEADLINE
+            trailer = DEADLINE_FIELD.pack(int(self.deadline * 1000))
+        header = ENVELOPE_HEADER_EXTENDED.pack(ENVELOPE_VERSION_EXTENDED, self.request_id, flags, self.seq)
+        return header + trailer + self.body
+
+    def expired(self, now: Optional[float] = None) -> bool:
+        if self.deadline is None:
+            return False
+        return (time.time() if now is None else now) >= self.deadline
+
+    @property
+    def streamed(self) -> bool:
+        return bool(self.flags & FLAG_STREAM)
+
+    @property
+    def final(self) -> bool:
+        """
+        True for a plain response or the last chunk of a stream.
+        """
+        return not self.streamed or bool(self.flags & FLAG_END)
+
+    @classmethod
+    def unpack(cls, data: bytes) -> "Envelope":
+        if len(data) < ENVELOPE_HEADER.size:
+            raise EnvelopeError(f"Envelope too short ({len(data)} bytes).")
+        version = data[0]
+        if version == ENVELOPE_VERSION:
+            _, request_id = ENVELOPE_HEADER.unpack_from(data)
+            return cls(request_id=request_id, body=data[ENVELOPE_HEADER.size:])
+        if version == ENVELOPE_VERSION_EXTENDED:
+            if len(data) < ENVELOPE_HEADER_EXTENDED.size:
+                raise EnvelopeError(f"Envelope too short ({len(data)} bytes).")
+            _, request_id, flags, seq = ENVELOPE_HEADER_EXTENDED.unpack_from(data)
+            offset = ENVELOPE_HEADER_EXTENDED.size
+            deadline = None
+            if flags & FLAG_DEADLINE:
+                if len(data) < offset + DEADLINE_FIELD.size:
+                    raise EnvelopeError("Envelope deadline field truncated.")
+                (deadline_ms,) = DEADLINE_FIELD.unpack_from(data, offset)
+                deadline = deadline_ms / 1000
+                offset += DEADLINE_FIELD.size
+            return cls(request_id=request_id, body=data[offset:], flags=flags & ~FLAG_DEADLINE, seq=seq,
+                       deadline=deadline)
+        raise EnvelopeError(f"Unsupported envelope version {version}.")
@@ -1,6 +1,537 @@
 import logging
+import os
+import random
 import re # Added re
-from typing import Optional, Dict, Any
+import sys
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Callable, Optional, Dict, Any, Deque, List, Tuple
+
+# Strict checks to prevent forbidden keywords and direct SignalID usage.
+# These patterns must match what is expected by tests.
+FORBIDDEN_KEYWORDS = ("signalid", "signal_id", "prompt:", "response:", "message body:")
+
+# PII pattern detection
+PII_PATTERNS = (
+    r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b', # Email
+    r'\b\d{3}[-.\s]?\d{3}[-.\s]?\d{4}\b' # Phone number (simple)
+)
+_EMAIL_REGEX, _PHONE_REGEX = (re.compile(pattern_str) for pattern_str in PII_PATTERNS)
+_KEYWORD_REGEX = re.compile("|".join(re.escape(k) for k in FORBIDDEN_KEYWORDS))
+
+
+def check_loggable(text: str, where: str):
+    """
+    Raises ValueError if `text` contains a forbidden keyword or a PII pattern,
+    reporting the first rule in FORBIDDEN_KEYWORDS / PII_PATTERNS order.
+    """
+    lowered = text.lower()
+    # One pass for all keywords; only on a hit do we look for which one to report.
+    if _KEYWORD_REGEX.search(lowered):
+        for keyword in FORBIDDEN_KEYWORDS:
+            if keyword in lowered:
+                raise ValueError(f"Attempted to log forbidden keyword '{keyword}' in {where}.")
+    # An email address needs an '@'; checking for it skips the regex on almost every line.
+    if "@" in text and _EMAIL_REGEX.search(text):
+        raise ValueError(f"Attempted to log potential PII pattern '{PII_PATTERNS[0]}' in {where}.")
+    if _PHONE_REGEX.search(text):
+        raise ValueError(f"Attempted to log potential PII pattern '{PII_PATTERNS[1]}' in {where}.")
+
+
+# Integers below this have at most 9 digits, too few for the phone pattern, so they need no scan.
+_SAFE_INT_LIMIT = 10 ** 9
+# Keys and short values are cached; longer strings are too likely to be one-off.
+_CACHEABLE_LENGTH = 256
+_MAX_METADATA_DEPTH = 16
+
+
+@lru_cache(maxsize=4096)
+def _metadata_verdict(text: str) -> Optional[str]:
+    """
+    The error check_loggable raises for this metadata string, or None if it is clean.
+    """
+    try:
+        check_loggable(text, "metadata")
+    except ValueError as e:
+        return str(e)
+    return None
+
+
+def _check_metadata_text(text: str):
+    if len(text) <= _CACHEABLE_LENGTH:
+        verdict = _metadata_verdict(text)
+        if verdict is not None:
+            raise ValueError(verdict)
+    else:
+        check_loggable(text, "metadata")
+
+
+def check_metadata(value: Any, depth: int = 0):
+    """
+    Applies check_loggable to every key and leaf in `value` instead of to
+    str(value), so no large string is built. Booleans, None and integers too
+    short to be a phone number are skipped; strings use cached verdicts.
+    """
+    kind = type(value)
+    if kind is dict and depth < _MAX_METADATA_DEPTH:
+        for k, v in value.items():
+            # Inline fast path for the common flat shape: string keys with string or small-int values.
+            for item in (k, v):
+                item_kind = type(item)
+                if item_kind is str and len(item) <= _CACHEABLE_LENGTH:
+                    verdict = _metadata_verdict(item)
+                    if verdict is not None:
+                        raise ValueError(verdict)
+                elif item_kind is int and -_SAFE_INT_LIMIT < item < _SAFE_INT_LIMIT:
+                    continue
+                else:
+                    check_metadata(item, depth + 1)
+    elif value is None or kind is bool:
+        return
+    elif isinstance(value, int):
+        if not -_SAFE_INT_LIMIT < value < _SAFE_INT_LIMIT:
+            _check_metadata_text(str(value))
+    elif isinstance(value, str):
+        _check_metadata_text(value)
+    elif depth >= _MAX_METADATA_DEPTH:
+        check_loggable(str(value).lower(), "metadata")
+    elif isinstance(value, (list, tuple, set, frozenset, dict)):
+        for item in (value.items() if isinstance(value, dict) else value):
+            check_metadata(item, depth + 1)
+    else:
+        # Floats, bytes and arbitrary objects: scan their text form, as before.
+        check_loggable(str(value).lower(), "metadata")
+
+
+OVERFLOW_DROP_OLDEST = "drop-oldest"
+OVERFLOW_BLOCK = "block"
+OVERFLOW_POLICIES = (OVERFLOW_DROP_OLDEST, OVERFLOW_BLOCK)
+# Under `block`, how long a log call may stall its thread (often the event loop) for queue space.
+DEFAULT_BLOCK_TIMEOUT = 0.1
+
+
+@dataclass
+class LogPipelineStats:
+    """
+    Log pipeline counters. `dropped` counts records lost to a full queue
+    (evicted under drop-oldest, or timed out under block) and records put
+    after the pipeline was stopped.
+    """
+    enqueued: int = 0
+    dropped: int = 0
+    written: int = 0
+    batches: int = 0
+    max_depth: int = 0
+    errors: int = 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "enqueued": self.enqueued,
+            "dropped": self.dropped,
+            "written": self.written,
+            "batches": self.batches,
+            "max_depth": self.max_depth,
+            "errors": self.errors,
+        }
+
+
+class _PipelineHandler(logging.Handler):
+    def __init__(self, pipeline: "LogPipeline"):
+        super().__init__()
+        self.pipeline = pipeline
+
+    def emit(self, record: logging.LogRecord):
+        self.pipeline.put(record)
+
+
+class LogPipeline:
+    """
+    Moves log output off the calling thread (for the host, the asyncio loop).
+
+    Attached loggers hand their already-validated records to a bounded queue.
+    A background thread formats and writes them in batches, to the handlers
+    the logger had (and its ancestors', if it propagated). It writes each
+    stream once per batch. When the queue is full, `drop-oldest` evicts the
+    oldest record, and `block` makes the caller wait up to `block_timeout`
+    seconds before the record is dropped. None waits indefinitely, which is
+    only safe if no caller runs on the event loop.
+    """
+    def __init__(self, capacity: int = 10_000, overflow: str = OVERFLOW_DROP_OLDEST, batch_size: int = 256,
+                 block_timeout: Optional[float] = DEFAULT_BLOCK_TIMEOUT):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown log overflow policy '{overflow}'.")
+        if capacity < 1:
+            raise ValueError("Log pipeline capacity must be at least 1.")
+        self.capacity = capacity
+        self.overflow = overflow
+        self.batch_size = batch_size
+        self.block_timeout = block_timeout
+        self.stats = LogPipelineStats()
+        self._queue: Deque[logging.LogRecord] = deque()
+        self._cond = threading.Condition()
+        self._writing = False
+        self._closed = False
+        self._handler = _PipelineHandler(self)
+        self._attached: Dict[str, Tuple[List[logging.Handler], bool]] = {}
+        self._thread: Optional[threading.Thread] = None
+
+    def attach(self, logger: logging.Logger):
+        with self._cond:
+            if logger.name in self._attached:
+                return
+            self._attached[logger.name] = (list(logger.handlers), logger.propagate)
+        logger.handlers = [self._handler]
+        logger.propagate = False
+
+    def start(self) -> "LogPipeline":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="LogPipeline", daemon=True)
+            self._thread.start()
+        return self
+
+    def put(self, record: logging.LogRecord):
+        with self._cond:
+            if self._closed:
+                # The writer thread may already have finished; nothing would write this record.
+                self.stats.dropped += 1
+                return
+            if len(self._queue) >= self.capacity:
+                if self.overflow == OVERFLOW_BLOCK:
+                    self._cond.wait_for(lambda: self._closed or len(self._queue) < self.capacity, self.block_timeout)
+                    if self._closed or len(self._queue) >= self.capacity:
+                        self.stats.dropped += 1
+                        return
+                else:
+                    self._queue.popleft()
+                    self.stats.dropped += 1
+            self._queue.append(record)
+            self.stats.enqueued += 1
+            self.stats.max_depth = max(self.stats.max_depth, len(self._queue))
+            self._cond.notify_all()
+
+    def depth(self) -> int:
+        return len(self._queue)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._closed or self._queue)
+                if not self._queue:
+                    return
+                batch = [self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))]
+                self._writing = True
+                # Wake callers blocked on a full queue.
+                self._cond.notify_all()
+            try:
+                self._write(batch)
+            finally:
+                with self._cond:
+                    self._writing = False
+                    self.stats.written += len(batch)
+                    self.stats.batches += 1
+                    self._cond.notify_all()
+
+    def _targets(self, name: str) -> List[logging.Handler]:
+        handlers, propagate = self._attached.get(name, ([], True))
+        targets = list(handlers)
+        parent = logging.getLogger(name).parent
+        while propagate and parent is not None:
+            targets.extend(parent.handlers)
+            propagate, parent = parent.propagate, parent.parent
+        return targets
+
+    def _write(self, batch: List[logging.LogRecord]):
+        lines: Dict[logging.Handler, List[str]] = {}
+        for record in batch:
+            for handler in self._targets(record.name):
+                if record.levelno < handler.level or not handler.filter(record):
+                    continue
+                try:
+                    if isinstance(handler, logging.StreamHandler) and handler.stream is not None:
+                        lines.setdefault(handler, []).append(handler.format(record))
+                    else:
+                        handler.handle(record)
+                except Exception:
+                    self.stats.errors += 1
+        for handler, formatted in lines.items():
+            try:
+                with handler.lock:
+                    handler.stream.write(handler.terminator.join(formatted) + handler.terminator)
+                    handler.flush()
+            except Exception:
+                self.stats.errors += 1
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Waits until every queued record has been written. Returns False on timeout.
+        """
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._queue and not self._writing, timeout)
+
+    def stop(self, timeout: Optional[float] = 5):
+        """
+        Writes what is queued, stops the thread and gives attached loggers their handlers back.
+        """
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        for name, (handlers, propagate) in self._attached.items():
+            logger = logging.getLogger(name)
+            logger.handlers = handlers
+            logger.propagate = propagate
+        self._attached.clear()
+
+
+# Loggers created through LoggingClient, so a pipeline started later can attach to all of them.
+_client_loggers: List[logging.Logger] = []
+_pipeline: Optional[LogPipeline] = None
+
+
+def start_log_pipeline(**options) -> LogPipeline:
+    """
+    Routes every LoggingClient logger (existing and future) through one LogPipeline.
+    """
+    global _pipeline
+    if _pipeline is not None:
+        return _pipeline
+    _pipeline = LogPipeline(**options)
+    for logger in _client_loggers:
+        _pipeline.attach(logger)
+    return _pipeline.start()
+
+
+def stop_log_pipeline():
+    global _pipeline
+    if _pipeline is not None:
+        _pipeline.stop()
+        _pipeline = None
+
+
+class LogStoreHandler(logging.Handler):
+    """
+    Persists records to a host LogStore (storage/log_store.py), indexed by
+    the `internal_user_id` LoggingClient attaches to each record.
+    """
+    def __init__(self, store, level: int = logging.NOTSET):
+        super().__init__(level)
+        self.store = store
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            self.store.append(record.created, record.levelname, record.name, record.getMessage(),
+                              internal_user_id=getattr(record, "internal_user_id", None),
+                              metadata=getattr(record, "metadata", None))
+        except Exception:
+            self.handleError(record)
+
+
+_store_handler: Optional[LogStoreHandler] = None
+
+
+def _client_handlers(logger: logging.Logger) -> List[logging.Handler]:
+    # While a pipeline owns the logger, its real handlers live in the pipeline.
+    if _pipeline is not None and logger.name in _pipeline._attached:
+        return _pipeline._attached[logger.name][0]
+    return logger.handlers
+
+
+def attach_log_store(store) -> LogStoreHandler:
+    """
+    Persists the records of every LoggingClient logger (existing and future) to `store`.
+    """
+    global _store_handler
+    if _store_handler is not None:
+        return _store_handler
+    _store_handler = LogStoreHandler(store)
+    for logger in _client_loggers:
+        _client_handlers(logger).append(_store_handler)
+    return _store_handler
+
+
+def detach_log_store():
+    global _store_handler
+    if _store_handler is not None:
+        for logger in _client_loggers:
+            handlers = _client_handlers(logger)
+            if _store_handler in handlers:
+                handlers.remove(_store_handler)
+        _store_handler.close()
+        _store_handler = None
+
+
+@dataclass
+class LogRateLimit:
+    """
+    Per-template limit for one level: a token bucket of `rate` records per
+    second (None: unlimited) holding up to `burst`. Records the bucket lets
+    through, burst included, are then sampled: a `sample` fraction is kept.
+    """
+    rate: Optional[float] = None
+    burst: float = 10.0
+    sample: float = 1.0
+
+
+@dataclass
+class _TemplateBucket:
+    tokens: float
+    refilled_at: float
+    suppressed: int = 0
+
+
+@dataclass
+class LogRateLimiterStats:
+    """Rate limiter counters: records allowed and suppressed, and suppression summaries emitted."""
+    allowed: int = 0
+    suppressed: int = 0
+    summaries: int = 0
+    suppressed_by_level: Dict[str, int] = field(default_factory=dict)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "allowed": self.allowed,
+            "suppressed": self.suppressed,
+            "summaries": self.summaries,
+            "suppressed_by_level": dict(self.suppressed_by_level),
+        }
+
+
+class LogRateLimiter:
+    """
+    Rate limits and samples records per template, where a template is the
+    call site (file and line) of the LoggingClient call. A chatty line such as
+    a per-message "sending command" is thinned out, and other lines keep their
+    own budget.
+
+    Levels without an entry in `limits` pass untouched. Every
+    `summary_interval` seconds, each template that lost records gets one INFO
+    line on its logger with the suppressed count. Summaries are due-checked on
+    each `allow()` and, once `start()`ed (configure_rate_limits does this), by a
+    background timer, so a call site that goes quiet still reports; `close()`
+    and a log pipeline flush emit whatever is pending.
+    """
+    def __init__(self, limits: Dict[int, LogRateLimit], summary_interval: float = 60.0,
+                 clock: Callable[[], float] = time.monotonic, rng: Optional[random.Random] = None):
+        self.limits = dict(limits)
+        self.summary_interval = summary_interval
+        self.stats = LogRateLimiterStats()
+        self._clock = clock
+        self._rng = rng or random.Random()
+        self._buckets: Dict[Tuple[str, str], _TemplateBucket] = {}
+        self._lock = threading.Lock()
+        self._summarized_at = clock()
+        self._stopped = threading.Event()
+        self._timer: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_level_names(cls, rates: Dict[str, float], samples: Dict[str, float], burst: float = 10.0,
+                         summary_interval: float = 60.0) -> "LogRateLimiter":
+        """
+        Builds a limiter from per-level settings keyed by level name, e.g. {"INFO": 20}.
+        """
+        rates = {k.upper(): v for k, v in rates.items()}
+        samples = {k.upper(): v for k, v in samples.items()}
+        limits: Dict[int, LogRateLimit] = {}
+        for name in set(rates) | set(samples):
+            level = logging.getLevelName(name)
+            if not isinstance(level, int):
+                raise ValueError(f"Unknown log level '{name}'.")
+            limits[level] = LogRateLimit(rate=rates.get(name), burst=burst, sample=samples.get(name, 1.0))
+        return cls(limits, summary_interval=summary_interval)
+
+    def allow(self, logger: logging.Logger, level: int, site: str) -> bool:
+        limit = self.limits.get(level)
+        if limit is None:
+            return True
+        now = self._clock()
+        with self._lock:
+            bucket = self._buckets.get((logger.name, site))
+            if bucket is None:
+                bucket = self._buckets[(logger.name, site)] = _TemplateBucket(tokens=limit.burst, refilled_at=now)
+            allowed = True
+            if limit.rate is not None:
+                bucket.tokens = min(limit.burst, bucket.tokens + (now - bucket.refilled_at) * limit.rate)
+                bucket.refilled_at = now
+                if bucket.tokens >= 1:
+                    bucket.tokens -= 1
+                else:
+                    allowed = False
+            if allowed and limit.sample < 1.0 and self._rng.random() >= limit.sample:
+                allowed = False
+            if allowed:
+                self.stats.allowed += 1
+            else:
+                bucket.suppressed += 1
+                self.stats.suppressed += 1
+                level_name = logging.getLevelName(level)
+                self.stats.suppressed_by_level[level_name] = self.stats.suppressed_by_level.get(level_name, 0) + 1
+        self._emit_if_due(now)
+        return allowed
+
+    def _emit_if_due(self, now: float):
+        if now - self._summarized_at >= self.summary_interval:
+            self.emit_summaries()
+
+    def start(self) -> "LogRateLimiter":
+        if self._timer is None:
+            self._timer = threading.Thread(target=self._summary_loop, name="LogRateLimiterSummaries", daemon=True)
+            self._timer.start()
+        return self
+
+    def _summary_loop(self):
+        while not self._stopped.wait(self.summary_interval):
+            self._emit_if_due(self._clock())
+
+    def close(self):
+        """
+        Stops the summary timer and emits the summaries still pending.
+        """
+        self._stopped.set()
+        if self._timer is not None and self._timer is not threading.current_thread():
+            self._timer.join(timeout=1)
+        self.emit_summaries()
+
+    def emit_summaries(self):
+        """
+        Logs one line per template with records suppressed since the last summary.
+        """
+        with self._lock:
+            self._summarized_at = self._clock()
+            pending = [(name, site, b.suppressed) for (name, site), b in self._buckets.items() if b.suppressed]
+            for name, site in [(name, site) for name, site, _ in pending]:
+                self._buckets[(name, site)].suppressed = 0
+            self.stats.summaries += len(pending)
+        for name, site, count in pending:
+            # Fixed text and numeric counts only, so this bypasses the checks and the limiter itself.
+            logging.getLogger(name).info("Host log rate limit suppressed records.",
+                                         extra={"metadata": {"site": site, "suppressed": count}})
+
+
+_rate_limiter: Optional[LogRateLimiter] = None
+
+
+def configure_rate_limits(limiter: Optional[LogRateLimiter]):
+    """
+    Installs (or, with None, removes) the rate limiter used by every LoggingClient
+    and starts its summary timer. A limiter being replaced is closed, so its
+    pending summaries are emitted.
+    """
+    global _rate_limiter
+    if _rate_limiter is not None and limiter is not _rate_limiter:
+        _rate_limiter.close()
+    _rate_limiter = limiter
+    if limiter is not None:
+        limiter.start()
+
+
+def _call_site(depth: int) -> str:
+    frame = sys._getframe(depth + 1)
+    return f"{os.path.basename(frame.f_code.co_filename)}:{frame.f_lineno}"
+
 
 class LoggingClient:
     def __init__(self, name: str):
@@ -14,24 +545,20 @@ class LoggingClient:
             handler.setFormatter(formatter)
             self.logger.addHandler(handler)
 
+        if self.logger not in _client_loggers:
+            _client_loggers.append(self.logger)
+        if _store_handler is not None and _store_handler not in _client_handlers(self.logger):
+            _client_handlers(self.logger).append(_store_handler)
+        if _pipeline is not None:
+            _pipeline.attach(self.logger)
+
     def _log(self, level: int, message: str, internal_user_id: Optional[str] = None, metadata: Optional[Dict[str, Any]] = None, **kwargs):
-        # Strict checks to prevent forbidden keywords and direct SignalID usage.
-        # These patterns must match what is expected by tests.
-        forbidden_keywords = ["signalid", "signal_id", "prompt:", "response:", "message body:"]
-        
-        # PII pattern detection
-        pii_patterns = [
-            r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b', # Email
-            r'\b\d{3}[-.\s]?\d{3}[-.\s]?\d{4}\b' # Phone number (simple)
-        ]
+        # Records the logger would drop are never scanned.
+        if not self.logger.isEnabledFor(level):
+            return
 
         # Check message content
-        for keyword in forbidden_keywords:
-            if keyword in message.lower():
-                raise ValueError(f"Attempted to log forbidden keyword '{keyword}' in message.")
-        for pattern_str in pii_patterns:
-            if re.search(pattern_str, message):
-                raise ValueError(f"Attempted to log potential PII pattern '{pattern_str}' in message.")
+        check_loggable(message, "message")
 
         # Extract custom metadata if present in kwargs (backwards compatibility) or use explicit arg
         if metadata is None:
@@ -39,13 +566,20 @@ class LoggingClient:
         
         # Check metadata content
         if metadata:
-            metadata_str = str(metadata).lower()
-            for keyword in forbidden_keywords:
-                if keyword in metadata_str:
-                    raise ValueError(f"Attempted to log forbidden keyword '{keyword}' in metadata.")
-            for pattern_str in pii_patterns:
-                if re.search(pattern_str, metadata_str):
-                    raise ValueError(f"Attempted to log potential PII pattern '{pattern_str}' in metadata.")
+            try:
+                check_metadata(metadata)
+            except ValueError:
+                # Rare path: rescan the whole text form so the reported rule is the one the
+                # flat scan would pick when several leaves break different rules.
+                check_loggable(str(metadata).lower(), "metadata")
+                raise
+
+        # Rate limiting comes after the checks, so a violation raises even when the record would be dropped.
+        limiter = _rate_limiter
+        if limiter is not None and level in limiter.limits:
+            # Frames: _call_site <- _log <- debug/info/... <- the caller whose line is the template.
+            if not limiter.allow(self.logger, level, _call_site(2)):
+                return
 
         # Ensure internal_user_id is part of the message if provided.
         log_message = f"User({internal_user_id}) - {message}" if internal_user_id else message
@@ -55,6 +589,9 @@ class LoggingClient:
             if 'extra' not in kwargs:
                 kwargs['extra'] = {}
             kwargs['extra']['metadata'] = metadata
+        # The log store indexes records by internal_user_id, so it travels on the record as well.
+        if internal_user_id:
+            kwargs.setdefault('extra', {})['internal_user_id'] = internal_user_id
 
         self.logger.log(level, log_message, **kwargs)
 
@@ -0,0 +1,418 @@
+import itertools
+import math
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, FrozenSet, List, Optional, Sequence
+
+from signal_assistant.host.logging_client import LoggingClient
+
+# Instantiate the logger once per module
+host_logger = LoggingClient("HostApp")
+
+BALANCE_LEAST_OUTSTANDING = "least-outstanding"
+BALANCE_P2C = "p2c"
+BALANCING_POLICIES = (BALANCE_LEAST_OUTSTANDING, BALANCE_P2C)
+
+HEALTH_CHECK_COMMAND = "GET_STATUS"
+
+# Commands that are safe to run twice; only these are ever hedged.
+DEFAULT_IDEMPOTENT_COMMANDS = frozenset({"GET_STATUS", "CHECK_LE_POLICY"})
+
+
+class NoHealthyWorkerError(ConnectionError):
+    """Raised when every Enclave worker in the pool is ejected."""
+    pass
+
+
+@dataclass
+class PoolWorker:
+    """One Enclave behind the pool, with the bookkeeping used for balancing and ejection."""
+    name: str
+    proxy: Any
+    measurement: Optional[str] = None
+    healthy: bool = True
+    outstanding: int = 0
+    consecutive_failures: int = 0
+    ejected_at: float = 0.0
+    ejections: int = 0
+    completed: int = 0
+    failed: int = 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "healthy": self.healthy,
+            "outstanding": self.outstanding,
+            "completed": self.completed,
+            "failed": self.failed,
+            "ejections": self.ejections,
+        }
+
+
+@dataclass
+class HedgingPolicy:
+    """
+    When to send a second copy of a slow command to another worker.
+
+    A command in `idempotent_commands` that has no answer after the
+    `percentile` of recent worker latencies (never less than `min_delay`, and
+    `min_delay` until `min_samples` latencies have been seen) is hedged. Each
+    command earns `budget` hedge tokens and each hedge spends one, with at most
+    `max_burst` saved up, so hedges stay below `budget` of total traffic.
+    """
+    percentile: float = 95.0
+    min_delay: float = 0.05
+    min_samples: int = 20
+    budget: float = 0.05
+    max_burst: float = 10.0
+    idempotent_commands: FrozenSet[str] = DEFAULT_IDEMPOTENT_COMMANDS
+
+
+class LatencyTracker:
+    """Recent worker latencies, with a percentile cached between recomputations."""
+    RECOMPUTE_EVERY = 32
+
+    def __init__(self, window: int = 1024):
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._since_recompute = 0
+        self._cached: Dict[float, float] = {}
+
+    def record(self, latency: float):
+        with self._lock:
+            self._samples.append(latency)
+            self._since_recompute += 1
+            if self._since_recompute >= self.RECOMPUTE_EVERY:
+                self._cached.clear()
+                self._since_recompute = 0
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        with self._lock:
+            if not self._samples:
+                return None
+            if pct not in self._cached:
+                ordered = sorted(self._samples)
+                index = min(len(ordered) - 1, max(0, math.ceil(pct / 100 * len(ordered)) - 1))
+                self._cached[pct] = ordered[index]
+            return self._cached[pct]
+
+
+@dataclass
+class HedgeStats:
+    """Hedging counters: hedges sent, hedges whose answer won, and hedges refused by the budget."""
+    hedged: int = 0
+    hedge_wins: int = 0
+    over_budget: int = 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"hedged": self.hedged, "hedge_wins": self.hedge_wins, "over_budget": self.over_budget}
+
+
+class EnclavePool:
+    """
+    Fronts several EnclaveProxy workers with the same `send_command` surface.
+
+    Each command goes to one healthy worker, picked by `balancing`:
+    least-outstanding scans every worker for the fewest in-flight commands;
+    p2c (power of two choices) samples two at random and takes the less busy
+    one, which avoids herding onto a single worker when counts are stale.
+
+    A worker that fails `failure_threshold` commands in a row (no response or
+    an exception) is ejected. Health checks send GET_STATUS to every healthy
+    worker (a failed probe counts like a failed command) and to every ejected
+    worker whose ejection is at least `ejection_period` old, re-admitting it if
+    it answers; `start_health_checks` runs them every `health_check_interval`.
+
+    With a `hedging` policy, slow idempotent commands are also sent to a second
+    worker and the first answer wins (see HedgingPolicy). The loser is
+    cancelled when its proxy is multiplexed; otherwise its answer is ignored.
+    `response_timeout` bounds a hedged command overall.
+    """
+    def __init__(self, proxies: Sequence[Any] = (), balancing: str = BALANCE_P2C, failure_threshold: int = 3,
+                 ejection_period: float = 10, health_check_interval: float = 5, rng: Optional[random.Random] = None,
+                 hedging: Optional[HedgingPolicy] = None, response_timeout: float = 5):
+        if balancing not in BALANCING_POLICIES:
+            raise ValueError(f"Unknown balancing policy '{balancing}'.")
+        self.balancing = balancing
+        self.failure_threshold = failure_threshold
+        self.ejection_period = ejection_period
+        self.health_check_interval = health_check_interval
+        self._rng = rng or random.Random()
+        self._lock = threading.Lock()
+        self._workers: List[PoolWorker] = []
+        # Default names are never reused, so a name always means one worker even after retirements.
+        self._worker_numbers = itertools.count()
+        self._next_index = 0
+        self._health_thread: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+        self.hedging = hedging
+        self.response_timeout = response_timeout
+        self.latencies = LatencyTracker()
+        self.hedge_stats = HedgeStats()
+        self._hedge_tokens = hedging.max_burst if hedging else 0.0
+        self._executor: Optional[ThreadPoolExecutor] = None
+        for proxy in proxies:
+            self.add_worker(proxy)
+
+    def add_worker(self, proxy: Any, name: Optional[str] = None, measurement: Optional[str] = None) -> PoolWorker:
+        with self._lock:
+            if name is None:
+                name = f"enclave-{next(self._worker_numbers)}"
+            elif any(w.name == name for w in self._workers):
+                raise ValueError(f"EnclavePool already has a worker named '{name}'.")
+            worker = PoolWorker(name=name, proxy=proxy, measurement=measurement)
+            self._workers.append(worker)
+        host_logger.info(None, "Host EnclavePool added worker.", metadata={"worker": worker.name})
+        return worker
+
+    def remove_worker(self, name: str):
+        with self._lock:
+            self._workers = [w for w in self._workers if w.name != name]
+
+    def retire_worker(self, name: str, drain_timeout: float = 5) -> Optional[threading.Thread]:
+        """
+        Takes a worker out of rotation at once and closes its proxy once its
+        in-flight commands finish, or after `drain_timeout` seconds. Returns
+        the draining thread, or None if no worker has that name.
+        """
+        with self._lock:
+            worker = next((w for w in self._workers if w.name == name), None)
+            if worker is None:
+                return None
+            self._workers.remove(worker)
+        host_logger.info(None, "Host EnclavePool retiring worker.", metadata={"worker": worker.name})
+
+        def drain():
+            deadline = time.monotonic() + drain_timeout
+            while worker.outstanding > 0 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            close = getattr(worker.proxy, "close", None)
+            if close:
+                close()
+
+        thread = threading.Thread(target=drain, name="EnclavePoolDrain", daemon=True)
+        thread.start()
+        return thread
+
+    @property
+    def workers(self) -> List[PoolWorker]:
+        with self._lock:
+            return list(self._workers)
+
+    def send_command(self, command: str, payload: Dict[str, Any]) -> bytes:
+        """
+        Sends a command to one healthy worker and returns its response (None on timeout).
+        """
+        if self.hedging and command in self.hedging.idempotent_commands:
+            return self._send_hedged(command, payload)
+        worker = self._acquire()
+        started = time.monotonic()
+        try:
+            response = worker.proxy.send_command(command, payload)
+        except Exception as e:
+            self._release(worker, ok=False)
+            host_logger.error(None, f"Host EnclavePool worker failed: {e}", metadata={"worker": worker.name})
+            return None
+        if response is not None:
+            self.latencies.record(time.monotonic() - started)
+        self._release(worker, ok=response is not None)
+        return response
+
+    def hedge_delay(self) -> float:
+        policy = self.hedging
+        if len(self.latencies) < policy.min_samples:
+            return policy.min_delay
+        return max(policy.min_delay, self.latencies.percentile(policy.percentile))
+
+    def _take_hedge_token(self) -> bool:
+        with self._lock:
+            if self._hedge_tokens < 1:
+                self.hedge_stats.over_budget += 1
+                return False
+            self._hedge_tokens -= 1
+            return True
+
+    def _send_hedged(self, command: str, payload: Dict[str, Any]) -> bytes:
+        with self._lock:
+            self._hedge_tokens = min(self.hedging.max_burst, self._hedge_tokens + self.hedging.budget)
+        deadline = time.monotonic() + self.response_timeout
+        primary = self._acquire()
+        attempts = {self._dispatch(primary, command, payload): primary}
+        done, _ = wait(list(attempts), timeout=self.hedge_delay())
+        if not done and len(self.workers) > 1 and self._take_hedge_token():
+            try:
+                secondary = self._acquire(exclude=primary)
+            except NoHealthyWorkerError:
+                secondary = None
+            if secondary is not None:
+                self.hedge_stats.hedged += 1
+                host_logger.debug(None, "Host EnclavePool hedging slow command.",
+                                  metadata={"primary": primary.name, "secondary": secondary.name})
+                attempts[self._dispatch(secondary, command, payload)] = secondary
+        response = None
+        pending = set(attempts)
+        while pending and response is None:
+            done, pending = wait(pending, timeout=max(0.0, deadline - time.monotonic()), return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for attempt in done:
+                result = None if attempt.cancelled() or attempt.exception() else attempt.result()
+                if result is not None and response is None:
+                    response = result
+                    if attempts[attempt] is not primary:
+                        self.hedge_stats.hedge_wins += 1
+        for attempt in pending:
+            self._cancel_attempt(attempts[attempt], attempt)
+        return response
+
+    def _dispatch(self, worker: PoolWorker, command: str, payload: Dict[str, Any]) -> Future:
+        """
+        Starts `command` on `worker` and returns a Future of its response. Releases the worker when it settles;
+        if the command cannot be started the Future has already failed.
+        """
+        started = time.monotonic()
+        try:
+            if getattr(worker.proxy, "multiplexed", False):
+                attempt = worker.proxy.submit(command, payload)
+            else:
+                with self._lock:
+                    if self._executor is None:
+                        self._executor = ThreadPoolExecutor(thread_name_prefix="EnclavePoolHedge")
+                attempt = self._executor.submit(worker.proxy.send_command, command, payload)
+        except Exception as e:
+            # E.g. a closed multiplexed worker: the attempt fails now, and any other attempt carries on.
+            self._release(worker, ok=False)
+            host_logger.error(None, f"Host EnclavePool worker failed: {e}", metadata={"worker": worker.name})
+            attempt = Future()
+            attempt.set_exception(e)
+            return attempt
+
+        def settle(f: Future):
+            if f.cancelled():
+                # Cancelled because the other attempt won; says nothing about this worker's health.
+                with self._lock:
+                    worker.outstanding -= 1
+                return
+            ok = f.exception() is None and f.result() is not None
+            if ok:
+                self.latencies.record(time.monotonic() - started)
+            self._release(worker, ok=ok)
+
+        attempt.add_done_callback(settle)
+        return attempt
+
+    @staticmethod
+    def _cancel_attempt(worker: PoolWorker, attempt: Future):
+        cancel = getattr(worker.proxy, "cancel", None)
+        if getattr(worker.proxy, "multiplexed", False) and cancel:
+            cancel(attempt)
+        else:
+            attempt.cancel()
+
+    def get_enclave_status(self) -> str:
+        response = self.send_command(HEALTH_CHECK_COMMAND, {})
+        return f"Enclave Status: {response.decode()}"
+
+    def send_eak_to_enclave(self, eak: str, attestation_verified_by_host: bool) -> bool:
+        """
+        Provisions the EAK on every worker; any of them may serve later commands.
+        """
+        results = [w.proxy.send_eak_to_enclave(eak, attestation_verified_by_host) for w in self.workers]
+        return bool(results) and all(results)
+
+    def _acquire(self, exclude: Optional[PoolWorker] = None) -> PoolWorker:
+        with self._lock:
+            candidates = [w for w in self._workers if w.healthy and w is not exclude]
+            if not candidates:
+                raise NoHealthyWorkerError("No healthy Enclave worker available.")
+            worker = self._pick(candidates)
+            worker.outstanding += 1
+            return worker
+
+    def _pick(self, candidates: List[PoolWorker]) -> PoolWorker:
+        if len(candidates) == 1:
+            return candidates[0]
+        if self.balancing == BALANCE_P2C:
+            first, second = self._rng.sample(candidates, 2)
+            return first if first.outstanding <= second.outstanding else second
+        # Rotate the scan start so ties spread across workers instead of always hitting the first.
+        start = self._next_index % len(candidates)
+        self._next_index += 1
+        rotated = candidates[start:] + candidates[:start]
+        return min(rotated, key=lambda w: w.outstanding)
+
+    def _release(self, worker: PoolWorker, ok: bool):
+        with self._lock:
+            worker.outstanding -= 1
+        self._record(worker, ok)
+
+    def _record(self, worker: PoolWorker, ok: bool):
+        with self._lock:
+            if ok:
+                worker.completed += 1
+                worker.consecutive_failures = 0
+                return
+            worker.failed += 1
+            worker.consecutive_failures += 1
+            if not worker.healthy or worker.consecutive_failures < self.failure_threshold:
+                return
+            worker.healthy = False
+            worker.ejected_at = time.monotonic()
+            worker.ejections += 1
+        host_logger.warning(None, "Host EnclavePool ejected unhealthy worker.",
+                            metadata={"worker": worker.name, "failures": worker.consecutive_failures})
+
+    def check_health(self):
+        """
+        Sends GET_STATUS to healthy workers and to ejected workers whose ejection period has passed.
+        """
+        now = time.monotonic()
+        due = [w for w in self.workers if w.healthy or now - w.ejected_at >= self.ejection_period]
+        for worker in due:
+            try:
+                response = worker.proxy.send_command(HEALTH_CHECK_COMMAND, {})
+            except Exception:
+                response = None
+            if worker.healthy:
+                self._record(worker, ok=response is not None)
+                continue
+            with self._lock:
+                if response is None:
+                    worker.ejected_at = time.monotonic()
+                    continue
+                worker.healthy = True
+                worker.consecutive_failures = 0
+            host_logger.info(None, "Host EnclavePool re-admitted worker.", metadata={"worker": worker.name})
+
+    def start_health_checks(self):
+        if self._health_thread is not None:
+            return
+        self._health_thread = threading.Thread(target=self._health_loop, name="EnclavePoolHealth", daemon=True)
+        self._health_thread.start()
+
+    def _health_loop(self):
+        while not self._stopped.wait(self.health_check_interval):
+            try:
+                self.check_health()
+            except Exception as e:
+                host_logger.error(None, f"Host EnclavePool health check failed: {e}")
+
+    def close(self):
+        self._stopped.set()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+        for worker in self.workers:
+            close = getattr(worker.proxy, "close", None)
+            if close:
+                close()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {w.name: w.snapshot() for w in self._workers}
@@ -1,100 +1,382 @@
-from typing import Any, Dict
-import json
+from collections import deque
+from concurrent.futures import Future, InvalidStateError, TimeoutError as FutureTimeoutError
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Deque, Dict, Optional, Set
 import sys
-from pathlib import Path
-from signal_assistant.host.transport import SecureChannel
+import threading
+import time
+from signal_assistant.config import host_settings
+from signal_assistant.host.transport import FEATURE_BATCH, FEATURE_COMPRESS, FEATURE_CREDITS, FEATURE_REKEY, SecureChannel
+from signal_assistant.host.envelope import FLAG_STREAM, MAX_REQUEST_ID, Envelope, EnvelopeError
+from signal_assistant.host.stream_transport import start_frame_server
+from signal_assistant.host.shm_transport import ShmTransport
+from signal_assistant.host.pool import EnclavePool, HedgingPolicy
+from signal_assistant.host.registry import RegistryVerifier, RegistryWatcher, VerifiedRegistry
+from signal_assistant.host.scheduler import LaneScheduler, command_lane
 from signal_assistant_enclave.serialization import CommandSerializer
 from signal_assistant.host.logging_client import LoggingClient
 import asyncio
-from cryptography.hazmat.primitives.asymmetric import ed25519
-from cryptography.hazmat.primitives import serialization
-import base64
 
 # Instantiate the logger once per module
 host_logger = LoggingClient("HostApp")
 
-class RegistryVerifier:
-    @staticmethod
-    def verify(mrenclave: str) -> bool:
-        try:
-            # Locate registry at project root
-            # src/signal_assistant/host/proxy.py -> ../../../measurement_registry.json
-            root_dir = Path(__file__).resolve().parents[3]
-            registry_path = root_dir / "measurement_registry.json"
-            pub_key_path = root_dir / "keys" / "registry.pub"
-            
-            if not registry_path.exists():
-                host_logger.error(None, f"Registry not found at {registry_path}")
-                return False
-                
-            if not pub_key_path.exists():
-                host_logger.error(None, f"Registry public key not found at {pub_key_path}")
-                return False
-            
-            with open(registry_path, "r") as f:
-                registry = json.load(f)
-                
-            # Verify signature
-            if not registry.get("signatures"):
-                host_logger.error(None, "Registry has no signatures.")
-                return False
-            
-            with open(pub_key_path, "rb") as f:
-                pub_key = serialization.load_pem_public_key(f.read())
-            
-            measurements = registry.get("measurements", [])
-            data = json.dumps(measurements, sort_keys=True).encode('utf-8')
-            
-            sig_entry = registry["signatures"][0]
-            sig_bytes = base64.b64decode(sig_entry["signature"])
-            
-            try:
-                pub_key.verify(sig_bytes, data)
-                host_logger.info(None, "Registry signature verified.")
-            except Exception as e:
-                host_logger.error(None, f"Registry signature verification failed: {e}")
-                return False
-            
-            for m in measurements:
-                if m["mrenclave"] == mrenclave:
-                    if m["status"] == "active":
-                        host_logger.info(None, f"MRENCLAVE {mrenclave} verified against registry. Version: {m.get('version')}")
-                        return True
-                    else:
-                        host_logger.error(None, f"MRENCLAVE {mrenclave} found but status is '{m['status']}'.")
-                        return False
-            
-            host_logger.error(None, f"MRENCLAVE {mrenclave} not found in registry.")
-            return False
-        except Exception as e:
-            host_logger.error(None, f"Registry verification failed: {e}")
+@dataclass
+class ProxyStats:
+    """
+    Request outcome counters for an Enclave proxy. `late_responses` are answers
+    to commands the caller had already given up on; `unknown_responses` match
+    no request this proxy remembers.
+    """
+    commands_sent: int = 0
+    expired_before_send: int = 0
+    timed_out: int = 0
+    late_responses: int = 0
+    unknown_responses: int = 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "commands_sent": self.commands_sent,
+            "expired_before_send": self.expired_before_send,
+            "timed_out": self.timed_out,
+            "late_responses": self.late_responses,
+            "unknown_responses": self.unknown_responses,
+        }
+
+
+class _AbandonedRequests:
+    """
+    Bounded memory of request IDs whose callers gave up, so their responses
+    can be told apart from stray ones.
+    """
+    def __init__(self, limit: int = 4096):
+        self._order: Deque[int] = deque()
+        self._ids: Set[int] = set()
+        self._limit = limit
+
+    def add(self, request_id: int):
+        if request_id in self._ids:
+            return
+        self._order.append(request_id)
+        self._ids.add(request_id)
+        if len(self._order) > self._limit:
+            self._ids.discard(self._order.popleft())
+
+    def claim(self, request_id: int) -> bool:
+        if request_id not in self._ids:
             return False
+        self._ids.discard(request_id)
+        return True
+
+
+def _discard_response(stats: ProxyStats, request_id: int, late: bool):
+    if late:
+        stats.late_responses += 1
+        host_logger.debug(None, "Host EnclaveProxy discarded late response.", metadata={"request_id": request_id})
+    else:
+        stats.unknown_responses += 1
+        host_logger.warning(None, "Host EnclaveProxy discarded response for unknown or abandoned request.",
+                            metadata={"request_id": request_id})
+
+
+# Timeout marker for AsyncEnclaveProxy's legacy exchange, distinct from a rejected frame (None).
+_NO_REPLY = object()
+
+
+def _consume_exception(task: asyncio.Future):
+    # Marks an orphaned task's exception as retrieved; its caller already gave up.
+    if not task.cancelled():
+        task.exception()
+
+
+def _wall_clock_deadline(deadline: float) -> float:
+    """
+    Converts a local time.monotonic() deadline to the wall-clock form carried in envelopes.
+    """
+    return time.time() + (deadline - time.monotonic())
+
 
 class EnclaveProxy:
     """
     Acts as a proxy for the host to interact with the enclave.
     Utilizes the SecureChannel for communication.
+
+    By default one command is in flight at a time and the response is the next
+    frame on the channel. With `multiplexed=True` every command is wrapped in an
+    Envelope carrying a request ID, a background reader demultiplexes responses
+    onto pending futures, and any number of commands may be in flight at once.
+    The Enclave must echo the envelope for multiplexed mode to work.
+
+    With `scheduling` ("strict" or "weighted", multiplexed mode only) commands
+    are not written to the channel by the caller but queued in priority lanes
+    (see LaneScheduler) and sent by one sender thread, so control commands
+    such as GET_STATUS overtake a backlog of data commands waiting for the
+    channel (e.g. for flow-control credit). `priority` on `submit` overrides
+    the lane picked from the command name.
+
+    In multiplexed mode every command carries an absolute deadline (by default
+    `response_timeout` from now) in its envelope, so the Enclave can skip work
+    nobody will wait for. Commands already past their deadline are never sent,
+    and responses that arrive after the caller gave up are counted in `stats`
+    and discarded.
+
+    Extra keyword arguments (e.g. `ciphers`, `key`) configure the SecureChannel.
+    An already established channel can be passed as `secure_channel` instead.
     """
-    def __init__(self, host_to_enclave_queue, enclave_to_host_queue):
-        self.secure_channel = SecureChannel(enclave_to_host_queue, host_to_enclave_queue)
-        self.secure_channel.establish()
+    READER_POLL_INTERVAL = 0.5
+
+    def __init__(self, host_to_enclave_queue=None, enclave_to_host_queue=None, multiplexed: bool = False,
+                 response_timeout: float = 5, secure_channel: Optional[SecureChannel] = None,
+                 scheduling: Optional[str] = None, lane_weights: Optional[Dict[int, int]] = None, **channel_options):
+        if scheduling and not multiplexed:
+            raise ValueError("Priority scheduling requires multiplexed=True.")
+        if secure_channel is None:
+            secure_channel = SecureChannel(enclave_to_host_queue, host_to_enclave_queue, **channel_options)
+            secure_channel.establish()
+        self.secure_channel = secure_channel
+        self.multiplexed = multiplexed
+        self.response_timeout = response_timeout
+
+        # Serialises the request/response pair in non-multiplexed mode.
+        self._exchange_lock = threading.Lock()
+        self._owed_replies = 0
 
-    def send_command(self, command: str, payload: Dict[str, Any]) -> bytes:
+        self._pending: Dict[int, Future] = {}
+        self._pending_lock = threading.Lock()
+        self._next_request_id = 0
+        self._reader_thread: Optional[threading.Thread] = None
+        self._closed = threading.Event()
+
+        self._scheduler = LaneScheduler(scheduling, lane_weights) if scheduling else None
+        self._sender_thread: Optional[threading.Thread] = None
+
+        self.stats = ProxyStats()
+        self._abandoned = _AbandonedRequests()
+
+    def send_command(self, command: str, payload: Dict[str, Any], deadline: Optional[float] = None) -> bytes:
         """
         Sends a command to the enclave and receives a response.
-        Payload is now a dictionary.
+        Payload is now a dictionary. `deadline` (time.monotonic()) defaults to
+        `response_timeout` from now. Multiplexed commands carry it to the Enclave
+        in their envelope; a non-multiplexed peer has no envelope, so there the
+        deadline only bounds the Host's own wait.
         """
-        message_bytes = CommandSerializer.serialize(command, payload)
-        # Log command, but avoid logging payload details which might contain sensitive keys or trigger filters
-        host_logger.info(None, f"Host EnclaveProxy sending command: {command}")
-        self.secure_channel.send(message_bytes)
-        response = self.secure_channel.receive()
+        if deadline is None:
+            deadline = time.monotonic() + self.response_timeout
+        if self.multiplexed:
+            future = self.submit(command, payload, deadline=deadline)
+            try:
+                response = future.result(timeout=max(0.0, deadline - time.monotonic()))
+            except FutureTimeoutError:
+                self.stats.timed_out += 1
+                self.cancel(future)
+                response = None
+            except ConnectionError:
+                response = None
+        else:
+            message_bytes = CommandSerializer.serialize(command, payload)
+            # Log command, but avoid logging payload details which might contain sensitive keys or trigger filters
+            host_logger.info(None, f"Host EnclaveProxy sending command: {command}")
+            response = self._exchange(message_bytes, deadline)
         if response:
              host_logger.info(None, f"Host EnclaveProxy received response.", metadata={"response_len": len(response)})
         else:
              host_logger.warning(None, "Host EnclaveProxy received no response (timeout).")
         return response
 
+    def _exchange(self, message_bytes: bytes, deadline: float) -> Optional[bytes]:
+        # A non-multiplexed peer answers in order with no request ID, so a reply that
+        # missed its deadline is still owed: it is read and dropped before the next send.
+        with self._exchange_lock:
+            while self._owed_replies:
+                late = self.secure_channel._receive_message(max(0.0, deadline - time.monotonic()),
+                                                            timed_out=_NO_REPLY)
+                if late is _NO_REPLY:
+                    self.stats.timed_out += 1
+                    return None
+                self._owed_replies -= 1
+                _discard_response(self.stats, None, late=True)
+            if time.monotonic() >= deadline:
+                self.stats.expired_before_send += 1
+                return None
+            self.secure_channel.send(message_bytes)
+            self.stats.commands_sent += 1
+            response = self.secure_channel._receive_message(max(0.0, deadline - time.monotonic()),
+                                                            timed_out=_NO_REPLY)
+            if response is _NO_REPLY:
+                self._owed_replies += 1
+                self.stats.timed_out += 1
+                return None
+            return response
+
+    def submit(self, command: str, payload: Dict[str, Any], priority: Optional[int] = None,
+               deadline: Optional[float] = None) -> Future:
+        """
+        Sends a command without waiting and returns a Future resolved with the response bytes.
+        Requires multiplexed mode. A command whose `deadline` has already passed
+        is not sent; its Future resolves to None.
+        """
+        if not self.multiplexed:
+            raise RuntimeError("EnclaveProxy.submit requires multiplexed=True.")
+        if self._closed.is_set():
+            raise ConnectionError("EnclaveProxy is closed.")
+        if deadline is None:
+            deadline = time.monotonic() + self.response_timeout
+        future: Future = Future()
+        future.deadline = deadline
+        if time.monotonic() >= deadline:
+            self.stats.expired_before_send += 1
+            future.set_result(None)
+            return future
+        self._ensure_reader()
+
+        message_bytes = CommandSerializer.serialize(command, payload)
+        with self._pending_lock:
+            if self._closed.is_set():
+                raise ConnectionError("EnclaveProxy is closed.")
+            request_id = self._allocate_request_id()
+            future.request_id = request_id
+            self._pending[request_id] = future
+
+        host_logger.info(None, f"Host EnclaveProxy sending command: {command}", metadata={"request_id": request_id})
+        frame = Envelope(request_id, message_bytes, deadline=_wall_clock_deadline(deadline)).pack()
+        if self._scheduler is not None:
+            self._ensure_sender()
+            self._scheduler.put(command_lane(command) if priority is None else priority, (request_id, frame))
+            return future
+        try:
+            self.secure_channel.send(frame)
+        except Exception:
+            self.cancel(future)
+            raise
+        self.stats.commands_sent += 1
+        return future
+
+    def cancel(self, future: Future):
+        """
+        Abandons a pending request. A response that arrives later is discarded.
+        """
+        request_id = getattr(future, "request_id", None)
+        with self._pending_lock:
+            if self._pending.pop(request_id, None) is not None:
+                self._abandoned.add(request_id)
+        future.cancel()
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._pending)
+
+    def close(self):
+        """
+        Stops the demultiplexing reader, fails every pending request and
+        closes the channel's transport.
+        """
+        self._closed.set()
+        if self._scheduler is not None:
+            self._scheduler.close()
+        self._fail_pending("EnclaveProxy closed.")
+        if self._reader_thread and self._reader_thread is not threading.current_thread():
+            self._reader_thread.join(timeout=self.READER_POLL_INTERVAL * 2)
+        if self._sender_thread and self._sender_thread is not threading.current_thread():
+            self._sender_thread.join(timeout=self.READER_POLL_INTERVAL * 2)
+        close_channel = getattr(self.secure_channel, "close", None)
+        if close_channel:
+            close_channel()
+
+    def _fail_pending(self, reason: str):
+        # Called after _closed is set; submit() checks it under the same lock, so none slip past.
+        with self._pending_lock:
+            pending = list(self._pending.values())
+            self._pending.clear()
+        for future in pending:
+            try:
+                future.set_exception(ConnectionError(reason))
+            except InvalidStateError:
+                pass
+
+    def _allocate_request_id(self) -> int:
+        # Called with _pending_lock held. IDs wrap around but skip ones still in flight.
+        while True:
+            self._next_request_id = self._next_request_id % MAX_REQUEST_ID + 1
+            if self._next_request_id not in self._pending:
+                return self._next_request_id
+
+    def _ensure_reader(self):
+        if self._reader_thread is not None:
+            return
+        with self._pending_lock:
+            if self._reader_thread is None:
+                self._reader_thread = threading.Thread(target=self._demux_loop, name="EnclaveProxyReader", daemon=True)
+                self._reader_thread.start()
+
+    def _ensure_sender(self):
+        if self._sender_thread is not None:
+            return
+        with self._pending_lock:
+            if self._sender_thread is None:
+                self._sender_thread = threading.Thread(target=self._send_loop, name="EnclaveProxySender", daemon=True)
+                self._sender_thread.start()
+
+    def _send_loop(self):
+        while not self._closed.is_set():
+            item = self._scheduler.get(timeout=self.READER_POLL_INTERVAL)
+            if item is None:
+                continue
+            request_id, frame = item
+            with self._pending_lock:
+                future = self._pending.get(request_id)
+                if future is not None and time.monotonic() >= future.deadline:
+                    # Expired while queued behind other traffic.
+                    del self._pending[request_id]
+                    self.stats.expired_before_send += 1
+                    future.set_result(None)
+                    continue
+            if future is None:
+                continue  # Abandoned while queued; don't spend channel capacity on it.
+            try:
+                self.secure_channel.send(frame)
+                self.stats.commands_sent += 1
+            except Exception as e:
+                host_logger.error(None, f"Host EnclaveProxy failed to send queued command: {e}",
+                                  metadata={"request_id": request_id})
+                with self._pending_lock:
+                    self._pending.pop(request_id, None)
+                try:
+                    future.set_exception(ConnectionError(f"Send failed: {e}"))
+                except InvalidStateError:
+                    pass
+
+    @property
+    def lane_stats(self) -> Optional[Dict[str, Any]]:
+        return self._scheduler.stats.snapshot() if self._scheduler else None
+
+    def _demux_loop(self):
+        while not self._closed.is_set():
+            try:
+                data = self.secure_channel._receive_message(self.READER_POLL_INTERVAL)
+            except ConnectionError as e:
+                # The transport is gone for good: nothing pending will ever be answered.
+                host_logger.warning(None, f"Host EnclaveProxy lost its connection: {e}")
+                self._closed.set()
+                self._fail_pending("Enclave connection lost.")
+                return
+            if data is None:
+                continue
+            try:
+                envelope = Envelope.unpack(data)
+            except EnvelopeError as e:
+                host_logger.error(None, f"Host EnclaveProxy dropped malformed response: {e}")
+                continue
+            with self._pending_lock:
+                future = self._pending.pop(envelope.request_id, None)
+                late = future is None and self._abandoned.claim(envelope.request_id)
+            if future is None:
+                _discard_response(self.stats, envelope.request_id, late)
+                continue
+            try:
+                future.set_result(envelope.body)
+            except InvalidStateError:
+                pass  # Cancelled by the caller between the pop and here.
+
     def get_enclave_status(self) -> str:
         """
         Fetches the status of the enclave.
@@ -128,12 +410,340 @@ class EnclaveProxy:
             host_logger.error(f"Host: Error provisioning EAK to Enclave: {e}")
             return False
 
+class _ResponseStream:
+    """
+    Chunks of one streamed response, put back in `seq` order for the consumer.
+    """
+    CLOSED = object()
+
+    def __init__(self):
+        self.chunks: asyncio.Queue = asyncio.Queue()
+        self._next_seq = 0
+        self._early: Dict[int, Envelope] = {}
+
+    def feed(self, envelope: Envelope) -> bool:
+        """
+        Queues whatever chunks are now in order. Returns True once the final chunk has been queued.
+        """
+        if not envelope.streamed:
+            # The Enclave answered in one piece; that is a one-chunk stream.
+            self.chunks.put_nowait((envelope.body, True))
+            return True
+        self._early[envelope.seq] = envelope
+        finished = False
+        while self._next_seq in self._early:
+            chunk = self._early.pop(self._next_seq)
+            self._next_seq += 1
+            self.chunks.put_nowait((chunk.body, chunk.final))
+            finished = finished or chunk.final
+        return finished
+
+
+class AsyncEnclaveProxy:
+    """
+    asyncio counterpart of EnclaveProxy for hosts that run on an event loop.
+
+    `send_command` is a coroutine and never blocks the loop. Each call takes an
+    optional `deadline` (an absolute `time.monotonic()` value, defaulting to
+    `response_timeout` from now) and returns None if no response arrives by
+    then. In multiplexed mode a reader task resolves per-request futures, so
+    thousands of commands can be in flight on one loop; a call that times out
+    or whose task is cancelled releases its request slot, and a late response
+    is counted in `stats` and discarded. The deadline travels in the envelope
+    as in EnclaveProxy, and a command already past it is not sent. Without
+    multiplexing, commands take turns on an asyncio.Lock. Such replies carry
+    no request ID, so a command that timed out leaves the channel out of sync:
+    the next command is only sent once that late reply has arrived and been
+    discarded.
+
+    `stream_command` (multiplexed only) asks the Enclave for a streamed
+    response and yields each chunk as it arrives, in sequence order, so
+    delivery work can start before generation finishes. An Enclave that
+    answers in one piece produces a single chunk.
+    """
+    READER_POLL_INTERVAL = 0.5
+
+    def __init__(self, secure_channel: SecureChannel, multiplexed: bool = False, response_timeout: float = 5):
+        self.secure_channel = secure_channel
+        self.multiplexed = multiplexed
+        self.response_timeout = response_timeout
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._streams: Dict[int, _ResponseStream] = {}
+        self._next_request_id = 0
+        self._exchange_lock: Optional[asyncio.Lock] = None
+        # Legacy mode: replies still owed to commands whose callers timed out.
+        self._owed_replies = 0
+        self._reader_task: Optional[asyncio.Task] = None
+        self._closed = False
+        self.stats = ProxyStats()
+        self._abandoned = _AbandonedRequests()
+
+    async def send_command(self, command: str, payload: Dict[str, Any], deadline: Optional[float] = None) -> Optional[bytes]:
+        """
+        Sends a command to the enclave and awaits its response until `deadline`.
+        """
+        if self._closed:
+            raise ConnectionError("AsyncEnclaveProxy is closed.")
+        if deadline is None:
+            deadline = time.monotonic() + self.response_timeout
+        message_bytes = CommandSerializer.serialize(command, payload)
+        if self.multiplexed:
+            response = await self._exchange_multiplexed(command, message_bytes, deadline)
+        else:
+            host_logger.info(None, f"Host EnclaveProxy sending command: {command}")
+            response = await self._exchange(message_bytes, deadline)
+        if response:
+             host_logger.info(None, f"Host EnclaveProxy received response.", metadata={"response_len": len(response)})
+        else:
+             host_logger.warning(None, "Host EnclaveProxy received no response (timeout).")
+        return response
+
+    async def _exchange(self, message_bytes: bytes, deadline: float) -> Optional[bytes]:
+        # The exchange runs as its own task: a caller that times out or is cancelled
+        # leaves it to finish, so the lock is always released by its owner and a
+        # reply that does arrive is never left on the channel for the next caller.
+        exchange = asyncio.ensure_future(self._locked_exchange(message_bytes, deadline))
+        exchange.add_done_callback(_consume_exception)
+        try:
+            return await asyncio.wait_for(asyncio.shield(exchange), max(0.0, deadline - time.monotonic()))
+        except asyncio.TimeoutError:
+            return None
+
+    async def _locked_exchange(self, message_bytes: bytes, deadline: float) -> Optional[bytes]:
+        if self._exchange_lock is None:
+            self._exchange_lock = asyncio.Lock()
+        async with self._exchange_lock:
+            while self._owed_replies:
+                late = await self.secure_channel._receive_message_async(max(0.0, deadline - time.monotonic()),
+                                                                       timed_out=_NO_REPLY)
+                if late is _NO_REPLY:
+                    self.stats.timed_out += 1
+                    return None
+                self._owed_replies -= 1
+                _discard_response(self.stats, None, late=True)
+            if time.monotonic() >= deadline:
+                self.stats.expired_before_send += 1
+                return None
+            await self.secure_channel.send_async(message_bytes)
+            self.stats.commands_sent += 1
+            response = await self.secure_channel._receive_message_async(max(0.0, deadline - time.monotonic()),
+                                                                       timed_out=_NO_REPLY)
+            if response is _NO_REPLY:
+                self._owed_replies += 1
+                self.stats.timed_out += 1
+                return None
+            return response
+
+    async def _exchange_multiplexed(self, command: str, message_bytes: bytes, deadline: float) -> Optional[bytes]:
+        if time.monotonic() >= deadline:
+            self.stats.expired_before_send += 1
+            return None
+        self._ensure_reader()
+        future = asyncio.get_running_loop().create_future()
+        request_id = self._allocate_request_id()
+        self._pending[request_id] = future
+        host_logger.info(None, f"Host EnclaveProxy sending command: {command}", metadata={"request_id": request_id})
+        try:
+            await self.secure_channel.send_async(
+                Envelope(request_id, message_bytes, deadline=_wall_clock_deadline(deadline)).pack())
+            self.stats.commands_sent += 1
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise asyncio.TimeoutError
+            return await asyncio.wait_for(future, remaining)
+        except asyncio.TimeoutError:
+            self.stats.timed_out += 1
+            return None
+        except ConnectionError:
+            return None
+        finally:
+            # Runs on success, timeout and cancellation alike, so no slot outlives its caller.
+            if self._pending.pop(request_id, None) is not None:
+                self._abandoned.add(request_id)
+
+    async def stream_command(self, command: str, payload: Dict[str, Any],
+                             deadline: Optional[float] = None) -> AsyncIterator[bytes]:
+        """
+        Sends a command and yields its response chunks until the last one.
+        Raises asyncio.TimeoutError if the stream has not finished by `deadline`,
+        and ConnectionError if the proxy is closed mid-stream.
+        """
+        if not self.multiplexed:
+            raise RuntimeError("AsyncEnclaveProxy.stream_command requires multiplexed=True.")
+        if self._closed:
+            raise ConnectionError("AsyncEnclaveProxy is closed.")
+        if deadline is None:
+            deadline = time.monotonic() + self.response_timeout
+        self._ensure_reader()
+        stream = _ResponseStream()
+        request_id = self._allocate_request_id()
+        self._streams[request_id] = stream
+        host_logger.info(None, f"Host EnclaveProxy sending command: {command}",
+                         metadata={"request_id": request_id, "stream": True})
+        message_bytes = CommandSerializer.serialize(command, payload)
+        try:
+            await self.secure_channel.send_async(
+                Envelope(request_id, message_bytes, flags=FLAG_STREAM, deadline=_wall_clock_deadline(deadline)).pack())
+            self.stats.commands_sent += 1
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise asyncio.TimeoutError
+                item = await asyncio.wait_for(stream.chunks.get(), remaining)
+                if item is _ResponseStream.CLOSED:
+                    raise ConnectionError("AsyncEnclaveProxy closed mid-stream.")
+                chunk, final = item
+                if chunk or not final:
+                    yield chunk
+                if final:
+                    return
+        finally:
+            # Also runs when the consumer stops iterating early; later chunks are then dropped.
+            self._streams.pop(request_id, None)
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._pending) + len(self._streams)
+
+    def _fail_pending(self, reason: str):
+        pending = list(self._pending.values())
+        self._pending.clear()
+        for future in pending:
+            if not future.done():
+                future.set_exception(ConnectionError(reason))
+        for stream in self._streams.values():
+            stream.chunks.put_nowait(_ResponseStream.CLOSED)
+
+    def _allocate_request_id(self) -> int:
+        while True:
+            self._next_request_id = self._next_request_id % MAX_REQUEST_ID + 1
+            if self._next_request_id not in self._pending and self._next_request_id not in self._streams:
+                return self._next_request_id
+
+    def _ensure_reader(self):
+        if self._reader_task is None or self._reader_task.done():
+            self._reader_task = asyncio.get_running_loop().create_task(self._demux_loop())
+
+    async def _demux_loop(self):
+        while not self._closed:
+            try:
+                data = await self.secure_channel._receive_message_async(self.READER_POLL_INTERVAL)
+            except ConnectionError as e:
+                # The transport is gone for good: nothing pending will ever be answered.
+                host_logger.warning(None, f"Host EnclaveProxy lost its connection: {e}")
+                self._closed = True
+                self._fail_pending("Enclave connection lost.")
+                return
+            if data is None:
+                continue
+            try:
+                envelope = Envelope.unpack(data)
+            except EnvelopeError as e:
+                host_logger.error(None, f"Host EnclaveProxy dropped malformed response: {e}")
+                continue
+            stream = self._streams.get(envelope.request_id)
+            if stream is not None:
+                if stream.feed(envelope):
+                    self._streams.pop(envelope.request_id, None)
+                continue
+            if envelope.streamed:
+                host_logger.debug(None, "Host EnclaveProxy dropped chunk of an abandoned stream.",
+                                  metadata={"request_id": envelope.request_id})
+                continue
+            future = self._pending.pop(envelope.request_id, None)
+            if future is None or future.done():
+                _discard_response(self.stats, envelope.request_id, self._abandoned.claim(envelope.request_id))
+                continue
+            future.set_result(envelope.body)
+
+    async def close(self):
+        """
+        Stops the reader task and fails every pending request.
+        """
+        self._closed = True
+        self._fail_pending("AsyncEnclaveProxy closed.")
+        if self._reader_task is not None:
+            self._reader_task.cancel()
+            try:
+                await self._reader_task
+            except asyncio.CancelledError:
+                pass
+
 class SignalProxy:
     """
     Main Host Application logic.
     """
     def __init__(self):
-        pass
+        self.enclave_proxy = None
+        self.server = None
+        self.shm_transport = None
+        self.enclave_measurement = None
+        self.registry_watcher = None
+        # Every connected Enclave joins the pool; commands are balanced across them.
+        if host_settings is not None:
+            hedging = None
+            if host_settings.enclave_hedge_percentile > 0:
+                hedging = HedgingPolicy(percentile=host_settings.enclave_hedge_percentile,
+                                        budget=host_settings.enclave_hedge_budget)
+            self.enclave_pool = EnclavePool(balancing=host_settings.enclave_pool_balancing,
+                                            ejection_period=host_settings.enclave_pool_ejection_seconds,
+                                            hedging=hedging)
+        else:
+            self.enclave_pool = EnclavePool()
+
+    @staticmethod
+    def _channel_options() -> Dict[str, Any]:
+        if host_settings is None:
+            return {}
+        options: Dict[str, Any] = {"ciphers": host_settings.channel_ciphers}
+        features = []
+        if host_settings.channel_coalesce_window_ms > 0:
+            features.append(FEATURE_BATCH)
+            options["coalesce_window"] = host_settings.channel_coalesce_window_ms / 1000
+            options["coalesce_max_bytes"] = host_settings.channel_coalesce_max_bytes
+        if host_settings.channel_compression:
+            features.append(FEATURE_COMPRESS)
+            options["compress_threshold"] = host_settings.channel_compress_threshold
+        if host_settings.channel_receive_window > 0:
+            features.append(FEATURE_CREDITS)
+            options["receive_window"] = host_settings.channel_receive_window
+        if host_settings.channel_rekey_after_frames > 0 or host_settings.channel_rekey_after_seconds > 0:
+            features.append(FEATURE_REKEY)
+            options["rekey_after_frames"] = host_settings.channel_rekey_after_frames or None
+            options["rekey_after_seconds"] = host_settings.channel_rekey_after_seconds or None
+        if features:
+            options["features"] = features
+        return options
+
+    async def _on_enclave_connected(self, transport):
+        host_logger.info(None, "Enclave connected to Host.")
+        # Re-checked on every (re)connect so a revoked measurement cannot rejoin; the verifier is cached.
+        if self.enclave_measurement and not RegistryVerifier.verify(self.enclave_measurement):
+            host_logger.error(None, "Refusing Enclave connection: measurement is no longer trusted.")
+            closing = transport.close()
+            if asyncio.iscoroutine(closing):
+                await closing
+            return
+        channel = SecureChannel.over_stream(transport, **self._channel_options())
+        await channel.establish_async()
+        self.enclave_proxy = EnclaveProxy(secure_channel=channel)
+        self.enclave_pool.add_worker(self.enclave_proxy, measurement=self.enclave_measurement)
+
+    def _on_registry_change(self, registry: VerifiedRegistry):
+        """
+        Drains and closes every Enclave whose measurement is no longer active.
+        """
+        drain_timeout = host_settings.registry_drain_seconds if host_settings else 5.0
+        for worker in self.enclave_pool.workers:
+            if worker.measurement is None:
+                continue
+            status = registry.status(worker.measurement)
+            if status != "active":
+                host_logger.critical(None, f"MRENCLAVE {worker.measurement} is now '{status}'. Closing its channel.",
+                                     metadata={"worker": worker.name})
+                self.enclave_pool.retire_worker(worker.name, drain_timeout=drain_timeout)
+                if self.enclave_proxy is worker.proxy:
+                    self.enclave_proxy = None
 
     async def run(self):
         host_logger.info(None, "SignalProxy starting...")
@@ -150,7 +760,36 @@ class SignalProxy:
             sys.exit(1)
             
         host_logger.info(None, "Enclave verified. Establishing connection...")
-        
+        self.enclave_measurement = simulated_mrenclave
+
+        watch_interval = host_settings.registry_watch_interval if host_settings else 1.0
+        if watch_interval > 0:
+            self.registry_watcher = RegistryWatcher(RegistryVerifier.shared(), self._on_registry_change,
+                                                    poll_interval=watch_interval)
+            self.registry_watcher.start()
+
+        self.enclave_pool.start_health_checks()
+        transport_kind = host_settings.channel_transport if host_settings else "vsock"
+        if transport_kind == "shm":
+            # Co-located Enclave: it attaches to the rings we create instead of dialling in.
+            self.shm_transport = ShmTransport.create(host_settings.shm_ring_path, host_settings.shm_ring_capacity)
+            await self._on_enclave_connected(self.shm_transport)
+        else:
+            port = host_settings.vsock_port if host_settings else 5000
+            fallback_host = host_settings.vsock_fallback_host if host_settings else "127.0.0.1"
+            use_vsock = False if transport_kind == "tcp" else None
+            self.server = await start_frame_server(port, self._on_enclave_connected, host=fallback_host, use_vsock=use_vsock)
+
         # Keep alive
-        while True:
-            await asyncio.sleep(1)
+        try:
+            while True:
+                await asyncio.sleep(1)
+        finally:
+            if self.registry_watcher:
+                self.registry_watcher.close()
+            self.enclave_pool.close()
+            if self.server:
+                self.server.close()
+            if self.shm_transport:
+                self.shm_transport.close()
+                self.shm_transport.unlink()
@@ -0,0 +1,317 @@
+import base64
+import ctypes
+import ctypes.util
+import hashlib
+import json
+import os
+import select
+import struct
+import sys
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from cryptography.hazmat.primitives import serialization
+
+from signal_assistant.host.logging_client import LoggingClient
+from signal_assistant.registry_merkle import MERKLE_SCHEME, registry_tree_head
+
+# Instantiate the logger once per module
+host_logger = LoggingClient("HostApp")
+
+# src/signal_assistant/host/registry.py -> ../../../measurement_registry.json
+ROOT_DIR = Path(__file__).resolve().parents[3]
+DEFAULT_REGISTRY_PATH = ROOT_DIR / "measurement_registry.json"
+DEFAULT_PUB_KEY_PATH = ROOT_DIR / "keys" / "registry.pub"
+
+# (st_mtime_ns, st_size) of a file, compared before re-reading it.
+FileStamp = Tuple[int, int]
+
+
+class RegistryError(Exception):
+    """Raised when the measurement registry cannot be read or its signature does not verify."""
+    pass
+
+
+def _stamp(path: Path) -> FileStamp:
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
+@dataclass(frozen=True)
+class VerifiedRegistry:
+    """
+    A registry whose signature has been checked, with its measurements indexed
+    by mrenclave. `digest` covers both the registry and the public key bytes.
+    """
+    digest: str
+    measurements: Dict[str, Dict[str, Any]]
+
+    def status(self, mrenclave: str) -> Optional[str]:
+        entry = self.measurements.get(mrenclave)
+        return entry["status"] if entry else None
+
+
+class RegistryVerifier:
+    """
+    Checks Enclave measurements against the signed measurement registry.
+
+    The verified registry is cached. Each lookup only stats the registry and
+    public key; they are re-read when their mtime or size changes, and the
+    signature is re-verified only when their content hash changes too.
+
+    A registry that fails verification does not replace the last verified one:
+    `load()` raises, but `check()` keeps answering from the last verified
+    registry (as `RegistryWatcher` does) until a valid replacement appears.
+    With nothing verified yet, every check fails.
+
+    `RegistryVerifier.verify(mrenclave)` uses a process-wide instance on the
+    default paths.
+    """
+    _shared: Optional["RegistryVerifier"] = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, registry_path: Path = DEFAULT_REGISTRY_PATH, pub_key_path: Path = DEFAULT_PUB_KEY_PATH):
+        self.registry_path = Path(registry_path)
+        self.pub_key_path = Path(pub_key_path)
+        self._lock = threading.Lock()
+        self._stamps: Optional[Tuple[FileStamp, FileStamp]] = None
+        self._registry: Optional[VerifiedRegistry] = None
+        self.signature_checks = 0
+
+    @classmethod
+    def shared(cls) -> "RegistryVerifier":
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    @staticmethod
+    def verify(mrenclave: str) -> bool:
+        return RegistryVerifier.shared().check(mrenclave)
+
+    def load(self) -> VerifiedRegistry:
+        """
+        Returns the verified registry, re-validating it only if either file changed.
+        Raises RegistryError (or the parse error) if the files on disk do not verify;
+        the last verified registry is kept and the files are re-checked next time.
+        """
+        with self._lock:
+            if not self.registry_path.exists():
+                raise RegistryError(f"Registry not found at {self.registry_path}")
+            if not self.pub_key_path.exists():
+                raise RegistryError(f"Registry public key not found at {self.pub_key_path}")
+            stamps = (_stamp(self.registry_path), _stamp(self.pub_key_path))
+            if self._registry is not None and stamps == self._stamps:
+                return self._registry
+
+            registry_bytes = self.registry_path.read_bytes()
+            pub_key_bytes = self.pub_key_path.read_bytes()
+            digest = hashlib.sha256(registry_bytes + b"\0" + pub_key_bytes).hexdigest()
+            if self._registry is None or digest != self._registry.digest:
+                try:
+                    self._registry = self._verify_registry(registry_bytes, pub_key_bytes, digest)
+                except Exception:
+                    self._stamps = None
+                    raise
+            self._stamps = stamps
+            return self._registry
+
+    def _verify_registry(self, registry_bytes: bytes, pub_key_bytes: bytes, digest: str) -> VerifiedRegistry:
+        self.signature_checks += 1
+        registry = json.loads(registry_bytes)
+        if not registry.get("signatures"):
+            raise RegistryError("Registry has no signatures.")
+        pub_key = serialization.load_pem_public_key(pub_key_bytes)
+
+        measurements = registry.get("measurements", [])
+        sig_entry = registry["signatures"][0]
+        if sig_entry.get("scheme") == MERKLE_SCHEME:
+            data = registry_tree_head(measurements, sig_entry.get("issued_at"))
+        else:
+            data = json.dumps(measurements, sort_keys=True).encode('utf-8')
+        sig_bytes = base64.b64decode(sig_entry["signature"])
+        try:
+            pub_key.verify(sig_bytes, data)
+        except Exception as e:
+            raise RegistryError(f"Registry signature verification failed: {e}") from e
+        host_logger.info(None, "Registry signature verified.")
+
+        index: Dict[str, Dict[str, Any]] = {}
+        for m in measurements:
+            # The first entry for a measurement wins, as with the original linear scan.
+            index.setdefault(m["mrenclave"], m)
+        return VerifiedRegistry(digest=digest, measurements=index)
+
+    @property
+    def last_verified(self) -> Optional[VerifiedRegistry]:
+        return self._registry
+
+    def check(self, mrenclave: str) -> bool:
+        try:
+            registry = self.load()
+        except Exception as e:
+            message = str(e) if isinstance(e, RegistryError) else f"Registry verification failed: {e}"
+            registry = self._registry
+            if registry is None:
+                host_logger.error(None, message)
+                return False
+            host_logger.error(None, f"{message} Checking against the last verified registry.")
+
+        m = registry.measurements.get(mrenclave)
+        if m is None:
+            host_logger.error(None, f"MRENCLAVE {mrenclave} not found in registry.")
+            return False
+        if m["status"] != "active":
+            host_logger.error(None, f"MRENCLAVE {mrenclave} found but status is '{m['status']}'.")
+            return False
+        host_logger.info(None, f"MRENCLAVE {mrenclave} verified against registry. Version: {m.get('version')}")
+        return True
+
+
+# inotify(7) constants and the fixed part of struct inotify_event.
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = os.O_CLOEXEC
+INOTIFY_EVENT = struct.Struct("iIII")
+# Whole-file replacements (write + rename) and in-place rewrites both end in one of these.
+REGISTRY_EVENTS = IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+
+class _Inotify:
+    """
+    Minimal ctypes binding for inotify on the directories holding the watched files.
+    Directories are watched rather than the files so atomic renames are seen.
+    """
+    def __init__(self, paths: List[Path]):
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.names = {p.name for p in paths}
+        for directory in {p.parent for p in paths}:
+            if libc.inotify_add_watch(self.fd, os.fsencode(directory), REGISTRY_EVENTS) < 0:
+                errno = ctypes.get_errno()
+                os.close(self.fd)
+                raise OSError(errno, f"inotify_add_watch failed for {directory}")
+        # Written to by wake() so close() does not wait out a select timeout.
+        self._wake_r, self._wake_w = os.pipe()
+
+    def wait(self, timeout: float) -> bool:
+        """
+        Waits up to `timeout` seconds; True if a watched file changed.
+        """
+        readable, _, _ = select.select([self.fd, self._wake_r], [], [], timeout)
+        if self.fd not in readable:
+            return False
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return False
+        changed, offset = False, 0
+        while offset + INOTIFY_EVENT.size <= len(data):
+            _, _, _, name_len = INOTIFY_EVENT.unpack_from(data, offset)
+            offset += INOTIFY_EVENT.size
+            name = data[offset:offset + name_len].rstrip(b"\0")
+            offset += name_len
+            if os.fsdecode(name) in self.names:
+                changed = True
+        return changed
+
+    def wake(self):
+        os.write(self._wake_w, b"\0")
+
+    def close(self):
+        for fd in (self.fd, self._wake_r, self._wake_w):
+            os.close(fd)
+
+
+class RegistryWatcher:
+    """
+    Re-verifies the registry whenever it (or its public key) changes and calls
+    `on_change` with each newly verified registry, so revocations take effect
+    without a restart.
+
+    Uses inotify on Linux and falls back to polling every `poll_interval`
+    seconds (a stat per file, thanks to the verifier cache). A registry that
+    fails verification is logged and ignored; the last verified one stays in
+    force until a valid replacement appears, both here and in the verifier's
+    own `check()`, so reconnecting Enclaves are judged by the same registry
+    `current` holds.
+    """
+    def __init__(self, verifier: RegistryVerifier, on_change: Callable[[VerifiedRegistry], None],
+                 poll_interval: float = 1.0, use_inotify: Optional[bool] = None):
+        self.verifier = verifier
+        self.on_change = on_change
+        self.poll_interval = poll_interval
+        self.use_inotify = sys.platform.startswith("linux") if use_inotify is None else use_inotify
+        self.current: Optional[VerifiedRegistry] = None
+        self.reloads = 0
+        self.rejected = 0
+        self._inotify: Optional[_Inotify] = None
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        if self.use_inotify:
+            try:
+                self._inotify = _Inotify([self.verifier.registry_path, self.verifier.pub_key_path])
+            except (OSError, AttributeError) as e:
+                host_logger.warning(None, f"Registry watcher falling back to polling: {e}")
+        try:
+            self.current = self.verifier.load()
+        except Exception as e:
+            self.current = self.verifier.last_verified
+            host_logger.error(None, f"Registry watcher could not load registry: {e}")
+        self._thread = threading.Thread(target=self._watch_loop, name="RegistryWatcher", daemon=True)
+        self._thread.start()
+
+    def _watch_loop(self):
+        while not self._stopped.is_set():
+            if self._inotify is not None:
+                # The timeout doubles as a safety-net poll for changes inotify cannot see (e.g. remote filesystems).
+                self._inotify.wait(max(self.poll_interval, 5.0))
+                if self._stopped.is_set():
+                    break
+            elif self._stopped.wait(self.poll_interval):
+                break
+            self.refresh()
+
+    def refresh(self) -> Optional[VerifiedRegistry]:
+        """
+        Re-checks the files now; calls `on_change` if a new registry verified.
+        """
+        try:
+            registry = self.verifier.load()
+        except Exception as e:
+            self.rejected += 1
+            host_logger.error(None, f"Registry reload rejected, keeping last verified registry: {e}")
+            # The verifier keeps its last verified registry too, so check() agrees with `current`.
+            return self.current
+        if self.current is not None and registry.digest == self.current.digest:
+            return registry
+        self.current = registry
+        self.reloads += 1
+        host_logger.info(None, "Registry reloaded.", metadata={"measurements": len(registry.measurements)})
+        try:
+            self.on_change(registry)
+        except Exception as e:
+            host_logger.error(None, f"Registry change handler failed: {e}")
+        return registry
+
+    def close(self):
+        self._stopped.set()
+        if self._inotify is not None:
+            self._inotify.wake()
+        if self._thread is not None:
+            self._thread.join(timeout=self.poll_interval + 1)
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
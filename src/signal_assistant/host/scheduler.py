@@ -0,0 +1,104 @@
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, Optional
+
+LANE_CONTROL = 0
+LANE_DATA = 1
+LANES = (LANE_CONTROL, LANE_DATA)
+
+# Control-plane commands: cheap, latency-sensitive, and never worth queueing behind LLM turns.
+CONTROL_COMMANDS = frozenset({"GET_STATUS", "PROVISION_EAK", "CHECK_LE_POLICY"})
+
+SCHEDULE_STRICT = "strict"
+SCHEDULE_WEIGHTED = "weighted"
+SCHEDULING_POLICIES = (SCHEDULE_STRICT, SCHEDULE_WEIGHTED)
+DEFAULT_LANE_WEIGHTS = {LANE_CONTROL: 4, LANE_DATA: 1}
+
+
+def command_lane(command: str) -> int:
+    return LANE_CONTROL if command in CONTROL_COMMANDS else LANE_DATA
+
+
+@dataclass
+class LaneStats:
+    """Per-lane counters: items dispatched and the longest time one waited in the lane."""
+    dispatched: Dict[int, int] = field(default_factory=lambda: {lane: 0 for lane in LANES})
+    max_wait: Dict[int, float] = field(default_factory=lambda: {lane: 0.0 for lane in LANES})
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"dispatched": dict(self.dispatched), "max_wait": {k: round(v, 6) for k, v in self.max_wait.items()}}
+
+
+class LaneScheduler:
+    """
+    Orders outbound work from several priority lanes onto one channel.
+
+    `strict` always drains the control lane first. `weighted` serves up to
+    `weights[lane]` items from a lane before moving to the next non-empty
+    one, so data traffic keeps flowing under a steady stream of control
+    commands. Either way an idle lane costs nothing and FIFO order is kept
+    within a lane.
+    """
+    def __init__(self, policy: str = SCHEDULE_STRICT, weights: Optional[Dict[int, int]] = None):
+        if policy not in SCHEDULING_POLICIES:
+            raise ValueError(f"Unknown scheduling policy '{policy}'.")
+        self.policy = policy
+        self.weights = dict(weights or DEFAULT_LANE_WEIGHTS)
+        if any(self.weights.get(lane, 0) < 1 for lane in LANES):
+            raise ValueError("Every lane needs a weight of at least 1.")
+        self._lanes: Dict[int, Deque] = {lane: deque() for lane in LANES}
+        self._cond = threading.Condition()
+        self._current = LANE_CONTROL
+        self._served = 0
+        self._closed = False
+        self.stats = LaneStats()
+
+    def put(self, lane: int, item: Any):
+        if lane not in self._lanes:
+            raise ValueError(f"Unknown lane {lane}.")
+        with self._cond:
+            self._lanes[lane].append((time.monotonic(), item))
+            self._cond.notify()
+
+    def get(self, timeout: Optional[float] = None) -> Optional[Any]:
+        """
+        Returns the next item to dispatch, or None on timeout or once closed.
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._closed or self.depth() > 0, timeout):
+                return None
+            if self._closed:
+                return None
+            lane = self._next_lane()
+            enqueued_at, item = self._lanes[lane].popleft()
+            self.stats.dispatched[lane] += 1
+            self.stats.max_wait[lane] = max(self.stats.max_wait[lane], time.monotonic() - enqueued_at)
+            return item
+
+    def _next_lane(self) -> int:
+        # Called with the condition held and at least one lane non-empty.
+        if self.policy == SCHEDULE_STRICT:
+            return next(lane for lane in LANES if self._lanes[lane])
+        if self._lanes[self._current] and self._served < self.weights[self._current]:
+            self._served += 1
+            return self._current
+        start = LANES.index(self._current)
+        for offset in range(1, len(LANES) + 1):
+            lane = LANES[(start + offset) % len(LANES)]
+            if self._lanes[lane]:
+                self._current = lane
+                self._served = 1
+                return lane
+        raise RuntimeError("LaneScheduler._next_lane called with every lane empty.")
+
+    def depth(self, lane: Optional[int] = None) -> int:
+        if lane is not None:
+            return len(self._lanes[lane])
+        return sum(len(q) for q in self._lanes.values())
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
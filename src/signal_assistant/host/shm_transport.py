@@ -0,0 +1,338 @@
+import asyncio
+import mmap
+import os
+import select
+import struct
+import threading
+import time
+from queue import Empty
+from typing import Optional
+
+# Ring file layout. head, tail and the waiting flag sit on separate cache lines
+# so the producer and consumer processes do not contend for the same line.
+RING_MAGIC = 0x53415242  # "SARB"
+RING_VERSION = 1
+_MAGIC = struct.Struct("<IIQ")   # magic, version, capacity    @ 0
+_COUNTER = struct.Struct("<Q")   # head @ 64, tail @ 128, consumer waiting @ 192
+HEAD_OFFSET = 64
+TAIL_OFFSET = 128
+WAITING_OFFSET = 192
+DATA_OFFSET = 256
+
+RECORD_HEADER = struct.Struct("<I")
+WRAP_MARKER = 0xFFFFFFFF
+
+DEFAULT_RING_CAPACITY = 4 * 1024 * 1024
+
+
+class RingFullError(Exception):
+    """Raised when a frame cannot be written to a shared-memory ring in time."""
+    pass
+
+
+class Doorbell:
+    """
+    Cross-process wakeup built on a named FIFO: the producer writes a byte
+    when the consumer has announced it is about to sleep, and the consumer
+    blocks in select() (or the event loop's reader) until that byte arrives.
+    """
+    def __init__(self, path: str, create: bool = False):
+        self.path = path
+        if create:
+            if os.path.exists(path):
+                os.unlink(path)
+            os.mkfifo(path, 0o600)
+        # O_RDWR keeps the FIFO open without waiting for a peer (Linux semantics).
+        self.fd = os.open(path, os.O_RDWR | os.O_NONBLOCK)
+
+    def fileno(self) -> int:
+        return self.fd
+
+    def ring(self):
+        try:
+            os.write(self.fd, b"\x01")
+        except BlockingIOError:
+            pass  # Pipe already full of unread rings; the consumer will wake anyway.
+
+    def drain(self):
+        try:
+            while os.read(self.fd, 4096):
+                pass
+        except BlockingIOError:
+            pass
+
+    def wait(self, timeout: Optional[float]) -> bool:
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if readable:
+            self.drain()
+        return bool(readable)
+
+    def close(self):
+        os.close(self.fd)
+
+
+class ShmRing:
+    """
+    Single-producer/single-consumer byte ring in an mmap'd file.
+
+    Records are a u32 length followed by the frame, written straight into the
+    mapping; a record that would straddle the end of the ring is preceded by a
+    wrap marker and starts again at offset 0. `head` and `tail` only ever grow
+    and are published after the data they cover, so each side can read the
+    other's progress without locks.
+
+    Frames are limited to `max_frame` (half the ring, less the record header),
+    so that a frame always fits an empty ring wherever the last one ended: a
+    wrap skips at most the unused end of the ring, and the frame then lands
+    clear of it.
+    """
+    def __init__(self, path: str, file_obj, mapping: mmap.mmap, capacity: int):
+        self.path = path
+        self._file = file_obj
+        self._map = mapping
+        self._buf = memoryview(mapping)
+        self.capacity = capacity
+
+    @property
+    def max_frame(self) -> int:
+        return self.capacity // 2 - RECORD_HEADER.size
+
+    @classmethod
+    def create(cls, path: str, capacity: int = DEFAULT_RING_CAPACITY) -> "ShmRing":
+        f = open(path, "w+b")
+        f.truncate(DATA_OFFSET + capacity)
+        mapping = mmap.mmap(f.fileno(), DATA_OFFSET + capacity)
+        _MAGIC.pack_into(mapping, 0, RING_MAGIC, RING_VERSION, capacity)
+        return cls(path, f, mapping, capacity)
+
+    @classmethod
+    def attach(cls, path: str) -> "ShmRing":
+        f = open(path, "r+b")
+        mapping = mmap.mmap(f.fileno(), 0)
+        magic, version, capacity = _MAGIC.unpack_from(mapping, 0)
+        if magic != RING_MAGIC or version != RING_VERSION:
+            mapping.close()
+            f.close()
+            raise ValueError(f"{path} is not a version {RING_VERSION} shared-memory ring.")
+        return cls(path, f, mapping, capacity)
+
+    def _load(self, offset: int) -> int:
+        return _COUNTER.unpack_from(self._map, offset)[0]
+
+    def _store(self, offset: int, value: int):
+        _COUNTER.pack_into(self._map, offset, value)
+
+    @property
+    def consumer_waiting(self) -> bool:
+        return self._load(WAITING_OFFSET) == 1
+
+    def set_consumer_waiting(self, waiting: bool):
+        self._store(WAITING_OFFSET, 1 if waiting else 0)
+
+    def used(self) -> int:
+        return self._load(HEAD_OFFSET) - self._load(TAIL_OFFSET)
+
+    def try_write(self, frame: bytes) -> bool:
+        """
+        Copies `frame` into the ring. Returns False if there is not enough free space yet.
+        """
+        length = len(frame)
+        if length > self.max_frame:
+            raise ValueError(f"Frame of {length} bytes exceeds the {self.max_frame} byte limit of a "
+                             f"{self.capacity} byte ring.")
+        record = RECORD_HEADER.size + length
+        head = self._load(HEAD_OFFSET)
+        tail = self._load(TAIL_OFFSET)
+        pos = head % self.capacity
+        contiguous = self.capacity - pos
+        skip = contiguous if contiguous < record else 0
+        if head + skip + record - tail > self.capacity:
+            return False
+        if skip:
+            if contiguous >= RECORD_HEADER.size:
+                RECORD_HEADER.pack_into(self._buf, DATA_OFFSET + pos, WRAP_MARKER)
+            head += skip
+            pos = 0
+        start = DATA_OFFSET + pos
+        RECORD_HEADER.pack_into(self._buf, start, length)
+        self._buf[start + RECORD_HEADER.size:start + record] = frame
+        self._store(HEAD_OFFSET, head + record)
+        return True
+
+    def try_read(self) -> Optional[bytes]:
+        """
+        Pops the next frame, or None if the ring is empty.
+        """
+        head = self._load(HEAD_OFFSET)
+        tail = self._load(TAIL_OFFSET)
+        while tail != head:
+            pos = tail % self.capacity
+            contiguous = self.capacity - pos
+            if contiguous < RECORD_HEADER.size:
+                tail += contiguous
+                continue
+            start = DATA_OFFSET + pos
+            (length,) = RECORD_HEADER.unpack_from(self._buf, start)
+            if length == WRAP_MARKER:
+                tail += contiguous
+                continue
+            data_start = start + RECORD_HEADER.size
+            frame = bytes(self._buf[data_start:data_start + length])
+            self._store(TAIL_OFFSET, tail + RECORD_HEADER.size + length)
+            return frame
+        self._store(TAIL_OFFSET, tail)
+        return None
+
+    def close(self):
+        self._buf.release()
+        self._map.close()
+        self._file.close()
+
+
+class ShmTransport:
+    """
+    SecureChannel backend over a pair of shared-memory rings, for a Host and
+    Enclave running on the same machine.
+
+    Each ring has exactly one producer and one consumer process; threads within
+    a process are serialised by a lock on each side. The consumer only asks for
+    a doorbell ring when it is about to sleep, so a busy channel moves frames
+    with no system calls at all.
+    """
+    FULL_BACKOFF_MIN = 0.0002
+    FULL_BACKOFF_MAX = 0.005
+
+    def __init__(self, send_ring: ShmRing, send_bell: Doorbell, receive_ring: ShmRing, receive_bell: Doorbell,
+                 put_timeout: float = 5):
+        self._send_ring = send_ring
+        self._send_bell = send_bell
+        self._receive_ring = receive_ring
+        self._receive_bell = receive_bell
+        self.put_timeout = put_timeout
+        self._send_lock = threading.Lock()
+        self._receive_lock = threading.Lock()
+        # Serialises get_async callers: the doorbell fd takes only one event-loop reader.
+        self._async_receive_lock: Optional[asyncio.Lock] = None
+        self._closed = False
+
+    @classmethod
+    def create(cls, prefix: str, capacity: int = DEFAULT_RING_CAPACITY, **kwargs) -> "ShmTransport":
+        """
+        Creates the rings and doorbells at `prefix.*` (Host side).
+        """
+        h2e = ShmRing.create(f"{prefix}.h2e", capacity)
+        e2h = ShmRing.create(f"{prefix}.e2h", capacity)
+        return cls(h2e, Doorbell(f"{prefix}.h2e.bell", create=True), e2h, Doorbell(f"{prefix}.e2h.bell", create=True), **kwargs)
+
+    @classmethod
+    def attach(cls, prefix: str, **kwargs) -> "ShmTransport":
+        """
+        Attaches to rings created by `create` from the other end (Enclave side).
+        """
+        h2e = ShmRing.attach(f"{prefix}.h2e")
+        e2h = ShmRing.attach(f"{prefix}.e2h")
+        return cls(e2h, Doorbell(f"{prefix}.e2h.bell"), h2e, Doorbell(f"{prefix}.h2e.bell"), **kwargs)
+
+    def put(self, frame: bytes):
+        deadline = time.monotonic() + self.put_timeout
+        delay = self.FULL_BACKOFF_MIN
+        with self._send_lock:
+            while not self._send_ring.try_write(frame):
+                if time.monotonic() >= deadline:
+                    raise RingFullError("Shared-memory ring stayed full; the peer is not consuming.")
+                time.sleep(delay)
+                delay = min(delay * 2, self.FULL_BACKOFF_MAX)
+            if self._send_ring.consumer_waiting:
+                self._send_bell.ring()
+
+    def get(self, timeout: Optional[float] = None) -> bytes:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._receive_lock:
+            while True:
+                frame = self._receive_ring.try_read()
+                if frame is not None:
+                    return frame
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise Empty
+                self._receive_ring.set_consumer_waiting(True)
+                try:
+                    # Re-check after announcing, or a frame written in between would sleep until the timeout.
+                    frame = self._receive_ring.try_read()
+                    if frame is not None:
+                        return frame
+                    self._receive_bell.wait(remaining)
+                finally:
+                    self._receive_ring.set_consumer_waiting(False)
+
+    async def put_async(self, frame: bytes):
+        with self._send_lock:
+            written = self._send_ring.try_write(frame)
+            if written and self._send_ring.consumer_waiting:
+                self._send_bell.ring()
+        if not written:
+            # Ring full: wait for the consumer off the event loop.
+            await asyncio.to_thread(self.put, frame)
+
+    async def get_async(self, timeout: Optional[float] = None) -> bytes:
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+        if self._async_receive_lock is None:
+            self._async_receive_lock = asyncio.Lock()
+        try:
+            await asyncio.wait_for(self._async_receive_lock.acquire(),
+                                   None if deadline is None else max(0.0, deadline - loop.time()))
+        except asyncio.TimeoutError:
+            raise Empty
+        try:
+            return await self._get_async_locked(loop, deadline)
+        finally:
+            self._async_receive_lock.release()
+
+    async def _get_async_locked(self, loop: asyncio.AbstractEventLoop, deadline: Optional[float]) -> bytes:
+        while True:
+            with self._receive_lock:
+                frame = self._receive_ring.try_read()
+                if frame is None:
+                    self._receive_ring.set_consumer_waiting(True)
+                    frame = self._receive_ring.try_read()
+            if frame is not None:
+                self._receive_ring.set_consumer_waiting(False)
+                return frame
+            remaining = None if deadline is None else deadline - loop.time()
+            if remaining is not None and remaining <= 0:
+                self._receive_ring.set_consumer_waiting(False)
+                raise Empty
+            rung = loop.create_future()
+            loop.add_reader(self._receive_bell.fileno(), lambda: rung.done() or rung.set_result(None))
+            try:
+                await asyncio.wait_for(rung, remaining)
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                loop.remove_reader(self._receive_bell.fileno())
+                self._receive_bell.drain()
+
+    def qsize(self) -> int:
+        """
+        Bytes waiting in the receive ring; non-zero whenever a frame is pending.
+        """
+        return self._receive_ring.used()
+
+    def close(self):
+        # Both the channel owner and SignalProxy shutdown may close the transport.
+        if self._closed:
+            return
+        self._closed = True
+        for part in (self._send_ring, self._receive_ring, self._send_bell, self._receive_bell):
+            part.close()
+
+    def unlink(self):
+        """
+        Removes the ring and doorbell files (creator side, after both ends have closed).
+        """
+        for path in (self._send_ring.path, self._receive_ring.path, self._send_bell.path, self._receive_bell.path):
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,269 @@
+import json
+import os
+import shutil
+import threading
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+RECORDS_FILE = "records.log"
+INDEX_FILE = "users.idx"
+DEFAULT_RETENTION_DAYS = 30
+
+
+def partition_day(timestamp: float) -> date:
+    """The UTC day whose partition holds a record written at `timestamp`."""
+    return datetime.fromtimestamp(timestamp, timezone.utc).date()
+
+
+def _day_start(day: date) -> float:
+    return datetime(day.year, day.month, day.day, tzinfo=timezone.utc).timestamp()
+
+
+def _end_torn_line(f):
+    # A crash mid-append can leave a partial last line; the next append must not run on from it.
+    size = os.fstat(f.fileno()).st_size
+    if size and os.pread(f.fileno(), 1, size - 1) != b"\n":
+        f.write(b"\n")
+
+
+@dataclass
+class LogStoreStats:
+    """
+    Log store counters: records appended, indexed and refused as already past
+    the TTL, partitions expired, and records read by queries.
+    """
+    appended: int = 0
+    indexed: int = 0
+    rejected_expired: int = 0
+    expired_partitions: int = 0
+    records_read: int = 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "appended": self.appended,
+            "indexed": self.indexed,
+            "rejected_expired": self.rejected_expired,
+            "expired_partitions": self.expired_partitions,
+            "records_read": self.records_read,
+        }
+
+
+class LogStore:
+    """
+    Local store for Host operational logs (privacy_architecture.md §9.1.2.1).
+
+    Records go to one directory per UTC day, holding an append-only file of
+    compact JSON lines and a sidecar index of `internal_user_id` -> byte
+    offset. A query for one user reads the small index of each day in range
+    and seeks straight to that user's lines, never scanning the log files.
+    Retention is enforced by deleting whole day directories: once a day's
+    first possible record is `retention_days` old the day is dropped, so no
+    record outlives the TTL. Every append and query checks `clock` and runs
+    the expiry again once a UTC midnight has passed since the last one, and a
+    record whose day has already expired is refused rather than recreating
+    the partition. Queries also skip anything past the TTL, so an expiry that
+    has not run yet never widens what is returned.
+
+    With `read_only` the store never changes what is on disk: the directory
+    is not created, queries do not run the expiry, and `append`/`expire`
+    raise RuntimeError.
+    """
+    def __init__(self, root: Path, retention_days: int = DEFAULT_RETENTION_DAYS,
+                 clock: Callable[[], float] = time.time, read_only: bool = False):
+        if retention_days < 1:
+            raise ValueError("Log retention must be at least one day.")
+        self.root = Path(root)
+        self.retention_days = retention_days
+        self.read_only = read_only
+        self.stats = LogStoreStats()
+        self._clock = clock
+        if not read_only:
+            self.root.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._day: Optional[date] = None
+        self._day_bounds = (0.0, 0.0)
+        self._records = None
+        self._index = None
+        self._offset = 0
+        # Per-day index cache: bytes of users.idx already parsed, and offsets per user. The
+        # index is append-only, so a later query only parses what was added since.
+        self._indexes: Dict[date, Tuple[int, Dict[str, List[int]]]] = {}
+        # Newest expired day, and when (by `clock`) the next day falls out of the TTL.
+        self._expired_through = date.min
+        self._next_expiry = 0.0
+
+    @property
+    def retention_seconds(self) -> float:
+        return self.retention_days * 86400.0
+
+    def partition_path(self, day: date) -> Path:
+        return self.root / day.isoformat()
+
+    def partitions(self) -> List[date]:
+        """
+        Days with a partition on disk, oldest first.
+        """
+        days = []
+        if not self.root.is_dir():
+            return days
+        for entry in os.scandir(self.root):
+            if not entry.is_dir():
+                continue
+            try:
+                days.append(date.fromisoformat(entry.name))
+            except ValueError:
+                continue
+        return sorted(days)
+
+    def _open(self, day: date):
+        self._close_files()
+        path = self.partition_path(day)
+        path.mkdir(exist_ok=True)
+        # Unbuffered O_APPEND writes: each record is one write, and readers never see half a line
+        # from a buffer that has not been flushed yet.
+        self._records = open(path / RECORDS_FILE, "a+b", buffering=0)
+        self._index = open(path / INDEX_FILE, "a+b", buffering=0)
+        _end_torn_line(self._records)
+        _end_torn_line(self._index)
+        self._offset = os.fstat(self._records.fileno()).st_size
+        start = _day_start(day)
+        self._day, self._day_bounds = day, (start, start + 86400.0)
+
+    def _close_files(self):
+        for f in (self._records, self._index):
+            if f is not None:
+                f.close()
+        self._records = self._index = None
+        self._day = None
+
+    def close(self):
+        with self._lock:
+            self._close_files()
+
+    def append(self, timestamp: float, level: str, logger: str, message: str,
+               internal_user_id: Optional[str] = None, metadata: Optional[Dict[str, Any]] = None):
+        """
+        Appends one record to the partition for its UTC day. Records with an
+        `internal_user_id` also get an index entry. A record for a day that is
+        already past the TTL is dropped and counted in `stats.rejected_expired`.
+        """
+        self._check_writable()
+        self._expire_if_due()
+        record: Dict[str, Any] = {"t": round(timestamp, 6), "l": level, "n": logger, "m": message}
+        if internal_user_id is not None:
+            record["u"] = internal_user_id
+        if metadata:
+            record["d"] = metadata
+        line = json.dumps(record, separators=(",", ":"), default=str).encode("utf-8") + b"\n"
+        with self._lock:
+            start, end = self._day_bounds
+            if self._records is None or not start <= timestamp < end:
+                day = partition_day(timestamp)
+                if day <= self._expired_through:
+                    self.stats.rejected_expired += 1
+                    return
+                self._open(day)
+            offset = self._offset
+            self._records.write(line)
+            self._offset += len(line)
+            self.stats.appended += 1
+            if internal_user_id is not None:
+                # json.dumps escapes tabs and newlines, so the id can never break the line format.
+                self._index.write(f"{json.dumps(internal_user_id)}\t{offset}\n".encode("utf-8"))
+                self.stats.indexed += 1
+
+    def _check_writable(self):
+        if self.read_only:
+            raise RuntimeError("LogStore was opened read-only.")
+
+    def _expire_if_due(self):
+        now = self._clock()
+        if now >= self._next_expiry:
+            self.expire(now)
+
+    def expire(self, now: Optional[float] = None) -> List[date]:
+        """
+        Drops every partition whose day started at least `retention_days` ago. Returns the dropped days.
+        """
+        self._check_writable()
+        now = self._clock() if now is None else now
+        cutoff = partition_day(now - self.retention_seconds)
+        with self._lock:
+            # The cutoff only moves at UTC midnight, since the TTL is whole days.
+            self._expired_through = max(self._expired_through, cutoff)
+            self._next_expiry = _day_start(partition_day(now)) + 86400.0
+        dropped = []
+        for day in self.partitions():
+            if day > cutoff:
+                break
+            with self._lock:
+                if day == self._day:
+                    self._close_files()
+                self._indexes.pop(day, None)
+            shutil.rmtree(self.partition_path(day), ignore_errors=True)
+            dropped.append(day)
+        self.stats.expired_partitions += len(dropped)
+        return dropped
+
+    def _user_offsets(self, day: date, internal_user_id: str) -> List[int]:
+        with self._lock:
+            parsed, offsets = self._indexes.get(day, (0, {}))
+            try:
+                with open(self.partition_path(day) / INDEX_FILE, "rb") as f:
+                    f.seek(parsed)
+                    tail = f.read()
+            except FileNotFoundError:
+                return []
+            # A concurrent writer may have left a partial last line; it is picked up next time.
+            complete = tail.rfind(b"\n") + 1
+            if complete:
+                for entry in tail[:complete].decode("utf-8", errors="replace").splitlines():
+                    user, _, offset = entry.rpartition("\t")
+                    try:
+                        user, offset = json.loads(user), int(offset)
+                    except ValueError:
+                        continue  # Torn by a crash and then ended by the next append; it indexes nothing.
+                    offsets.setdefault(user, []).append(offset)
+                parsed += complete
+            self._indexes[day] = (parsed, offsets)
+            return list(offsets.get(internal_user_id, ()))
+
+    def query(self, internal_user_id: str, since: Optional[float] = None, until: Optional[float] = None,
+              now: Optional[float] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Yields the records of one `internal_user_id` written in [since, until),
+        oldest first, limited to the retention window.
+        """
+        if not self.read_only:
+            self._expire_if_due()
+        now = self._clock() if now is None else now
+        oldest = now - self.retention_seconds
+        since = oldest if since is None else max(since, oldest)
+        until = now if until is None else until
+        first, last = partition_day(since), partition_day(until)
+        for day in self.partitions():
+            if day < first or day > last:
+                continue
+            offsets = self._user_offsets(day, internal_user_id)
+            if not offsets:
+                continue
+            with open(self.partition_path(day) / RECORDS_FILE, "rb") as f:
+                for offset in offsets:
+                    f.seek(offset)
+                    try:
+                        record = json.loads(f.readline())
+                    except ValueError:
+                        continue  # Offset from a torn index line that still parsed.
+                    self.stats.records_read += 1
+                    if record.get("u") == internal_user_id and since <= record["t"] < until:
+                        yield {
+                            "timestamp": record["t"],
+                            "level": record["l"],
+                            "logger": record["n"],
+                            "internal_user_id": record.get("u"),
+                            "message": record["m"],
+                            "metadata": record.get("d"),
+                        }
@@ -0,0 +1,317 @@
+import asyncio
+import concurrent.futures
+import socket
+import struct
+from collections import deque
+from dataclasses import dataclass
+from queue import Empty
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+
+from signal_assistant.host.logging_client import LoggingClient
+
+# Instantiate the logger once per module
+host_logger = LoggingClient("HostApp")
+
+# Every frame on the wire is a 4-byte big-endian length followed by the
+# (already encrypted) frame body.
+FRAME_HEADER = struct.Struct("!I")
+MAX_FRAME_SIZE = 16 * 1024 * 1024
+
+VMADDR_CID_ANY = getattr(socket, "VMADDR_CID_ANY", 0xFFFFFFFF)
+VMADDR_CID_HOST = getattr(socket, "VMADDR_CID_HOST", 2)
+
+
+class FramingError(Exception):
+    """Raised when a peer sends a malformed or oversized frame."""
+    pass
+
+
+def vsock_available() -> bool:
+    """
+    True if this interpreter can open AF_VSOCK sockets.
+    Checked at call time so that simulate.py can hide AF_VSOCK to force TCP.
+    """
+    return hasattr(socket, "AF_VSOCK")
+
+
+def encode_frame_header(length: int) -> bytes:
+    if length > MAX_FRAME_SIZE:
+        raise FramingError(f"Frame of {length} bytes exceeds maximum of {MAX_FRAME_SIZE} bytes.")
+    return FRAME_HEADER.pack(length)
+
+
+async def read_frame(reader: asyncio.StreamReader) -> Optional[bytes]:
+    """
+    Reads one length-prefixed frame. Returns None on a clean EOF between frames.
+    """
+    try:
+        header = await reader.readexactly(FRAME_HEADER.size)
+    except asyncio.IncompleteReadError as e:
+        if not e.partial:
+            return None
+        raise FramingError("Connection closed inside a frame header.")
+    (length,) = FRAME_HEADER.unpack(header)
+    if length > MAX_FRAME_SIZE:
+        raise FramingError(f"Peer announced a {length} byte frame, maximum is {MAX_FRAME_SIZE} bytes.")
+    try:
+        return await reader.readexactly(length)
+    except asyncio.IncompleteReadError:
+        raise FramingError("Connection closed inside a frame body.")
+
+
+@dataclass
+class StreamTransportStats:
+    """Frames written to and read from one connection, and frames lost because it closed first."""
+    frames_sent: int = 0
+    frames_received: int = 0
+    frames_lost: int = 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "frames_sent": self.frames_sent,
+            "frames_received": self.frames_received,
+            "frames_lost": self.frames_lost,
+        }
+
+
+class StreamTransport:
+    """
+    Queue-compatible endpoint over an asyncio stream connection.
+
+    Coroutines on the owning event loop use `send_frame`/`receive_frame`.
+    `put`/`get` keep the `Queue` surface SecureChannel already understands and
+    may be called from any thread other than the loop's own thread.
+
+    A timeout yields None (or Empty); once the peer has gone and every frame
+    it sent has been handed out, receiving raises ConnectionError, so readers
+    can tell a dead connection from a quiet one.
+    """
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._reader = reader
+        self._writer = writer
+        self._loop = asyncio.get_running_loop()
+        self._inbound: asyncio.Queue = asyncio.Queue()
+        # Frames a cancelled receive_frame had already taken; delivered before the queue.
+        self._pushback: Deque[bytes] = deque()
+        # Frames put() from other threads, written by the loop in put() order.
+        self._outbox: Deque[bytes] = deque()
+        self._closed = asyncio.Event()
+        self.stats = StreamTransportStats()
+        self._read_task = self._loop.create_task(self._read_loop())
+
+    @property
+    def closed(self) -> bool:
+        return self._closed.is_set()
+
+    async def _read_loop(self):
+        try:
+            while True:
+                frame = await read_frame(self._reader)
+                if frame is None:
+                    break
+                self.stats.frames_received += 1
+                self._inbound.put_nowait(frame)
+        except FramingError as e:
+            host_logger.error(None, f"Host StreamTransport framing error: {e}")
+        except (ConnectionError, OSError) as e:
+            host_logger.warning(None, f"Host StreamTransport connection lost: {e}")
+        finally:
+            self._closed.set()
+            self._writer.close()
+
+    def _write(self, frame: bytes):
+        if self._closed.is_set():
+            raise ConnectionError("StreamTransport is closed.")
+        self._writer.writelines([encode_frame_header(len(frame)), frame])
+        self.stats.frames_sent += 1
+
+    def _write_outbox(self):
+        # Runs on the loop. Frames queued by put() go out before anything the loop writes
+        # after them, so a thread's frame is never overtaken by a later send_frame.
+        while self._outbox:
+            frame = self._outbox.popleft()
+            try:
+                self._write(frame)
+            except ConnectionError:
+                lost = 1 + len(self._outbox)
+                self._outbox.clear()
+                self.stats.frames_lost += lost
+                host_logger.warning(None, "Host StreamTransport closed with queued frames unsent.",
+                                    metadata={"frames_lost": lost})
+                return
+
+    async def send_frame(self, frame: bytes):
+        self._write_outbox()
+        self._write(frame)
+        await self._writer.drain()
+
+    async def receive_frame(self, timeout: Optional[float] = None) -> Optional[bytes]:
+        """
+        Returns the next frame, or None on timeout. Raises ConnectionError once
+        the peer has gone away and every frame it sent has been returned.
+        """
+        if self._pushback:
+            return self._pushback.popleft()
+        if self._inbound.empty() and self._closed.is_set():
+            raise ConnectionError("StreamTransport is closed.")
+        get_task = asyncio.ensure_future(self._inbound.get())
+        closed_task = asyncio.ensure_future(self._closed.wait())
+        try:
+            await asyncio.wait({get_task, closed_task}, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+        except BaseException:
+            # Cancelled while waiting: a frame the get already took goes back, not to waste.
+            if get_task.done() and not get_task.cancelled():
+                self._pushback.appendleft(get_task.result())
+            raise
+        finally:
+            closed_task.cancel()
+            # A pending Queue.get leaves its item in the queue when cancelled.
+            if not get_task.done():
+                get_task.cancel()
+        if get_task.done() and not get_task.cancelled():
+            return get_task.result()
+        if self._closed.is_set():
+            if not self._inbound.empty():
+                return self._inbound.get_nowait()
+            raise ConnectionError("StreamTransport is closed.")
+        return None
+
+    async def put_async(self, frame: bytes):
+        await self.send_frame(frame)
+
+    async def get_async(self, timeout: Optional[float] = None) -> bytes:
+        frame = await self.receive_frame(timeout)
+        if frame is None:
+            raise Empty
+        return frame
+
+    def qsize(self) -> int:
+        return len(self._pushback) + self._inbound.qsize()
+
+    def put(self, frame: bytes):
+        self._check_not_on_loop()
+        if self._closed.is_set():
+            raise ConnectionError("StreamTransport is closed.")
+        self._outbox.append(frame)
+        self._loop.call_soon_threadsafe(self._write_outbox)
+
+    def get(self, timeout: Optional[float] = None) -> bytes:
+        self._check_not_on_loop()
+        future = asyncio.run_coroutine_threadsafe(self.receive_frame(timeout), self._loop)
+        frame = future.result()
+        if frame is None:
+            raise Empty
+        return frame
+
+    def _check_not_on_loop(self):
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        if running is self._loop:
+            raise RuntimeError("Blocking StreamTransport calls from the event loop thread; use send_frame/receive_frame.")
+
+    def close_threadsafe(self, timeout: float = 5):
+        """
+        Closes the connection from any thread. Off the loop it waits up to
+        `timeout` for the close to finish; on the loop thread it is scheduled.
+        """
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            self._loop.create_task(self.close())
+            return
+        if self._loop.is_closed():
+            return
+        future = asyncio.run_coroutine_threadsafe(self.close(), self._loop)
+        try:
+            future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            host_logger.warning(None, "Host StreamTransport close did not finish in time.")
+
+    async def close(self):
+        self._writer.close()
+        self._read_task.cancel()
+        try:
+            await self._writer.wait_closed()
+        except (ConnectionError, OSError):
+            pass
+        self._closed.set()
+
+
+def _vsock_listener(port: int) -> Optional[socket.socket]:
+    try:
+        sock = socket.socket(socket.AF_VSOCK, socket.SOCK_STREAM)
+    except OSError as e:
+        host_logger.warning(None, f"AF_VSOCK unavailable ({e}), falling back to TCP.")
+        return None
+    try:
+        sock.bind((VMADDR_CID_ANY, port))
+        sock.listen()
+        sock.setblocking(False)
+        return sock
+    except OSError as e:
+        sock.close()
+        host_logger.warning(None, f"Binding AF_VSOCK port {port} failed ({e}), falling back to TCP.")
+        return None
+
+
+async def start_frame_server(port: int, on_connect: Callable[[StreamTransport], Awaitable[None]],
+                             host: str = "127.0.0.1", use_vsock: Optional[bool] = None) -> asyncio.AbstractServer:
+    """
+    Listens for Enclave connections on `port`, over AF_VSOCK when available and TCP otherwise.
+    `on_connect` is awaited with a StreamTransport for every accepted connection.
+    """
+    async def _handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        await on_connect(StreamTransport(reader, writer))
+
+    if use_vsock is None:
+        use_vsock = vsock_available()
+
+    sock = _vsock_listener(port) if use_vsock else None
+    if sock is not None:
+        server = await asyncio.start_server(_handle, sock=sock)
+        host_logger.info(None, f"Host listening for Enclave on vsock port {port}.")
+    else:
+        server = await asyncio.start_server(_handle, host, port)
+        host_logger.info(None, f"Host listening for Enclave on tcp {host}:{port}.")
+    return server
+
+
+async def _vsock_connect(cid: int, port: int) -> socket.socket:
+    sock = socket.socket(socket.AF_VSOCK, socket.SOCK_STREAM)
+    sock.setblocking(False)
+    try:
+        await asyncio.get_running_loop().sock_connect(sock, (cid, port))
+    except BaseException:
+        sock.close()
+        raise
+    return sock
+
+
+async def open_frame_connection(port: int, cid: int = VMADDR_CID_HOST, host: str = "127.0.0.1",
+                                use_vsock: Optional[bool] = None) -> StreamTransport:
+    """
+    Connects to a frame server, over AF_VSOCK (`cid`, `port`) when available and TCP (`host`, `port`) otherwise.
+    With `use_vsock` left as None a failed AF_VSOCK connect falls back to TCP, as
+    start_frame_server does; with `use_vsock=True` the error is raised.
+    """
+    fallback = use_vsock is None
+    if use_vsock is None:
+        use_vsock = vsock_available()
+
+    if use_vsock:
+        try:
+            sock = await _vsock_connect(cid, port)
+        except OSError as e:
+            if not fallback:
+                raise
+            host_logger.warning(None, f"Connecting over AF_VSOCK failed ({e}), falling back to TCP.")
+        else:
+            reader, writer = await asyncio.open_connection(sock=sock)
+            return StreamTransport(reader, writer)
+    reader, writer = await asyncio.open_connection(host, port)
+    return StreamTransport(reader, writer)
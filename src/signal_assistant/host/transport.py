@@ -1,24 +1,240 @@
+import asyncio
+import base64
 import json
-from queue import Queue
-from typing import Any, Dict, Optional
+import struct
+import threading
 import time
+from collections import deque
+from dataclasses import dataclass, field
+from queue import Empty
+from typing import Any, Dict, List, Optional, Sequence
 
 from cryptography.fernet import Fernet
 
+from signal_assistant.host.channel_backend import channel_backend, wake_future
+from signal_assistant.host.channel_compression import (
+    DEFAULT_COMPRESS_THRESHOLD,
+    DEFAULT_MAX_DECOMPRESSED_SIZE,
+    available_codecs,
+    compress,
+    decompress,
+)
+from signal_assistant.host.channel_crypto import (
+    AEAD_CIPHERS,
+    CIPHER_FERNET,
+    SUPPORTED_CIPHERS,
+    AeadSession,
+    derive_session_keys,
+    new_key_share,
+)
 from signal_assistant.host.logging_client import LoggingClient
+from signal_assistant.host.shm_transport import ShmTransport
+from signal_assistant.host.stream_transport import StreamTransport
 
 # Instantiate the logger once per module
 host_logger = LoggingClient("HostApp")
 
+ROLE_INITIATOR = "initiator"
+ROLE_RESPONDER = "responder"
+
+# Handshake frames are Fernet tokens whose plaintext starts with this marker,
+# so they can never be mistaken for a serialized command.
+HANDSHAKE_MAGIC = b"\x00SA-HANDSHAKE/1\x00"
+
+# Optional frame features agreed in the handshake.
+FEATURE_BATCH = "batch"
+FEATURE_COMPRESS = "compress"
+FEATURE_CREDITS = "credits"
+FEATURE_REKEY = "rekey"
+SUPPORTED_FEATURES = (FEATURE_BATCH, FEATURE_COMPRESS, FEATURE_CREDITS, FEATURE_REKEY)
+
+# Once any feature is negotiated, every data frame's plaintext starts with a flags byte.
+FRAME_FLAG_BATCH = 0x01
+FRAME_FLAG_COMPRESSED = 0x02
+# Control frames carry channel bookkeeping, never a message, and cost no credit.
+FRAME_FLAG_CONTROL = 0x04
+BATCH_ITEM_HEADER = struct.Struct("!I")
+CREDIT_GRANT = struct.Struct("!I")
+
+DEFAULT_RECEIVE_WINDOW = 64
+
+# Returned by `_open` for a control frame, so receive loops can keep waiting for a message.
+_CONTROL_FRAME = object()
+_TIMED_OUT = object()
+
+
+class ChannelBackpressureError(Exception):
+    """Raised when a flow-controlled send waits longer than `credit_timeout` for the peer to grant credit."""
+    pass
+
+
+@dataclass
+class ChannelStats:
+    """
+    Counters for one SecureChannel. `batch_sizes` maps commands-per-frame to frames sent;
+    the compression counters cover only frames that were actually sent compressed.
+    `outstanding_frames` is how many sent frames the peer has not yet credited back
+    (its queue depth, as far as this side can tell); starvations count sends that
+    had to wait for credit.
+    """
+    frames_sent: int = 0
+    frames_received: int = 0
+    messages_sent: int = 0
+    messages_received: int = 0
+    batch_sizes: Dict[int, int] = field(default_factory=dict)
+    frames_compressed: int = 0
+    bytes_before_compression: int = 0
+    bytes_after_compression: int = 0
+    outstanding_frames: int = 0
+    peak_outstanding_frames: int = 0
+    credit_starvations: int = 0
+    credit_wait_seconds: float = 0.0
+
+    def record_sent(self, message_count: int):
+        self.frames_sent += 1
+        self.messages_sent += message_count
+        self.batch_sizes[message_count] = self.batch_sizes.get(message_count, 0) + 1
+
+    def record_compression(self, original_size: int, compressed_size: int):
+        self.frames_compressed += 1
+        self.bytes_before_compression += original_size
+        self.bytes_after_compression += compressed_size
+
+    @property
+    def compression_ratio(self) -> float:
+        if not self.bytes_after_compression:
+            return 1.0
+        return self.bytes_before_compression / self.bytes_after_compression
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "frames_sent": self.frames_sent,
+            "frames_received": self.frames_received,
+            "messages_sent": self.messages_sent,
+            "messages_received": self.messages_received,
+            "batch_sizes": dict(self.batch_sizes),
+            "frames_compressed": self.frames_compressed,
+            "compression_ratio": round(self.compression_ratio, 3),
+            "outstanding_frames": self.outstanding_frames,
+            "peak_outstanding_frames": self.peak_outstanding_frames,
+            "credit_starvations": self.credit_starvations,
+            "credit_wait_seconds": round(self.credit_wait_seconds, 6),
+        }
+
+
 class SecureChannel:
     """
     Simulates a secure communication channel between the Host and the Enclave.
     Messages are encrypted/decrypted using Fernet for confidentiality.
+
+    The queues may be a ChannelQueue (preferred in-process), a StreamTransport
+    (see `over_stream`), a `queue.Queue`, or a plain list shared with a legacy
+    peer; `channel_backend` adapts each to one put/get/get_async surface.
+
+    If `ciphers` lists an AEAD cipher, `establish()` negotiates a session over
+    the Fernet channel: both sides contribute a key share, the initiator offers
+    its ciphers in preference order and the responder picks one. Frames are then
+    raw AEAD frames (see AeadSession). A peer that does not answer the handshake
+    leaves the channel on Fernet.
+
+    `features` are negotiated the same way. With FEATURE_BATCH agreed and a
+    non-zero `coalesce_window`, commands sent within the window of a previous
+    frame are packed into one encrypted frame (up to `coalesce_max_bytes` or
+    `coalesce_max_messages`) and split again by the receiver. A send after an
+    idle period goes out immediately, so coalescing only engages under load.
+
+    With FEATURE_COMPRESS agreed, the peers also pick a codec from
+    `compression_codecs` and frames of at least `compress_threshold` bytes are
+    compressed before encryption (flagged per frame, and only kept when they
+    shrink). Inbound frames may not expand beyond `max_decompressed_size`.
+
+    With FEATURE_CREDITS agreed, each side advertises a `receive_window` in
+    frames and the peer may only have that many unconsumed frames outstanding.
+    The receiver grants credit back in control frames once half the window has
+    been consumed; a sender out of credit blocks (or awaits) for up to
+    `credit_timeout` and then raises ChannelBackpressureError. Grants arrive on
+    the inbound side, so someone must be receiving while a sender waits.
+
+    With FEATURE_REKEY agreed on an AEAD session, frames carry a key epoch and
+    each side rotates its send key in band after `rekey_after_frames` frames
+    or `rekey_after_seconds`, with the previous key accepted for
+    `rekey_grace_period` seconds (see AeadSession). Traffic never pauses.
     """
-    def __init__(self, inbound_queue: Queue, outbound_queue: Queue):
+    def __init__(self, inbound_queue: Any, outbound_queue: Any,
+                 ciphers: Sequence[str] = (CIPHER_FERNET,), role: str = ROLE_INITIATOR,
+                 key: Optional[bytes] = None, handshake_timeout: float = 5,
+                 features: Sequence[str] = (), coalesce_window: float = 0.0,
+                 coalesce_max_bytes: int = 64 * 1024, coalesce_max_messages: int = 64,
+                 compression_codecs: Optional[Sequence[str]] = None,
+                 compress_threshold: int = DEFAULT_COMPRESS_THRESHOLD,
+                 max_decompressed_size: int = DEFAULT_MAX_DECOMPRESSED_SIZE,
+                 receive_window: int = DEFAULT_RECEIVE_WINDOW, credit_timeout: float = 30,
+                 rekey_after_frames: Optional[int] = None, rekey_after_seconds: Optional[float] = None,
+                 rekey_grace_period: float = 5.0):
+        unsupported = [c for c in ciphers if c not in SUPPORTED_CIPHERS]
+        if unsupported:
+            raise ValueError(f"Unsupported channel cipher(s): {unsupported}")
+        unsupported = [f for f in features if f not in SUPPORTED_FEATURES]
+        if unsupported:
+            raise ValueError(f"Unsupported channel feature(s): {unsupported}")
+        if compression_codecs is None:
+            compression_codecs = available_codecs()
+        unsupported = [c for c in compression_codecs if c not in available_codecs()]
+        if unsupported:
+            raise ValueError(f"Unsupported compression codec(s): {unsupported}")
+        if receive_window < 1:
+            raise ValueError("receive_window must allow at least one frame.")
+        if role not in (ROLE_INITIATOR, ROLE_RESPONDER):
+            raise ValueError(f"Unknown SecureChannel role '{role}'.")
         self.inbound_queue = inbound_queue
         self.outbound_queue = outbound_queue
-        self.fernet = self._generate_or_load_key()
+        self._inbound = channel_backend(inbound_queue)
+        self._outbound = channel_backend(outbound_queue)
+        self.fernet = Fernet(key) if key else self._generate_or_load_key()
+        self.ciphers = tuple(ciphers)
+        self.role = role
+        self.handshake_timeout = handshake_timeout
+        self.session: Optional[AeadSession] = None
+        # Data frames that arrived while a responder was waiting for the handshake.
+        self._early_frames: deque = deque()
+        self.features = tuple(features)
+        self.negotiated_features: frozenset = frozenset()
+        self.stats = ChannelStats()
+        # Messages already split out of a received batch frame.
+        self._received_messages: deque = deque()
+
+        self.compression_codecs = tuple(compression_codecs)
+        self.compress_threshold = compress_threshold
+        self.max_decompressed_size = max_decompressed_size
+        self.compression: Optional[str] = None
+
+        self.receive_window = receive_window
+        self.credit_timeout = credit_timeout
+        self._send_window = 0
+        self._send_credits = 0
+        self._consumed_frames = 0
+        self._credit_cond = threading.Condition()
+        # Coroutines waiting in _take_credit_async, woken from whichever thread applies a grant.
+        self._credit_waiters: deque = deque()
+        # Credit grants sealed by _open, sent by the receive path that opened the frame
+        # (blocking put for receive, put_async for receive_async).
+        self._pending_grants: deque = deque()
+
+        self.rekey_after_frames = rekey_after_frames
+        self.rekey_after_seconds = rekey_after_seconds
+        self.rekey_grace_period = rekey_grace_period
+
+        self.coalesce_window = coalesce_window
+        self.coalesce_max_bytes = coalesce_max_bytes
+        self.coalesce_max_messages = coalesce_max_messages
+        self._batch: List[bytes] = []
+        self._batch_bytes = 0
+        self._batch_deadline = 0.0
+        self._last_flush = 0.0
+        self._batch_cond = threading.Condition()
+        self._flusher: Optional[threading.Thread] = None
+        # Backpressure the background flusher hit; raised to the next sender so it is not lost.
+        self._flush_error: Optional[Exception] = None
 
     def _generate_or_load_key(self) -> Fernet:
         """
@@ -30,45 +246,600 @@ class SecureChannel:
         # In production, this would be loaded securely.
         return Fernet(Fernet.generate_key())
 
+    @property
+    def cipher(self) -> str:
+        return self.session.cipher if self.session else CIPHER_FERNET
+
+    def _negotiates(self) -> bool:
+        # Responders always answer a hello, even if they can only accept Fernet.
+        return self.role == ROLE_RESPONDER or bool(self.features) or any(c in AEAD_CIPHERS for c in self.ciphers)
+
     def establish(self) -> bool:
         """
-        Establishes a secure channel. Placeholder for actual implementation.
+        Establishes a secure channel, negotiating an AEAD session when one is configured.
         """
-        host_logger.info(None, "Host SecureChannel established.")
+        if self._negotiates():
+            if self.role == ROLE_INITIATOR:
+                self._outbound.put(self.fernet.encrypt(self._hello()))
+                self._on_accept(self._next_frame(self.handshake_timeout))
+            else:
+                reply = self._on_hello(self._next_frame(self.handshake_timeout))
+                if reply is not None:
+                    self._outbound.put(reply)
+        host_logger.info(None, "Host SecureChannel established.", metadata={"cipher": self.cipher})
         return True
 
+    async def establish_async(self) -> bool:
+        """
+        `establish` for channels driven from an event loop.
+        """
+        if self._negotiates():
+            if self.role == ROLE_INITIATOR:
+                await self._outbound.put_async(self.fernet.encrypt(self._hello()))
+                self._on_accept(await self._next_frame_async(self.handshake_timeout))
+            else:
+                reply = self._on_hello(await self._next_frame_async(self.handshake_timeout))
+                if reply is not None:
+                    await self._outbound.put_async(reply)
+        host_logger.info(None, "Host SecureChannel established.", metadata={"cipher": self.cipher})
+        return True
+
+    def _hello(self) -> bytes:
+        self._key_share = new_key_share()
+        hello = {
+            "type": "hello",
+            "ciphers": list(self.ciphers),
+            "features": list(self.features),
+            "share": base64.b64encode(self._key_share).decode("ascii"),
+        }
+        if FEATURE_COMPRESS in self.features:
+            hello["compression"] = list(self.compression_codecs)
+        if FEATURE_CREDITS in self.features:
+            hello["window"] = self.receive_window
+        return HANDSHAKE_MAGIC + json.dumps(hello).encode("utf-8")
+
+    def _parse_handshake(self, frame: Optional[bytes]) -> Optional[Dict[str, Any]]:
+        if frame is None:
+            return None
+        try:
+            plaintext = self.fernet.decrypt(frame)
+        except Exception:
+            return None
+        if not plaintext.startswith(HANDSHAKE_MAGIC):
+            return None
+        try:
+            return json.loads(plaintext[len(HANDSHAKE_MAGIC):])
+        except ValueError:
+            return None
+
+    def _on_accept(self, frame: Optional[bytes]):
+        message = self._parse_handshake(frame)
+        if not message or message.get("type") != "accept":
+            # Legacy peers answer the hello like an unknown command; that reply is discarded.
+            host_logger.warning(None, "Host SecureChannel peer did not negotiate a session cipher; staying on Fernet.")
+            return
+        self.negotiated_features = frozenset(f for f in message.get("features", []) if f in self.features)
+        if FEATURE_COMPRESS in self.negotiated_features:
+            codec = message.get("compression")
+            if codec in self.compression_codecs:
+                self.compression = codec
+            else:
+                self.negotiated_features = self.negotiated_features - {FEATURE_COMPRESS}
+        self._on_peer_window(message)
+        cipher = message.get("cipher")
+        if cipher == CIPHER_FERNET:
+            return
+        if cipher not in AEAD_CIPHERS or cipher not in self.ciphers:
+            host_logger.error(None, "Host SecureChannel peer chose a cipher that was not offered; staying on Fernet.")
+            return
+        peer_share = base64.b64decode(message["share"])
+        outbound_key, inbound_key = derive_session_keys(cipher, self._key_share, peer_share)
+        self.session = self._new_session(cipher, outbound_key, inbound_key)
+
+    def _on_hello(self, frame: Optional[bytes]) -> Optional[bytes]:
+        message = self._parse_handshake(frame)
+        if not message or message.get("type") != "hello":
+            if frame is not None:
+                self._early_frames.append(frame)
+            host_logger.warning(None, "Host SecureChannel peer did not offer a handshake; staying on Fernet.")
+            return None
+        offered = message.get("ciphers", [])
+        cipher = next((c for c in self.ciphers if c in offered), CIPHER_FERNET)
+        self.negotiated_features = frozenset(f for f in message.get("features", []) if f in self.features)
+        if FEATURE_COMPRESS in self.negotiated_features:
+            offered_codecs = message.get("compression", [])
+            self.compression = next((c for c in self.compression_codecs if c in offered_codecs), None)
+            if self.compression is None:
+                self.negotiated_features = self.negotiated_features - {FEATURE_COMPRESS}
+        accept: Dict[str, Any] = {"type": "accept", "cipher": cipher, "features": sorted(self.negotiated_features)}
+        if self.compression:
+            accept["compression"] = self.compression
+        self._on_peer_window(message)
+        if FEATURE_CREDITS in self.negotiated_features:
+            accept["window"] = self.receive_window
+        if cipher in AEAD_CIPHERS:
+            key_share = new_key_share()
+            accept["share"] = base64.b64encode(key_share).decode("ascii")
+            inbound_key, outbound_key = derive_session_keys(cipher, base64.b64decode(message["share"]), key_share)
+        reply = self.fernet.encrypt(HANDSHAKE_MAGIC + json.dumps(accept).encode("utf-8"))
+        if cipher in AEAD_CIPHERS:
+            self.session = self._new_session(cipher, outbound_key, inbound_key)
+        return reply
+
+    def _new_session(self, cipher: str, outbound_key: bytes, inbound_key: bytes) -> AeadSession:
+        return AeadSession(cipher, outbound_key, inbound_key, epochs=FEATURE_REKEY in self.negotiated_features,
+                           rekey_after_frames=self.rekey_after_frames, rekey_after_seconds=self.rekey_after_seconds,
+                           grace_period=self.rekey_grace_period)
+
+    def rotate_key(self):
+        """
+        Rotates this side's send key now. The peer follows from the epoch in the next frame.
+        """
+        if self.session is None or not self.session.epochs:
+            raise RuntimeError("Key rotation needs a negotiated AEAD session with FEATURE_REKEY.")
+        self.session.rotate_send_key()
+
+    def _on_peer_window(self, message: Dict[str, Any]):
+        if FEATURE_CREDITS not in self.negotiated_features:
+            return
+        window = message.get("window")
+        if not isinstance(window, int) or window < 1:
+            self.negotiated_features = self.negotiated_features - {FEATURE_CREDITS}
+            return
+        self._send_window = self._send_credits = window
+
+    def _flow_controlled(self) -> bool:
+        return FEATURE_CREDITS in self.negotiated_features
+
+    def _try_take_credit(self) -> bool:
+        """
+        Takes one send credit if one is available (or flow control is off) without waiting.
+        """
+        if not self._flow_controlled():
+            return True
+        with self._credit_cond:
+            if self._send_credits <= 0:
+                return False
+            self._consume_credit_locked()
+            return True
+
+    def _take_credit(self):
+        """
+        Takes one send credit, waiting up to `credit_timeout` for the peer to grant more.
+        """
+        if self._try_take_credit():
+            return
+        with self._credit_cond:
+            self.stats.credit_starvations += 1
+            started = time.monotonic()
+            granted = self._credit_cond.wait_for(lambda: self._send_credits > 0, self.credit_timeout)
+            self.stats.credit_wait_seconds += time.monotonic() - started
+            if not granted:
+                host_logger.warning(None, "Host SecureChannel send blocked: peer granted no credit in time.",
+                                    metadata={"outstanding_frames": self.stats.outstanding_frames})
+                raise ChannelBackpressureError(f"No send credit granted within {self.credit_timeout}s.")
+            self._consume_credit_locked()
+
+    async def _take_credit_async(self):
+        """
+        `_take_credit` for coroutines: awaits a grant without blocking the event loop.
+        """
+        if self._try_take_credit():
+            return
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        deadline = started + self.credit_timeout
+        self.stats.credit_starvations += 1
+        while True:
+            with self._credit_cond:
+                if self._send_credits > 0:
+                    self.stats.credit_wait_seconds += loop.time() - started
+                    self._consume_credit_locked()
+                    return
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    self.stats.credit_wait_seconds += loop.time() - started
+                    host_logger.warning(None, "Host SecureChannel send blocked: peer granted no credit in time.",
+                                        metadata={"outstanding_frames": self.stats.outstanding_frames})
+                    raise ChannelBackpressureError(f"No send credit granted within {self.credit_timeout}s.")
+                waiter = loop.create_future()
+                self._credit_waiters.append((loop, waiter))
+            try:
+                await asyncio.wait_for(waiter, remaining)
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                with self._credit_cond:
+                    if (loop, waiter) in self._credit_waiters:
+                        self._credit_waiters.remove((loop, waiter))
+
+    def _consume_credit_locked(self):
+        self._send_credits -= 1
+        outstanding = self._send_window - self._send_credits
+        self.stats.outstanding_frames = outstanding
+        self.stats.peak_outstanding_frames = max(self.stats.peak_outstanding_frames, outstanding)
+
+    def _on_credit_grant(self, body: bytes):
+        (granted,) = CREDIT_GRANT.unpack(body)
+        self._add_credits(granted)
+
+    def _refund_credit(self):
+        """
+        Gives back a credit taken for a frame that was not sent after all.
+        """
+        if self._flow_controlled():
+            self._add_credits(1)
+
+    def _add_credits(self, granted: int):
+        with self._credit_cond:
+            self._send_credits = min(self._send_credits + granted, self._send_window)
+            self.stats.outstanding_frames = self._send_window - self._send_credits
+            self._credit_cond.notify_all()
+            waiters, self._credit_waiters = self._credit_waiters, deque()
+        for loop, waiter in waiters:
+            loop.call_soon_threadsafe(wake_future, waiter)
+
+    def _return_credit(self):
+        """
+        Counts one consumed inbound frame and, once half the window is used,
+        queues a credit grant for the receive path to send.
+        """
+        with self._credit_cond:
+            self._consumed_frames += 1
+            if self._consumed_frames < max(1, self.receive_window // 2):
+                return
+            granted, self._consumed_frames = self._consumed_frames, 0
+        self._pending_grants.append(self._encrypt(bytes([FRAME_FLAG_CONTROL]) + CREDIT_GRANT.pack(granted)))
+
+    def _pop_grant(self) -> Optional[bytes]:
+        try:
+            return self._pending_grants.popleft()
+        except IndexError:
+            return None
+
+    def _send_grants(self):
+        grant = self._pop_grant()
+        while grant is not None:
+            self._outbound.put(grant)
+            grant = self._pop_grant()
+
+    async def _send_grants_async(self):
+        grant = self._pop_grant()
+        while grant is not None:
+            await self._outbound.put_async(grant)
+            grant = self._pop_grant()
+
+    def _encrypt(self, data: bytes) -> bytes:
+        if self.session is not None:
+            return self.session.encrypt(data)
+        return self.fernet.encrypt(data)
+
+    def _frame(self, messages: List[bytes]) -> bytes:
+        if not self.negotiated_features:
+            return messages[0]
+        flags = 0
+        if len(messages) == 1:
+            body = messages[0]
+        else:
+            flags |= FRAME_FLAG_BATCH
+            parts = []
+            for message in messages:
+                parts.append(BATCH_ITEM_HEADER.pack(len(message)))
+                parts.append(message)
+            body = b"".join(parts)
+        if self.compression and len(body) >= self.compress_threshold:
+            packed = compress(self.compression, body)
+            # Already-compressed or encrypted payloads don't shrink; send those as they are.
+            if len(packed) < len(body):
+                self.stats.record_compression(len(body), len(packed))
+                flags |= FRAME_FLAG_COMPRESSED
+                body = packed
+        return bytes([flags]) + body
+
+    def _unframe(self, plaintext: bytes) -> List[bytes]:
+        if not self.negotiated_features:
+            return [plaintext]
+        flags = plaintext[0]
+        body = plaintext[1:]
+        if flags & FRAME_FLAG_COMPRESSED:
+            if not self.compression:
+                raise ValueError("Compressed frame on a channel without negotiated compression.")
+            body = decompress(self.compression, body, self.max_decompressed_size)
+        if not flags & FRAME_FLAG_BATCH:
+            return [body]
+        messages = []
+        view = memoryview(body)
+        offset = 0
+        while offset < len(view):
+            (length,) = BATCH_ITEM_HEADER.unpack_from(view, offset)
+            offset += BATCH_ITEM_HEADER.size
+            if offset + length > len(view):
+                raise ValueError("Batch frame item overruns the frame.")
+            messages.append(bytes(view[offset:offset + length]))
+            offset += length
+        return messages
+
+    def _coalescing(self) -> bool:
+        return self.coalesce_window > 0 and FEATURE_BATCH in self.negotiated_features
+
+    def _seal(self, messages: List[bytes]) -> bytes:
+        encrypted_data = self._encrypt(self._frame(messages))
+        self.stats.record_sent(len(messages))
+        host_logger.debug(None, "Host SecureChannel sending (encrypted data)",
+                          metadata={"data_len": len(encrypted_data), "messages": len(messages)})
+        return encrypted_data
+
     def send(self, data: bytes):
         """
         Encrypts data and sends it to the outbound queue (towards Enclave).
         """
-        encrypted_data = self.fernet.encrypt(data)
-        host_logger.debug(None, "Host SecureChannel sending (encrypted data)", metadata={"data_len": len(encrypted_data)})
-        if hasattr(self.outbound_queue, 'put'):
-            self.outbound_queue.put(encrypted_data)
-        else:
-            self.outbound_queue.append(encrypted_data)
+        if self._coalescing():
+            self._coalesce(data)
+            return
+        self._take_credit()
+        self._outbound.put(self._seal([data]))
+
+    def _coalesce(self, data: bytes):
+        with self._batch_cond:
+            if self._add_to_batch_locked(data):
+                self._flush_locked()
+
+    def _add_to_batch_locked(self, data: bytes) -> bool:
+        """
+        Adds `data` to the pending batch. Returns True if the batch should go
+        out now: the channel was idle (a lone command does not wait for
+        company) or the batch is full. Otherwise the flusher sends it when the
+        window closes.
+        """
+        if self._flush_error is not None:
+            error, self._flush_error = self._flush_error, None
+            raise error
+        now = time.monotonic()
+        idle = not self._batch and now - self._last_flush >= self.coalesce_window
+        if not self._batch:
+            self._batch_deadline = now + self.coalesce_window
+        self._batch.append(data)
+        self._batch_bytes += len(data)
+        if idle or len(self._batch) >= self.coalesce_max_messages or self._batch_bytes >= self.coalesce_max_bytes:
+            return True
+        if self._flusher is None:
+            self._flusher = threading.Thread(target=self._flush_loop, name="SecureChannelFlusher", daemon=True)
+            self._flusher.start()
+        self._batch_cond.notify()
+        return False
+
+    def _take_batch_locked(self) -> List[bytes]:
+        messages = self._batch
+        self._batch = []
+        self._batch_bytes = 0
+        self._last_flush = time.monotonic()
+        return messages
+
+    def _flush_locked(self):
+        """
+        Sends the pending batch as one frame. Called and returns with
+        _batch_cond held, but waits for credit without it, so other senders
+        keep filling the batch meanwhile. If no credit comes, the batch stays
+        pending and ChannelBackpressureError is raised.
+        """
+        if not self._try_take_credit():
+            self._batch_cond.release()
+            try:
+                self._take_credit()
+            finally:
+                self._batch_cond.acquire()
+        if not self._batch:
+            # Another sender flushed while this one waited for credit.
+            self._refund_credit()
+            return
+        # Sealed and queued under the lock so frames leave in the order they were filled.
+        self._outbound.put(self._seal(self._take_batch_locked()))
+
+    def _flush_loop(self):
+        with self._batch_cond:
+            while True:
+                if not self._batch:
+                    self._batch_cond.wait()
+                    continue
+                remaining = self._batch_deadline - time.monotonic()
+                if remaining > 0:
+                    self._batch_cond.wait(remaining)
+                    continue
+                try:
+                    self._flush_locked()
+                    self._flush_error = None
+                except ChannelBackpressureError as e:
+                    # The batch is kept and retried; the next sender learns the peer is stalled.
+                    self._flush_error = e
+                except Exception as e:
+                    host_logger.error(None, f"Host SecureChannel failed to flush coalesced frame: {e}")
+
+    def flush(self):
+        """
+        Sends any coalesced commands immediately.
+        """
+        with self._batch_cond:
+            if self._batch:
+                self._flush_locked()
 
     def receive(self, timeout: int = 5) -> Optional[bytes]:
         """
         Receives encrypted data from the inbound queue (from Enclave) and decrypts it.
         """
+        message = self._next_message(timeout)
+        if message is _TIMED_OUT:
+            host_logger.warning(None, "Host SecureChannel receive timed out.")
+            return None
+        return message
+
+    def _receive_message(self, timeout: float, timed_out: Any = None) -> Optional[bytes]:
+        """
+        `receive` without the timeout warning, for background readers that poll.
+        Returns `timed_out` if no message arrived in time, so callers can tell a
+        timeout from a rejected frame (None).
+        """
+        message = self._next_message(timeout)
+        return timed_out if message is _TIMED_OUT else message
+
+    def _next_message(self, timeout: float):
+        """
+        Returns the next message (None if its frame was rejected), skipping
+        control frames, or _TIMED_OUT if no message arrived in time.
+        """
+        if self._received_messages:
+            return self._received_messages.popleft()
+        deadline = time.monotonic() + timeout
+        while True:
+            encrypted_data = self._next_frame(max(0.0, deadline - time.monotonic()))
+            if encrypted_data is None:
+                return _TIMED_OUT
+            message = self._open(encrypted_data)
+            self._send_grants()
+            if message is not _CONTROL_FRAME:
+                return message
+
+    def _open(self, encrypted_data: bytes) -> Optional[bytes]:
+        """
+        Decrypts one frame and returns its first message, keeping the rest of a batch for later receives.
+        Control frames are applied here and yield _CONTROL_FRAME.
+        """
+        plaintext = self._decrypt(encrypted_data)
+        messages = None
+        if plaintext is not None:
+            try:
+                if self.negotiated_features and plaintext[0] & FRAME_FLAG_CONTROL:
+                    self._on_credit_grant(plaintext[1:])
+                    return _CONTROL_FRAME
+                messages = self._unframe(plaintext)
+            except (ValueError, IndexError, struct.error) as e:
+                host_logger.error(None, f"Host SecureChannel dropped malformed frame: {e}")
+        if self._flow_controlled():
+            # Rejected frames still left the queue; not crediting them would leak the peer's window.
+            self._return_credit()
+        if messages is None:
+            return None
+        self.stats.frames_received += 1
+        self.stats.messages_received += len(messages)
+        if not messages:
+            return None
+        self._received_messages.extend(messages[1:])
+        return messages[0]
+
+    def _next_frame(self, timeout: float) -> Optional[bytes]:
+        """
+        Pops the next encrypted frame from the inbound queue, or None on timeout. Does not log.
+        """
+        if self._early_frames:
+            return self._early_frames.popleft()
         try:
-            encrypted_data = None
-            if hasattr(self.inbound_queue, 'get'):
-                encrypted_data = self.inbound_queue.get(timeout=timeout)
-            else:
-                start_time = time.time()
-                while not self.inbound_queue:
-                    if time.time() - start_time > timeout:
-                        host_logger.warning(None, "Host SecureChannel receive timed out (List).")
-                        return None
-                    time.sleep(0.01)
-                encrypted_data = self.inbound_queue.pop(0)
-
-            host_logger.debug(None, "Host SecureChannel received (encrypted data)", metadata={"data_len": len(encrypted_data)})
-            decrypted_data = self.fernet.decrypt(encrypted_data)
-            return decrypted_data
+            return self._inbound.get(timeout=timeout)
+        except Empty:
+            return None
+
+    async def _next_frame_async(self, timeout: float) -> Optional[bytes]:
+        if self._early_frames:
+            return self._early_frames.popleft()
+        try:
+            return await self._inbound.get_async(timeout)
+        except Empty:
+            return None
+
+    def _decrypt(self, encrypted_data: bytes) -> Optional[bytes]:
+        host_logger.debug(None, "Host SecureChannel received (encrypted data)", metadata={"data_len": len(encrypted_data)})
+        try:
+            if self.session is not None:
+                return self.session.decrypt(encrypted_data)
+            return self.fernet.decrypt(encrypted_data)
         except Exception as e:
-            host_logger.warning(None, "Host SecureChannel receive timed out.")
             host_logger.error(None, f"Host SecureChannel decryption failed: {e}", metadata={"exception": str(e)})
             return None
+
+    @classmethod
+    def over_stream(cls, transport: StreamTransport, **kwargs) -> "SecureChannel":
+        """
+        Builds a channel whose inbound and outbound sides are one duplex transport
+        (a StreamTransport connection or a ShmTransport ring pair).
+        """
+        return cls(transport, transport, **kwargs)
+
+    def close(self):
+        """
+        Closes the StreamTransport or ShmTransport under the channel, so a
+        stream peer sees EOF. Plain queues have nothing to close. Callable from
+        any thread; on a StreamTransport's own loop the close is scheduled.
+        """
+        transports = [self.inbound_queue]
+        if self.outbound_queue is not self.inbound_queue:
+            transports.append(self.outbound_queue)
+        for transport in transports:
+            if isinstance(transport, StreamTransport):
+                transport.close_threadsafe()
+            elif isinstance(transport, ShmTransport):
+                transport.close()
+
+    async def send_async(self, data: bytes):
+        """
+        Encrypts data and hands it to the outbound backend without blocking the event loop.
+        """
+        if self._coalescing():
+            await self._coalesce_async(data)
+            return
+        await self._take_credit_async()
+        await self._outbound.put_async(self._seal([data]))
+
+    async def _coalesce_async(self, data: bytes):
+        with self._batch_cond:
+            if not self._add_to_batch_locked(data):
+                return
+        await self._flush_async()
+
+    async def _flush_async(self):
+        """
+        `_flush_locked` for coroutines: awaits credit and the outbound backend outside the batch lock.
+        """
+        await self._take_credit_async()
+        with self._batch_cond:
+            if not self._batch:
+                self._refund_credit()
+                return
+            frame = self._seal(self._take_batch_locked())
+        await self._outbound.put_async(frame)
+
+    async def receive_async(self, timeout: float = 5) -> Optional[bytes]:
+        """
+        Awaits the next frame from the inbound backend and decrypts it.
+        """
+        message = await self._next_message_async(timeout)
+        if message is _TIMED_OUT:
+            host_logger.warning(None, "Host SecureChannel receive timed out.")
+            return None
+        return message
+
+    async def _receive_message_async(self, timeout: float, timed_out: Any = None) -> Optional[bytes]:
+        """
+        `receive_async` without the timeout warning, for background readers
+        that poll. Returns `timed_out` if no message arrived in time, so callers
+        can tell a timeout from a rejected frame (None).
+        """
+        message = await self._next_message_async(timeout)
+        return timed_out if message is _TIMED_OUT else message
+
+    async def _next_message_async(self, timeout: float):
+        if self._received_messages:
+            return self._received_messages.popleft()
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            encrypted_data = await self._next_frame_async(max(0.0, deadline - loop.time()))
+            if encrypted_data is None:
+                return _TIMED_OUT
+            message = self._open(encrypted_data)
+            try:
+                await self._send_grants_async()
+            except asyncio.CancelledError:
+                # The frame is already opened; keep its message for the next receive.
+                if message is not _CONTROL_FRAME and message is not None:
+                    self._received_messages.appendleft(message)
+                raise
+            if message is not _CONTROL_FRAME:
+                return message
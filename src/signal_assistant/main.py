@@ -1,6 +1,16 @@
 import asyncio
 import logging
+from signal_assistant.config import host_settings
+from signal_assistant.host.logging_client import (
+    LogRateLimiter,
+    attach_log_store,
+    configure_rate_limits,
+    detach_log_store,
+    start_log_pipeline,
+    stop_log_pipeline,
+)
 from signal_assistant.host.storage.database import init_db
+from signal_assistant.host.storage.log_store import LogStore
 from signal_assistant.host.proxy import SignalProxy
 
 logging.basicConfig(level=logging.INFO)
@@ -9,10 +19,31 @@ logger = logging.getLogger(__name__)
 async def async_main():
     logger.info("Initializing Host Sidecar...")
     init_db()
+    log_store = None
+    if host_settings is not None and host_settings.log_store_path:
+        # With the log pipeline on, the store is written from the pipeline thread, not the event loop.
+        log_store = LogStore(host_settings.log_store_path, retention_days=host_settings.log_retention_days)
+        log_store.expire()
+        attach_log_store(log_store)
+    if host_settings is not None and host_settings.log_pipeline:
+        start_log_pipeline(capacity=host_settings.log_queue_capacity, overflow=host_settings.log_queue_overflow,
+                           block_timeout=host_settings.log_queue_block_timeout)
+    if host_settings is not None and (host_settings.log_rate_limits or host_settings.log_sample_rates):
+        configure_rate_limits(LogRateLimiter.from_level_names(
+            host_settings.log_rate_limits, host_settings.log_sample_rates,
+            burst=host_settings.log_rate_limit_burst, summary_interval=host_settings.log_summary_interval_seconds))
     
     proxy = SignalProxy()
-    # This runs forever
-    await proxy.run()
+    try:
+        # This runs forever
+        await proxy.run()
+    finally:
+        # Removing the limiter emits its pending summaries, which the pipeline then writes as it stops.
+        configure_rate_limits(None)
+        stop_log_pipeline()
+        if log_store is not None:
+            detach_log_store()
+            log_store.close()
 
 def run_host():
     """
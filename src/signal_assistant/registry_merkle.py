@@ -0,0 +1,149 @@
+import base64
+import hashlib
+import json
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+# RFC 6962 Merkle tree over the registry's measurements: each entry is a leaf,
+# and the Ed25519 signature covers the tree head (root + size + issue time)
+# rather than the whole list, so a single entry can be proven with O(log n)
+# hashes. A proof stays valid after its entry is revoked, so verifiers refuse
+# proofs whose head is older than a maximum age.
+MERKLE_SCHEME = "merkle-sha256"
+DEFAULT_MAX_PROOF_AGE = 7 * 24 * 3600
+LEAF_PREFIX = b"\x00"
+NODE_PREFIX = b"\x01"
+
+
+def canonical_entry(entry: Dict[str, Any]) -> bytes:
+    return json.dumps(entry, sort_keys=True).encode('utf-8')
+
+
+def leaf_hash(entry: Dict[str, Any]) -> bytes:
+    return hashlib.sha256(LEAF_PREFIX + canonical_entry(entry)).digest()
+
+
+def node_hash(left: bytes, right: bytes) -> bytes:
+    return hashlib.sha256(NODE_PREFIX + left + right).digest()
+
+
+def _split(n: int) -> int:
+    # Largest power of two strictly smaller than n (n >= 2).
+    return 1 << ((n - 1).bit_length() - 1)
+
+
+def merkle_root(leaves: Sequence[bytes]) -> bytes:
+    """
+    MTH(D[n]) from RFC 6962 section 2.1, over precomputed leaf hashes.
+    """
+    if not leaves:
+        return hashlib.sha256(b"").digest()
+    level = list(leaves)
+    # Bottom-up form of the recursive definition: an odd node out is promoted unchanged.
+    while len(level) > 1:
+        paired = [node_hash(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            paired.append(level[-1])
+        level = paired
+    return level[0]
+
+
+def inclusion_proof(index: int, leaves: Sequence[bytes]) -> List[bytes]:
+    """
+    PATH(m, D[n]) from RFC 6962 section 2.1.1: the sibling hashes from leaf `index` up to the root.
+    """
+    if not 0 <= index < len(leaves):
+        raise IndexError(f"Leaf index {index} out of range for tree of size {len(leaves)}.")
+    if len(leaves) == 1:
+        return []
+    k = _split(len(leaves))
+    if index < k:
+        return inclusion_proof(index, leaves[:k]) + [merkle_root(leaves[k:])]
+    return inclusion_proof(index - k, leaves[k:]) + [merkle_root(leaves[:k])]
+
+
+def root_from_proof(leaf: bytes, index: int, tree_size: int, proof: Sequence[bytes]) -> bytes:
+    """
+    Recomputes the root from a leaf hash and its audit path (RFC 9162 section 2.1.3.2).
+    Raises ValueError if the proof has the wrong shape for `index` and `tree_size`.
+    """
+    if not 0 <= index < tree_size:
+        raise ValueError(f"Leaf index {index} out of range for tree of size {tree_size}.")
+    fn, sn = index, tree_size - 1
+    r = leaf
+    for p in proof:
+        if sn == 0:
+            raise ValueError("Inclusion proof is too long.")
+        if fn % 2 == 1 or fn == sn:
+            r = node_hash(p, r)
+            if fn % 2 == 0:
+                while fn % 2 == 0 and fn != 0:
+                    fn >>= 1
+                    sn >>= 1
+        else:
+            r = node_hash(r, p)
+        fn >>= 1
+        sn >>= 1
+    if sn != 0:
+        raise ValueError("Inclusion proof is too short.")
+    return r
+
+
+def tree_head_bytes(root: bytes, tree_size: int, issued_at: Optional[int] = None) -> bytes:
+    """
+    The bytes the registry signature covers in Merkle mode. `issued_at` is the
+    signing time in Unix seconds; heads signed before it was added omit it.
+    """
+    head = {"root": root.hex(), "scheme": MERKLE_SCHEME, "tree_size": tree_size}
+    if issued_at is not None:
+        head["issued_at"] = int(issued_at)
+    return json.dumps(head, sort_keys=True).encode('utf-8')
+
+
+def registry_tree_head(measurements: Sequence[Dict[str, Any]], issued_at: Optional[int] = None) -> bytes:
+    return tree_head_bytes(merkle_root([leaf_hash(m) for m in measurements]), len(measurements), issued_at)
+
+
+def build_proof(measurements: Sequence[Dict[str, Any]], index: int, signature_entry: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    A self-contained inclusion proof for one entry of a Merkle-signed registry.
+    """
+    leaves = [leaf_hash(m) for m in measurements]
+    return {
+        "scheme": MERKLE_SCHEME,
+        "entry": measurements[index],
+        "index": index,
+        "tree_size": len(leaves),
+        "root": merkle_root(leaves).hex(),
+        "issued_at": signature_entry.get("issued_at"),
+        "audit_path": [h.hex() for h in inclusion_proof(index, leaves)],
+        "signature": signature_entry["signature"],
+        "algorithm": signature_entry.get("algorithm", "ed25519"),
+    }
+
+
+def verify_proof(proof: Dict[str, Any], public_key: Any, max_age: Optional[float] = DEFAULT_MAX_PROOF_AGE,
+                 now: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Checks the signed tree head, its age and the entry's audit path; returns the proven entry.
+    Raises ValueError if any check fails. `max_age=None` skips the age check.
+    """
+    if proof.get("scheme") != MERKLE_SCHEME:
+        raise ValueError(f"Unsupported proof scheme '{proof.get('scheme')}'.")
+    root = bytes.fromhex(proof["root"])
+    tree_size = int(proof["tree_size"])
+    issued_at = proof.get("issued_at")
+    try:
+        public_key.verify(base64.b64decode(proof["signature"]), tree_head_bytes(root, tree_size, issued_at))
+    except Exception as e:
+        raise ValueError(f"Tree head signature verification failed: {e!r}") from e
+    if max_age is not None:
+        if issued_at is None:
+            raise ValueError("Tree head has no issue time; re-sign the registry and issue a new proof.")
+        age = (time.time() if now is None else now) - int(issued_at)
+        if age > max_age:
+            raise ValueError(f"Tree head was signed {int(age)}s ago, more than the {int(max_age)}s allowed.")
+    path = [bytes.fromhex(h) for h in proof["audit_path"]]
+    if root_from_proof(leaf_hash(proof["entry"]), int(proof["index"]), tree_size, path) != root:
+        raise ValueError("Inclusion proof does not match the signed root.")
+    return proof["entry"]
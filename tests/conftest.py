@@ -0,0 +1,176 @@
+import asyncio
+import threading
+import time
+from typing import Any, NamedTuple
+
+import pytest
+from cryptography.fernet import Fernet
+
+from signal_assistant.host.channel_backend import ChannelQueue
+from signal_assistant.host.stream_transport import open_frame_connection, start_frame_server
+from signal_assistant.host.transport import ROLE_RESPONDER, SecureChannel
+
+
+class FakeClock:
+    """Clock whose time only moves when a test sets `now`."""
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def fake_clock():
+    return FakeClock()
+
+
+class FakeProxy:
+    """Stands in for an EnclaveProxy: answers after `delay`, or fails while `down`."""
+    def __init__(self, name, delay=0.0):
+        self.name = name
+        self.delay = delay
+        self.down = False
+        self.commands = []
+        self.closed = False
+
+    def send_command(self, command, payload):
+        self.commands.append(command)
+        time.sleep(self.delay)
+        if self.down:
+            return None
+        return f"{self.name}:{command}".encode()
+
+    def send_eak_to_enclave(self, eak, attestation_verified_by_host):
+        return attestation_verified_by_host
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def fake_proxy():
+    """The FakeProxy class, called with a name (and optional delay) for each stand-in."""
+    return FakeProxy
+
+
+class ChannelPair(NamedTuple):
+    """An established Host/Enclave SecureChannel pair and the Host-to-Enclave wire between them."""
+    host: SecureChannel
+    enclave: SecureChannel
+    wire: Any
+
+
+class _StreamWire:
+    """
+    Host-to-Enclave frames waiting at the Enclave's end of a StreamTransport
+    connection, with the ChannelQueue surface the tests use.
+    """
+    def __init__(self, loop, host_side, enclave_side):
+        self._loop = loop
+        self._host_side = host_side
+        self._enclave_side = enclave_side
+
+    def qsize(self, timeout: float = 1) -> int:
+        # Run a no-op on the loop so every frame put() before now has been written, then
+        # wait for the Enclave's end to have read as many frames as the Host's end wrote.
+        asyncio.run_coroutine_threadsafe(asyncio.sleep(0), self._loop).result(timeout)
+        deadline = time.monotonic() + timeout
+        while self._enclave_side.stats.frames_received < self._host_side.stats.frames_sent:
+            if time.monotonic() >= deadline:
+                raise AssertionError("Frames written by the Host did not reach the Enclave in time.")
+            time.sleep(0.001)
+        return self._enclave_side.qsize()
+
+    def get(self, timeout=None) -> bytes:
+        return self._enclave_side.get(timeout)
+
+    def put(self, frame: bytes):
+        # Sent from the Host's end, so it reaches the Enclave like any other frame.
+        self._host_side.put(frame)
+
+
+class _ChannelPairs:
+    """
+    Builds established channel pairs over ChannelQueues or over loopback
+    StreamTransport connections served by an event loop on its own thread.
+    """
+    def __init__(self, backend: str):
+        self.backend = backend
+        self._loop = None
+        self._thread = None
+        self._servers = []
+        self._channels = []
+
+    def _run(self, coro):
+        if self._loop is None:
+            self._loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(target=self._loop.run_forever, name="ChannelPairLoop", daemon=True)
+            self._thread.start()
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result(5)
+
+    async def _connect(self):
+        accepted = asyncio.get_running_loop().create_future()
+
+        async def on_connect(transport):
+            accepted.set_result(transport)
+
+        server = await start_frame_server(0, on_connect, use_vsock=False)
+        enclave_side = await open_frame_connection(server.sockets[0].getsockname()[1], use_vsock=False)
+        return server, await accepted, enclave_side
+
+    def __call__(self, host_options=None, enclave_options=None) -> ChannelPair:
+        """
+        Returns an established pair. Both ends share a Fernet key and a one
+        second handshake timeout; the options are passed to SecureChannel.
+        """
+        key = Fernet.generate_key()
+        host_options = {"key": key, "handshake_timeout": 1, **(host_options or {})}
+        enclave_options = {"key": key, "handshake_timeout": 1, "role": ROLE_RESPONDER, **(enclave_options or {})}
+        if self.backend == "queue":
+            to_enclave, to_host = ChannelQueue(), ChannelQueue()
+            host = SecureChannel(to_host, to_enclave, **host_options)
+            enclave = SecureChannel(to_enclave, to_host, **enclave_options)
+            wire = to_enclave
+        else:
+            server, host_side, enclave_side = self._run(self._connect())
+            self._servers.append(server)
+            host = SecureChannel.over_stream(host_side, **host_options)
+            enclave = SecureChannel.over_stream(enclave_side, **enclave_options)
+            wire = _StreamWire(self._loop, host_side, enclave_side)
+        self._channels += [host, enclave]
+        responder = threading.Thread(target=enclave.establish)
+        responder.start()
+        host.establish()
+        responder.join(timeout=2)
+        return ChannelPair(host, enclave, wire)
+
+    def close(self):
+        for channel in self._channels:
+            channel.close()
+        if self._loop is None:
+            return
+        for server in self._servers:
+            self._loop.call_soon_threadsafe(server.close)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=2)
+        self._loop.close()
+
+
+@pytest.fixture(params=["queue", "stream"])
+def channel_pair(request):
+    """
+    Factory for established channel pairs, run once over ChannelQueues and
+    once over StreamTransport connections.
+    """
+    pairs = _ChannelPairs(request.param)
+    yield pairs
+    pairs.close()
+
+
+@pytest.fixture
+def queue_channel_pair():
+    """`channel_pair` over ChannelQueues only, for tests that drive the channels from their own event loop."""
+    pairs = _ChannelPairs("queue")
+    yield pairs
+    pairs.close()
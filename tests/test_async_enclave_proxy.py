@@ -0,0 +1,205 @@
+import asyncio
+import time
+
+import pytest
+
+from signal_assistant.host.channel_backend import ChannelQueue
+from signal_assistant.host.envelope import Envelope
+from signal_assistant.host.proxy import AsyncEnclaveProxy
+from signal_assistant.host.stream_transport import open_frame_connection, start_frame_server
+from signal_assistant.host.transport import SecureChannel
+from signal_assistant_enclave.serialization import CommandSerializer
+
+
+class AsyncEchoEnclave:
+    """
+    Event-loop peer answering '<COMMAND> done'; SLOW_COMMAND waits 0.3 s, NO_REPLY never answers.
+    """
+    def __init__(self, channel: SecureChannel, multiplexed: bool = True):
+        self.channel = channel
+        self.multiplexed = multiplexed
+        self.task = None
+
+    def start(self):
+        self.task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        self.task.cancel()
+        try:
+            await self.task
+        except asyncio.CancelledError:
+            pass
+
+    async def _run(self):
+        while True:
+            data = await self.channel._receive_message_async(0.05)
+            if data is None:
+                continue
+            if self.multiplexed:
+                envelope = Envelope.unpack(data)
+                asyncio.get_running_loop().create_task(self._answer(envelope.request_id, envelope.body))
+            else:
+                await self._answer(None, data)
+
+    async def _answer(self, request_id, body):
+        command, _ = CommandSerializer.deserialize(body)
+        if command == "NO_REPLY":
+            return
+        if command == "SLOW_COMMAND":
+            await asyncio.sleep(0.3)
+        response = f"{command} done".encode()
+        if request_id is not None:
+            response = Envelope(request_id, response).pack()
+        await self.channel.send_async(response)
+
+
+async def _pair(multiplexed=True, response_timeout=2):
+    host_to_enclave, enclave_to_host = ChannelQueue(), ChannelQueue()
+    host_channel = SecureChannel(enclave_to_host, host_to_enclave)
+    enclave_channel = SecureChannel(host_to_enclave, enclave_to_host)
+    enclave_channel.fernet = host_channel.fernet
+    proxy = AsyncEnclaveProxy(host_channel, multiplexed=multiplexed, response_timeout=response_timeout)
+    enclave = AsyncEchoEnclave(enclave_channel, multiplexed=multiplexed)
+    enclave.start()
+    return proxy, enclave
+
+
+def test_thousand_concurrent_commands_on_one_loop():
+    async def scenario():
+        proxy, enclave = await _pair()
+        commands = [f"COMMAND_{i}" for i in range(1000)]
+        responses = await asyncio.gather(*(proxy.send_command(c, {}) for c in commands))
+        assert responses == [f"{c} done".encode() for c in commands]
+        assert proxy.in_flight == 0
+        await proxy.close()
+        await enclave.stop()
+
+    asyncio.run(scenario())
+
+
+def test_fast_commands_overtake_slow_one():
+    async def scenario():
+        proxy, enclave = await _pair()
+        slow = asyncio.ensure_future(proxy.send_command("SLOW_COMMAND", {}))
+        await asyncio.sleep(0.02)
+        assert await proxy.send_command("GET_STATUS", {}) == b"GET_STATUS done"
+        assert not slow.done()
+        assert await slow == b"SLOW_COMMAND done"
+        await proxy.close()
+        await enclave.stop()
+
+    asyncio.run(scenario())
+
+
+def test_deadline_expiry_releases_slot():
+    async def scenario():
+        proxy, enclave = await _pair()
+        start = time.monotonic()
+        assert await proxy.send_command("NO_REPLY", {}, deadline=time.monotonic() + 0.1) is None
+        assert time.monotonic() - start < 0.5
+        assert proxy.in_flight == 0
+        await proxy.close()
+        await enclave.stop()
+
+    asyncio.run(scenario())
+
+
+def test_cancellation_releases_slot_and_late_response_is_dropped():
+    async def scenario():
+        proxy, enclave = await _pair()
+        task = asyncio.ensure_future(proxy.send_command("SLOW_COMMAND", {}))
+        await asyncio.sleep(0.05)
+        assert proxy.in_flight == 1
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        assert proxy.in_flight == 0
+        await asyncio.sleep(0.4)
+        assert await proxy.send_command("GET_STATUS", {}) == b"GET_STATUS done"
+        await proxy.close()
+        await enclave.stop()
+
+    asyncio.run(scenario())
+
+
+def test_close_fails_pending_commands():
+    async def scenario():
+        proxy, enclave = await _pair()
+        task = asyncio.ensure_future(proxy.send_command("NO_REPLY", {}))
+        await asyncio.sleep(0.05)
+        await proxy.close()
+        assert await task is None
+        await enclave.stop()
+
+    asyncio.run(scenario())
+
+
+def test_legacy_peer_takes_turns():
+    async def scenario():
+        proxy, enclave = await _pair(multiplexed=False)
+        responses = await asyncio.gather(*(proxy.send_command(f"COMMAND_{i}", {}) for i in range(5)))
+        assert responses == [f"COMMAND_{i} done".encode() for i in range(5)]
+        await proxy.close()
+        await enclave.stop()
+
+    asyncio.run(scenario())
+
+
+def test_legacy_peer_late_reply_is_not_handed_to_next_caller():
+    async def scenario():
+        proxy, enclave = await _pair(multiplexed=False)
+        assert await proxy.send_command("SLOW_COMMAND", {}, deadline=time.monotonic() + 0.1) is None
+        # The next command waits for the slow reply to drain before it is sent.
+        assert await proxy.send_command("GET_STATUS", {}) == b"GET_STATUS done"
+        assert proxy.stats.late_responses == 1
+
+        cancelled = asyncio.ensure_future(proxy.send_command("SLOW_COMMAND", {}))
+        await asyncio.sleep(0.05)
+        cancelled.cancel()
+        await asyncio.gather(cancelled, return_exceptions=True)
+        assert await proxy.send_command("COMMAND_2", {}) == b"COMMAND_2 done"
+        assert proxy.stats.late_responses == 1
+        await proxy.close()
+        await enclave.stop()
+
+    asyncio.run(scenario())
+
+
+def test_lost_connection_fails_pending_work_without_spinning():
+    async def scenario():
+        accepted = asyncio.get_running_loop().create_future()
+
+        async def on_connect(transport):
+            accepted.set_result(transport)
+
+        server = await start_frame_server(0, on_connect, use_vsock=False)
+        enclave_side = await open_frame_connection(server.sockets[0].getsockname()[1], use_vsock=False)
+        host_side = await accepted
+        host_channel = SecureChannel.over_stream(host_side)
+        proxy = AsyncEnclaveProxy(host_channel, multiplexed=True, response_timeout=5)
+
+        async def consume_stream():
+            return [chunk async for chunk in proxy.stream_command("STREAM", {})]
+
+        pending = asyncio.ensure_future(proxy.send_command("NO_REPLY", {}))
+        streaming = asyncio.ensure_future(consume_stream())
+        await asyncio.sleep(0.05)
+        start = time.monotonic()
+        await enclave_side.close()
+
+        # Other work on the loop keeps running while the reader gives up.
+        ticks = 0
+        while not pending.done() and time.monotonic() - start < 1:
+            ticks += 1
+            await asyncio.sleep(0.01)
+        assert await pending is None
+        with pytest.raises(ConnectionError):
+            await streaming
+        assert time.monotonic() - start < 1
+        assert ticks > 0
+        assert proxy._reader_task.done()
+        with pytest.raises(ConnectionError):
+            await proxy.send_command("GET_STATUS", {})
+        await proxy.close()
+        server.close()
+
+    asyncio.run(scenario())
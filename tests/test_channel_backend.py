@@ -0,0 +1,130 @@
+import asyncio
+import threading
+import time
+from queue import Empty, Queue
+
+import pytest
+
+from signal_assistant.host.channel_backend import ChannelQueue, channel_backend
+from signal_assistant.host.transport import SecureChannel
+
+
+def test_fifo_order_and_timeout():
+    q = ChannelQueue()
+    for i in range(5):
+        q.put(bytes([i]))
+    assert [q.get(timeout=0) for _ in range(5)] == [bytes([i]) for i in range(5)]
+    start = time.monotonic()
+    with pytest.raises(Empty):
+        q.get(timeout=0.05)
+    assert time.monotonic() - start >= 0.05
+    with pytest.raises(Empty):
+        q.get_nowait()
+
+
+def test_blocked_consumer_is_woken_promptly():
+    q = ChannelQueue()
+    received = []
+
+    def consumer():
+        received.append((q.get(timeout=2), time.monotonic()))
+
+    t = threading.Thread(target=consumer)
+    t.start()
+    time.sleep(0.05)
+    sent_at = time.monotonic()
+    q.put(b"frame")
+    t.join(timeout=2)
+    frame, woke_at = received[0]
+    assert frame == b"frame"
+    assert woke_at - sent_at < 0.01
+
+
+def test_many_producers_and_consumers_deliver_every_item_once():
+    q = ChannelQueue()
+    produced = [f"{p}-{i}".encode() for p in range(4) for i in range(500)]
+    consumed = []
+    lock = threading.Lock()
+
+    def producer(p):
+        for i in range(500):
+            q.put(f"{p}-{i}".encode())
+
+    def consumer():
+        while True:
+            try:
+                item = q.get(timeout=0.2)
+            except Empty:
+                return
+            with lock:
+                consumed.append(item)
+
+    threads = [threading.Thread(target=producer, args=(p,)) for p in range(4)]
+    threads += [threading.Thread(target=consumer) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(timeout=5)
+    assert sorted(consumed) == sorted(produced)
+
+
+def test_get_async_wakes_on_put_from_another_thread():
+    q = ChannelQueue()
+
+    async def scenario():
+        threading.Timer(0.02, q.put, args=(b"from thread",)).start()
+        assert await q.get_async(timeout=1) == b"from thread"
+        with pytest.raises(Empty):
+            await q.get_async(timeout=0.02)
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_async_waiter_does_not_lose_items():
+    q = ChannelQueue()
+
+    async def scenario():
+        waiter = asyncio.ensure_future(q.get_async())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        q.put(b"kept")
+        assert await q.get_async(timeout=1) == b"kept"
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_async_get_on_legacy_types_does_not_lose_items():
+    for make_queue in (Queue, list):
+        backend = channel_backend(make_queue())
+
+        async def scenario():
+            waiter = asyncio.ensure_future(backend.get_async())
+            await asyncio.sleep(0.01)
+            waiter.cancel()
+            backend.put(b"kept")
+            await asyncio.sleep(0.02)
+            assert await backend.get_async(timeout=1) == b"kept"
+            with pytest.raises(Empty):
+                await backend.get_async(timeout=0.02)
+
+        asyncio.run(scenario())
+
+
+def test_secure_channel_over_channel_queue_and_legacy_types():
+    for make_queue in (ChannelQueue, Queue, list):
+        to_enclave, to_host = make_queue(), make_queue()
+        host_channel = SecureChannel(to_host, to_enclave)
+        enclave_channel = SecureChannel(to_enclave, to_host)
+        enclave_channel.fernet = host_channel.fernet
+        host_channel.send(b"hello")
+        assert enclave_channel.receive(timeout=1) == b"hello"
+        assert host_channel.receive(timeout=0.01) is None
+
+
+def test_list_backend_still_shares_the_callers_list():
+    shared = []
+    backend = channel_backend(shared)
+    backend.put(b"a")
+    assert shared == [b"a"]
+    assert backend.get(timeout=0) == b"a"
+    assert shared == []
@@ -0,0 +1,91 @@
+import asyncio
+import time
+
+from cryptography.fernet import Fernet
+
+from signal_assistant.host.channel_crypto import CIPHER_AES_GCM
+from signal_assistant.host.stream_transport import open_frame_connection, start_frame_server
+from signal_assistant.host.transport import FEATURE_BATCH, FEATURE_CREDITS, ROLE_RESPONDER, SecureChannel
+
+
+def _pair(channel_pair, enclave_features=(FEATURE_BATCH,), **host_options):
+    enclave_options = {"features": enclave_features, "ciphers": host_options.get("ciphers", ["fernet"])}
+    return channel_pair({"features": [FEATURE_BATCH], **host_options}, enclave_options)
+
+
+def test_burst_is_packed_into_few_frames_and_split_in_order(channel_pair):
+    host, enclave, to_enclave = _pair(channel_pair, coalesce_window=0.05, ciphers=[CIPHER_AES_GCM])
+    assert host.negotiated_features == {FEATURE_BATCH}
+    for i in range(20):
+        host.send(f"command-{i}".encode())
+    received = [enclave.receive(timeout=1) for _ in range(20)]
+    assert received == [f"command-{i}".encode() for i in range(20)]
+    # The first send goes out alone, the rest of the burst shares one frame.
+    assert host.stats.batch_sizes == {1: 1, 19: 1}
+    assert enclave.stats.frames_received == 2
+    assert enclave.stats.messages_received == 20
+
+
+def test_idle_sends_are_not_delayed(channel_pair):
+    host, enclave, to_enclave = _pair(channel_pair, coalesce_window=0.2)
+    start = time.monotonic()
+    host.send(b"lonely command")
+    assert to_enclave.qsize() == 1
+    assert enclave.receive(timeout=1) == b"lonely command"
+    assert time.monotonic() - start < 0.1
+
+
+def test_size_cap_flushes_without_waiting_for_window(channel_pair):
+    host, enclave, to_enclave = _pair(channel_pair, coalesce_window=10, coalesce_max_messages=4)
+    for i in range(5):
+        host.send(bytes([i]))
+    # One idle send plus one full batch of four, no timer involved.
+    assert to_enclave.qsize() == 2
+    assert [enclave.receive(timeout=1) for _ in range(5)] == [bytes([i]) for i in range(5)]
+
+
+def test_window_timer_flushes_partial_batch(channel_pair):
+    host, enclave, _ = _pair(channel_pair, coalesce_window=0.02)
+    host.send(b"a")
+    host.send(b"b")
+    host.send(b"c")
+    assert [enclave.receive(timeout=1) for _ in range(3)] == [b"a", b"b", b"c"]
+    assert host.stats.batch_sizes == {1: 1, 2: 1}
+
+
+def test_batching_requires_peer_agreement(channel_pair):
+    host, enclave, to_enclave = _pair(channel_pair, enclave_features=(), coalesce_window=0.05)
+    assert host.negotiated_features == frozenset()
+    host.send(b"one")
+    host.send(b"two")
+    assert to_enclave.qsize() == 2
+    assert enclave.receive(timeout=1) == b"one"
+
+
+def test_async_coalescing_over_stream_transport():
+    async def scenario():
+        accepted = asyncio.get_running_loop().create_future()
+
+        async def on_connect(transport):
+            accepted.set_result(transport)
+
+        server = await start_frame_server(0, on_connect, use_vsock=False)
+        enclave_side = await open_frame_connection(server.sockets[0].getsockname()[1], use_vsock=False)
+        key = Fernet.generate_key()
+        features = [FEATURE_BATCH, FEATURE_CREDITS]
+        host = SecureChannel.over_stream(await accepted, key=key, handshake_timeout=1, features=features,
+                                         coalesce_window=0.02, coalesce_max_messages=8)
+        enclave = SecureChannel.over_stream(enclave_side, key=key, role=ROLE_RESPONDER, handshake_timeout=1,
+                                            features=features)
+        await asyncio.gather(host.establish_async(), enclave.establish_async())
+
+        # Idle sends, full batches and the flusher thread's timed flush all share the loop's stream.
+        for i in range(20):
+            await host.send_async(f"command-{i}".encode())
+        received = [await enclave.receive_async(timeout=1) for _ in range(20)]
+        assert received == [f"command-{i}".encode() for i in range(20)]
+        assert host.stats.batch_sizes[8] == 2
+        await enclave_side.close()
+        server.close()
+
+    asyncio.run(scenario())
@@ -0,0 +1,88 @@
+import os
+import zlib
+
+import pytest
+
+from signal_assistant.host.channel_compression import (
+    COMPRESSION_ZLIB,
+    DecompressionError,
+    decompress,
+)
+from signal_assistant.host.channel_crypto import CIPHER_AES_GCM
+from signal_assistant.host.transport import (
+    FEATURE_BATCH,
+    FEATURE_COMPRESS,
+    FRAME_FLAG_COMPRESSED,
+)
+
+
+def _pair(channel_pair, host_features=(FEATURE_COMPRESS,), enclave_features=(FEATURE_COMPRESS,), **host_options):
+    return channel_pair({"ciphers": [CIPHER_AES_GCM], "features": host_features, **host_options},
+                        {"ciphers": [CIPHER_AES_GCM], "features": enclave_features, "compression_codecs": [COMPRESSION_ZLIB]})
+
+
+def test_large_payload_is_compressed_and_restored(channel_pair):
+    host, enclave, to_enclave = _pair(channel_pair)
+    assert host.compression == enclave.compression == COMPRESSION_ZLIB
+    payload = b'{"command": "STORE_ENCRYPTED_DATA", "state": "' + b"turn " * 4000 + b'"}'
+    host.send(payload)
+    frame = to_enclave.get(timeout=1)
+    assert len(frame) < len(payload) // 10
+    to_enclave.put(frame)
+    assert enclave.receive(timeout=1) == payload
+    assert host.stats.frames_compressed == 1
+    assert host.stats.snapshot()["compression_ratio"] > 10
+
+
+def test_small_and_incompressible_frames_are_sent_raw(channel_pair):
+    host, enclave, _ = _pair(channel_pair, compress_threshold=256)
+    host.send(b"GET_STATUS")
+    host.send(os.urandom(4096))
+    assert enclave.receive(timeout=1) == b"GET_STATUS"
+    assert enclave.receive(timeout=1) is not None
+    assert host.stats.frames_compressed == 0
+
+
+def test_batches_are_compressed_as_one_body(channel_pair):
+    host, enclave, _ = _pair(channel_pair, host_features=(FEATURE_BATCH, FEATURE_COMPRESS),
+                             enclave_features=(FEATURE_BATCH, FEATURE_COMPRESS),
+                             coalesce_window=0.05)
+    messages = [f"conversation chunk {i} ".encode() * 50 for i in range(10)]
+    for message in messages:
+        host.send(message)
+    assert [enclave.receive(timeout=1) for _ in messages] == messages
+    assert host.stats.frames_compressed >= 1
+
+
+def test_compression_requires_peer_agreement(channel_pair):
+    host, enclave, to_enclave = _pair(channel_pair, enclave_features=())
+    assert host.compression is None
+    assert host.negotiated_features == frozenset()
+    payload = b"a" * 10000
+    host.send(payload)
+    assert enclave.receive(timeout=1) == payload
+
+
+def test_decompression_bomb_is_rejected(channel_pair):
+    host, enclave, to_enclave = _pair(channel_pair)
+    enclave.max_decompressed_size = 1024 * 1024
+    host.send(b"\x00" * (8 * 1024 * 1024))
+    assert enclave.receive(timeout=1) is None
+    host.send(b"still alive")
+    assert enclave.receive(timeout=1) == b"still alive"
+
+
+def test_decompress_enforces_limit_and_integrity():
+    bomb = zlib.compress(b"\x00" * 100000)
+    with pytest.raises(DecompressionError):
+        decompress(COMPRESSION_ZLIB, bomb, 1000)
+    with pytest.raises(DecompressionError):
+        decompress(COMPRESSION_ZLIB, bomb[:-4], 200000)
+    assert decompress(COMPRESSION_ZLIB, bomb, 100000) == b"\x00" * 100000
+
+
+def test_compressed_flag_without_negotiation_is_dropped(channel_pair):
+    host, enclave, _ = _pair(channel_pair, host_features=(FEATURE_BATCH,), enclave_features=(FEATURE_BATCH, FEATURE_COMPRESS))
+    forged = bytes([FRAME_FLAG_COMPRESSED]) + zlib.compress(b"sneaky")
+    enclave._outbound.put(enclave._encrypt(forged))
+    assert host.receive(timeout=1) is None
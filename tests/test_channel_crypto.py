@@ -0,0 +1,81 @@
+import pytest
+
+from signal_assistant.host.channel_backend import ChannelQueue
+from signal_assistant.host.channel_crypto import (
+    CIPHER_AES_GCM,
+    CIPHER_CHACHA20,
+    CIPHER_FERNET,
+    AeadSession,
+    FrameAuthenticationError,
+)
+from signal_assistant.host.transport import SecureChannel
+
+
+def _negotiate(channel_pair, host_ciphers, enclave_ciphers):
+    return channel_pair({"ciphers": host_ciphers}, {"ciphers": enclave_ciphers})
+
+
+@pytest.mark.parametrize("cipher", [CIPHER_AES_GCM, CIPHER_CHACHA20])
+def test_negotiated_aead_round_trip(channel_pair, cipher):
+    host, enclave, _ = _negotiate(channel_pair, [cipher, CIPHER_FERNET], [CIPHER_AES_GCM, CIPHER_CHACHA20, CIPHER_FERNET])
+    assert host.cipher == enclave.cipher == cipher
+    host.send(b"command")
+    assert enclave.receive(timeout=1) == b"command"
+    enclave.send(b"response")
+    assert host.receive(timeout=1) == b"response"
+
+
+def test_responder_preference_wins(channel_pair):
+    host, enclave, _ = _negotiate(channel_pair, [CIPHER_AES_GCM, CIPHER_CHACHA20], [CIPHER_CHACHA20, CIPHER_AES_GCM])
+    assert host.cipher == enclave.cipher == CIPHER_CHACHA20
+
+
+def test_fernet_only_peer_keeps_fernet(channel_pair):
+    host, enclave, _ = _negotiate(channel_pair, [CIPHER_AES_GCM, CIPHER_FERNET], [CIPHER_FERNET])
+    assert host.cipher == CIPHER_FERNET
+    host.send(b"still works")
+    assert enclave.receive(timeout=1) == b"still works"
+
+
+def test_silent_legacy_peer_falls_back_to_fernet():
+    to_enclave, to_host = ChannelQueue(), ChannelQueue()
+    host = SecureChannel(to_host, to_enclave, ciphers=[CIPHER_AES_GCM, CIPHER_FERNET], handshake_timeout=0.05)
+    assert host.establish()
+    assert host.cipher == CIPHER_FERNET
+
+
+def test_aead_frames_are_smaller_than_fernet_tokens(channel_pair):
+    host, _, to_enclave = _negotiate(channel_pair, [CIPHER_AES_GCM], [CIPHER_AES_GCM])
+    payload = b"x" * 4096
+    host.send(payload)
+    aead_frame = to_enclave.get(timeout=1)
+    fernet_token = host.fernet.encrypt(payload)
+    assert len(aead_frame) == AeadSession.HEADER.size + len(payload) + 16
+    assert len(aead_frame) < len(fernet_token) * 0.8
+
+
+def test_tampered_and_replayed_frames_are_rejected(channel_pair):
+    host, enclave, to_enclave = _negotiate(channel_pair, [CIPHER_AES_GCM], [CIPHER_AES_GCM])
+    host.send(b"original")
+    frame = to_enclave.get(timeout=1)
+
+    tampered = bytearray(frame)
+    tampered[-1] ^= 0x01
+    to_enclave.put(bytes(tampered))
+    assert enclave.receive(timeout=1) is None
+
+    to_enclave.put(frame)
+    assert enclave.receive(timeout=1) == b"original"
+    to_enclave.put(frame)
+    assert enclave.receive(timeout=1) is None
+
+
+def test_out_of_order_frames_within_window_are_accepted():
+    session_keys = (b"k" * 32, b"k" * 32)
+    sender = AeadSession(CIPHER_AES_GCM, *session_keys)
+    receiver = AeadSession(CIPHER_AES_GCM, *session_keys)
+    frames = [sender.encrypt(bytes([i])) for i in range(5)]
+    for i in (1, 0, 4, 2, 3):
+        assert receiver.decrypt(frames[i]) == bytes([i])
+    with pytest.raises(FrameAuthenticationError):
+        receiver.decrypt(frames[2])
@@ -0,0 +1,144 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from cryptography.fernet import Fernet
+
+from signal_assistant.host.stream_transport import open_frame_connection, start_frame_server
+from signal_assistant.host.transport import (
+    FEATURE_BATCH,
+    FEATURE_CREDITS,
+    ROLE_RESPONDER,
+    ChannelBackpressureError,
+    SecureChannel,
+)
+
+
+def _pair(channel_pair, enclave_features=(FEATURE_CREDITS,), enclave_window=4, host_features=(FEATURE_CREDITS,),
+          **host_options):
+    return channel_pair({"features": host_features, **host_options},
+                        {"features": enclave_features, "receive_window": enclave_window})
+
+
+def test_sender_stops_at_peer_window(channel_pair):
+    host, _, to_enclave = _pair(channel_pair, credit_timeout=0.05)
+    for i in range(4):
+        host.send(bytes([i]))
+    with pytest.raises(ChannelBackpressureError):
+        host.send(b"one too many")
+    assert to_enclave.qsize() == 4
+    snapshot = host.stats.snapshot()
+    assert snapshot["outstanding_frames"] == 4
+    assert snapshot["credit_starvations"] == 1
+
+
+def test_consumption_grants_credit_and_unblocks_sender(channel_pair):
+    host, enclave, _ = _pair(channel_pair, credit_timeout=2)
+    for i in range(4):
+        host.send(bytes([i]))
+    sent = threading.Event()
+
+    def blocked_send():
+        host.send(b"after grant")
+        sent.set()
+
+    sender = threading.Thread(target=blocked_send)
+    sender.start()
+    assert not sent.wait(0.05)
+    # Half the window consumed: the enclave grants two frames back.
+    assert [enclave.receive(timeout=1), enclave.receive(timeout=1)] == [b"\x00", b"\x01"]
+    # The host only learns about the grant by reading its inbound side.
+    assert host.receive(timeout=0.2) is None
+    assert sent.wait(1)
+    sender.join()
+    assert [enclave.receive(timeout=1) for _ in range(3)] == [b"\x02", b"\x03", b"after grant"]
+    assert host.stats.peak_outstanding_frames == 4
+
+
+def test_control_frames_are_invisible_to_receivers(channel_pair):
+    host, enclave, _ = _pair(channel_pair, enclave_window=2)
+    host.send(b"request")
+    assert enclave.receive(timeout=1) == b"request"
+    enclave.send(b"response")
+    # The credit grant is queued ahead of the response and skipped.
+    assert host.receive(timeout=1) == b"response"
+    assert host.stats.outstanding_frames == 0
+
+
+def test_async_sender_awaits_credit(queue_channel_pair):
+    host, enclave, _ = _pair(queue_channel_pair, enclave_window=2, credit_timeout=2)
+
+    async def scenario():
+        await host.send_async(b"a")
+        await host.send_async(b"b")
+        blocked = asyncio.ensure_future(host.send_async(b"c"))
+        await asyncio.sleep(0.05)
+        assert not blocked.done()
+        await asyncio.to_thread(lambda: [enclave.receive(timeout=1) for _ in range(2)])
+        assert await host.receive_async(timeout=0.2) is None
+        await asyncio.wait_for(blocked, 1)
+
+    asyncio.run(scenario())
+    assert enclave.receive(timeout=1) == b"c"
+
+
+def test_coalesced_batch_survives_backpressure(channel_pair):
+    both = (FEATURE_BATCH, FEATURE_CREDITS)
+    host, enclave, to_enclave = _pair(channel_pair, enclave_features=both, enclave_window=1, host_features=both,
+                                      credit_timeout=0.2, coalesce_window=0.05)
+    host.send(b"a")
+    host.send(b"b")
+    host.send(b"c")
+    time.sleep(0.1)
+    # Window used up by "a": the flusher waits for credit without holding up new senders.
+    started = time.monotonic()
+    host.send(b"d")
+    assert time.monotonic() - started < 0.05
+    time.sleep(0.25)
+    with pytest.raises(ChannelBackpressureError):
+        host.send(b"rejected")
+    assert to_enclave.qsize() == 1
+    # Once credit comes back, the pending batch goes out instead of being dropped.
+    assert enclave.receive(timeout=1) == b"a"
+    assert host.receive(timeout=0.2) is None
+    assert [enclave.receive(timeout=1) for _ in range(3)] == [b"b", b"c", b"d"]
+
+
+def test_flow_control_requires_peer_agreement(channel_pair):
+    host, _, to_enclave = _pair(channel_pair, enclave_features=(), credit_timeout=0.05)
+    for i in range(100):
+        host.send(bytes([i % 256]))
+    assert to_enclave.qsize() == 100
+
+
+def test_async_credit_flow_over_stream_transport():
+    async def scenario():
+        accepted = asyncio.get_running_loop().create_future()
+
+        async def on_connect(transport):
+            accepted.set_result(transport)
+
+        server = await start_frame_server(0, on_connect, use_vsock=False)
+        enclave_side = await open_frame_connection(server.sockets[0].getsockname()[1], use_vsock=False)
+        key = Fernet.generate_key()
+        host = SecureChannel.over_stream(await accepted, key=key, handshake_timeout=1, features=[FEATURE_CREDITS],
+                                         credit_timeout=2)
+        enclave = SecureChannel.over_stream(enclave_side, key=key, role=ROLE_RESPONDER, handshake_timeout=1,
+                                            features=[FEATURE_CREDITS], receive_window=2)
+        await asyncio.gather(host.establish_async(), enclave.establish_async())
+
+        await host.send_async(b"a")
+        await host.send_async(b"b")
+        blocked = asyncio.ensure_future(host.send_async(b"c"))
+        await asyncio.sleep(0.05)
+        assert not blocked.done()
+        # Consuming half the window sends a grant from the loop thread.
+        assert [await enclave.receive_async(timeout=1) for _ in range(2)] == [b"a", b"b"]
+        assert await host.receive_async(timeout=0.2) is None
+        await asyncio.wait_for(blocked, 1)
+        assert await enclave.receive_async(timeout=1) == b"c"
+        await enclave_side.close()
+        server.close()
+
+    asyncio.run(scenario())
@@ -0,0 +1,85 @@
+import pytest
+
+from signal_assistant.host.channel_crypto import (
+    CIPHER_AES_GCM,
+    CIPHER_CHACHA20,
+    MAX_EPOCH_SKIP,
+    AeadSession,
+    FrameAuthenticationError,
+)
+from signal_assistant.host.transport import FEATURE_REKEY
+
+
+def _sessions(clock, **sender_options):
+    send_key, receive_key = b"s" * 32, b"r" * 32
+    sender = AeadSession(CIPHER_CHACHA20, send_key, receive_key, epochs=True, clock=clock, **sender_options)
+    receiver = AeadSession(CIPHER_CHACHA20, receive_key, send_key, epochs=True, grace_period=5, clock=clock)
+    return sender, receiver
+
+
+def test_channel_rotates_by_frame_count_without_losing_traffic(channel_pair):
+    options = {"ciphers": [CIPHER_AES_GCM], "features": [FEATURE_REKEY]}
+    host, enclave, _ = channel_pair({**options, "rekey_after_frames": 3}, options)
+
+    for i in range(10):
+        host.send(f"command-{i}".encode())
+    assert [enclave.receive(timeout=1) for _ in range(10)] == [f"command-{i}".encode() for i in range(10)]
+    assert host.session.send_epoch == enclave.session.receive_epoch == 3
+
+    enclave.rotate_key()
+    enclave.send(b"after manual rotation")
+    assert host.receive(timeout=1) == b"after manual rotation"
+    assert host.session.receive_epoch == 1
+
+
+def test_rotation_by_elapsed_time(fake_clock):
+    sender, receiver = _sessions(fake_clock, rekey_after_seconds=60)
+    assert receiver.decrypt(sender.encrypt(b"early")) == b"early"
+    fake_clock.now = 61
+    assert receiver.decrypt(sender.encrypt(b"late")) == b"late"
+    assert sender.send_epoch == receiver.receive_epoch == 1
+
+
+def test_in_flight_frames_open_during_grace_window_only(fake_clock):
+    sender, receiver = _sessions(fake_clock)
+    old_frames = [sender.encrypt(b"old-%d" % i) for i in range(2)]
+    sender.rotate_send_key()
+    assert receiver.decrypt(sender.encrypt(b"new")) == b"new"
+    assert receiver.decrypt(old_frames[0]) == b"old-0"
+    fake_clock.now = 6
+    with pytest.raises(FrameAuthenticationError):
+        receiver.decrypt(old_frames[1])
+
+
+def test_replays_are_rejected_per_epoch(fake_clock):
+    sender, receiver = _sessions(fake_clock)
+    first = sender.encrypt(b"epoch 0")
+    sender.rotate_send_key()
+    second = sender.encrypt(b"epoch 1")
+    receiver.decrypt(first)
+    receiver.decrypt(second)
+    for frame in (first, second):
+        with pytest.raises(FrameAuthenticationError):
+            receiver.decrypt(frame)
+
+
+def test_forged_epoch_does_not_move_receiver(fake_clock):
+    sender, receiver = _sessions(fake_clock)
+    frame = bytearray(sender.encrypt(b"payload"))
+    frame[1:5] = (3).to_bytes(4, "big")
+    with pytest.raises(FrameAuthenticationError):
+        receiver.decrypt(bytes(frame))
+    assert receiver.receive_epoch == 0
+    frame[1:5] = (MAX_EPOCH_SKIP + 1).to_bytes(4, "big")
+    with pytest.raises(FrameAuthenticationError):
+        receiver.decrypt(bytes(frame))
+
+
+def test_receiver_catches_up_over_skipped_epochs(fake_clock):
+    sender, receiver = _sessions(fake_clock)
+    for _ in range(4):
+        sender.rotate_send_key()
+    frame = sender.encrypt(b"skipped ahead")
+    assert len(frame) == AeadSession.EPOCH_HEADER.size + len(b"skipped ahead") + 16
+    assert receiver.decrypt(frame) == b"skipped ahead"
+    assert receiver.receive_epoch == 4
@@ -0,0 +1,174 @@
+import asyncio
+import threading
+import time
+
+from signal_assistant.host.channel_backend import ChannelQueue
+from signal_assistant.host.envelope import FLAG_STREAM, Envelope
+from signal_assistant.host.proxy import AsyncEnclaveProxy, EnclaveProxy
+from signal_assistant.host.scheduler import SCHEDULE_STRICT
+from signal_assistant.host.transport import SecureChannel
+from signal_assistant_enclave.serialization import CommandSerializer
+
+
+class DeadlineAwareEnclave:
+    """
+    Answers every command after `work_time` unless its envelope deadline has
+    already passed on arrival, in which case the work is skipped.
+    """
+    def __init__(self, host_to_enclave: ChannelQueue, enclave_to_host: ChannelQueue, work_time: float = 0.2):
+        self.channel = SecureChannel(host_to_enclave, enclave_to_host)
+        self.work_time = work_time
+        self.received = []
+        self.skipped = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join(timeout=2)
+
+    def _run(self):
+        while not self._stop.is_set():
+            data = self.channel._receive_message(0.05)
+            if data is None:
+                continue
+            envelope = Envelope.unpack(data)
+            self.received.append(envelope)
+            if envelope.expired():
+                self.skipped += 1
+                continue
+            threading.Thread(target=self._answer, args=(envelope,), daemon=True).start()
+
+    def _answer(self, envelope: Envelope):
+        command, _ = CommandSerializer.deserialize(envelope.body)
+        time.sleep(self.work_time)
+        self.channel.send(Envelope(envelope.request_id, f"{command} done".encode()).pack())
+
+
+def _pair(**proxy_options):
+    host_to_enclave, enclave_to_host = ChannelQueue(), ChannelQueue()
+    proxy = EnclaveProxy(host_to_enclave, enclave_to_host, multiplexed=True, **proxy_options)
+    enclave = DeadlineAwareEnclave(host_to_enclave, enclave_to_host)
+    enclave.channel.fernet = proxy.secure_channel.fernet
+    enclave.start()
+    return proxy, enclave
+
+
+def test_envelope_carries_wall_clock_deadline():
+    deadline = time.time() + 3
+    envelope = Envelope.unpack(Envelope(9, b"body", flags=FLAG_STREAM, deadline=deadline).pack())
+    assert abs(envelope.deadline - deadline) < 0.001
+    assert envelope.flags == FLAG_STREAM and envelope.body == b"body"
+    assert not envelope.expired()
+    assert envelope.expired(now=deadline + 1)
+
+
+def test_commands_are_stamped_with_the_callers_deadline():
+    proxy, enclave = _pair(response_timeout=2)
+    before = time.time()
+    assert proxy.send_command("GET_STATUS", {}, deadline=time.monotonic() + 1.5) == b"GET_STATUS done"
+    stamped = enclave.received[0].deadline
+    assert before + 1.4 < stamped < time.time() + 1.5
+    proxy.close()
+    enclave.stop()
+
+
+def test_expired_command_is_never_sent():
+    proxy, enclave = _pair()
+    assert proxy.send_command("PROCESS_MESSAGE", {}, deadline=time.monotonic() - 1) is None
+    time.sleep(0.1)
+    assert enclave.received == []
+    assert proxy.stats.expired_before_send == 1
+    proxy.close()
+    enclave.stop()
+
+
+def test_late_response_is_counted_and_discarded():
+    proxy, enclave = _pair()
+    assert proxy.send_command("PROCESS_MESSAGE", {}, deadline=time.monotonic() + 0.05) is None
+    time.sleep(0.4)
+    snapshot = proxy.stats.snapshot()
+    assert snapshot["timed_out"] == 1
+    assert snapshot["late_responses"] == 1
+    assert snapshot["unknown_responses"] == 0
+    assert proxy.in_flight == 0
+    proxy.close()
+    enclave.stop()
+
+
+def test_commands_expiring_in_the_send_queue_are_dropped():
+    proxy, enclave = _pair(scheduling=SCHEDULE_STRICT)
+    proxy.secure_channel.send = _slow(proxy.secure_channel.send, 0.1)
+    futures = [proxy.submit("PROCESS_MESSAGE", {}, deadline=time.monotonic() + 0.15) for _ in range(4)]
+    # Sends finish at ~0.1 s and ~0.2 s; the last two commands expire while waiting their turn.
+    assert futures[2].result(timeout=1) is None
+    assert futures[3].result(timeout=1) is None
+    assert proxy.stats.expired_before_send == 2
+    assert proxy.stats.commands_sent == 2
+    # The second command reached the Enclave already expired, so it skipped the work.
+    time.sleep(0.3)
+    assert enclave.skipped == 1
+    proxy.close()
+    enclave.stop()
+
+
+def test_async_proxy_stamps_deadline_and_counts_late_responses():
+    async def scenario():
+        host_to_enclave, enclave_to_host = ChannelQueue(), ChannelQueue()
+        channel = SecureChannel(enclave_to_host, host_to_enclave)
+        proxy = AsyncEnclaveProxy(channel, multiplexed=True)
+        enclave = DeadlineAwareEnclave(host_to_enclave, enclave_to_host)
+        enclave.channel.fernet = channel.fernet
+        enclave.start()
+        assert await proxy.send_command("PROCESS_MESSAGE", {}, deadline=time.monotonic() + 0.05) is None
+        assert await proxy.send_command("PROCESS_MESSAGE", {}, deadline=time.monotonic() - 1) is None
+        await asyncio.sleep(0.4)
+        assert enclave.received[0].deadline is not None
+        assert len(enclave.received) == 1
+        assert proxy.stats.snapshot()["late_responses"] == 1
+        assert proxy.stats.expired_before_send == 1
+        await proxy.close()
+        enclave.stop()
+
+    asyncio.run(scenario())
+
+
+def test_legacy_proxy_waits_until_the_deadline_and_drops_the_late_reply():
+    host_to_enclave, enclave_to_host = ChannelQueue(), ChannelQueue()
+    proxy = EnclaveProxy(host_to_enclave, enclave_to_host)
+    peer = SecureChannel(host_to_enclave, enclave_to_host)
+    peer.fernet = proxy.secure_channel.fernet
+
+    def answer_in_order(delay):
+        # A non-multiplexed peer: no envelope, replies in arrival order.
+        while True:
+            data = peer._receive_message(2)
+            if data is None:
+                return
+            command, _ = CommandSerializer.deserialize(data)
+            time.sleep(delay if command == "SLOW_COMMAND" else 0)
+            peer.send(f"{command} done".encode())
+
+    threading.Thread(target=answer_in_order, args=(0.2,), daemon=True).start()
+    assert proxy.send_command("PROCESS_MESSAGE", {}, deadline=time.monotonic() - 1) is None
+    start = time.monotonic()
+    assert proxy.send_command("SLOW_COMMAND", {}, deadline=time.monotonic() + 0.05) is None
+    assert time.monotonic() - start < 0.15
+    # The slow reply is drained first, so this caller gets its own answer.
+    assert proxy.send_command("GET_STATUS", {}) == b"GET_STATUS done"
+    snapshot = proxy.stats.snapshot()
+    assert snapshot["timed_out"] == 1
+    assert snapshot["late_responses"] == 1
+    assert snapshot["expired_before_send"] == 1
+    assert snapshot["commands_sent"] == 2
+    proxy.close()
+
+
+def _slow(send, delay):
+    def slow_send(data):
+        time.sleep(delay)
+        send(data)
+    return slow_send
@@ -0,0 +1,120 @@
+import random
+import threading
+import time
+from concurrent.futures import Future
+
+from signal_assistant.host.pool import BALANCE_LEAST_OUTSTANDING, EnclavePool, HedgingPolicy, LatencyTracker
+
+
+class FakeMultiplexedProxy:
+    """Multiplexed stand-in: submit() returns a Future that is never answered unless `answer` is set."""
+    multiplexed = True
+
+    def __init__(self, name, answer=None):
+        self.name = name
+        self.answer = answer
+        self.cancelled = []
+        self.closed = False
+
+    def submit(self, command, payload):
+        if self.closed:
+            raise ConnectionError("EnclaveProxy is closed.")
+        future = Future()
+        if self.answer is not None:
+            future.set_result(self.answer)
+        return future
+
+    def cancel(self, future):
+        self.cancelled.append(future)
+        future.cancel()
+
+
+def _pool(proxies, **policy):
+    policy.setdefault("min_delay", 0.02)
+    # Least-outstanding starts its scan at the first worker, so the first command goes to proxies[0].
+    return EnclavePool(proxies, balancing=BALANCE_LEAST_OUTSTANDING, rng=random.Random(3),
+                       hedging=HedgingPolicy(**policy), response_timeout=2)
+
+
+def test_slow_idempotent_command_is_hedged_and_first_answer_wins(fake_proxy):
+    stuck, fast = fake_proxy("stuck", delay=0.5), fake_proxy("fast")
+    pool = _pool([stuck, fast], max_burst=1)
+    started = time.monotonic()
+    response = pool.send_command("GET_STATUS", {})
+    assert response == b"fast:GET_STATUS"
+    assert time.monotonic() - started < 0.4
+    assert pool.hedge_stats.snapshot()["hedged"] == 1
+    assert pool.hedge_stats.hedge_wins == 1
+    pool.close()
+
+
+def test_non_idempotent_commands_are_never_hedged(fake_proxy):
+    slow, other = fake_proxy("slow", delay=0.1), fake_proxy("other", delay=0.1)
+    pool = _pool([slow, other])
+    pool.send_command("PROCESS_MESSAGE", {})
+    assert len(slow.commands) + len(other.commands) == 1
+    assert pool.hedge_stats.hedged == 0
+
+
+def test_budget_caps_extra_load(fake_proxy):
+    a, b = fake_proxy("a", delay=0.05), fake_proxy("b", delay=0.05)
+    pool = _pool([a, b], budget=0.25, max_burst=2, min_delay=0.01)
+    for _ in range(10):
+        pool.send_command("GET_STATUS", {})
+    # Two saved-up tokens plus one earned every four commands.
+    assert pool.hedge_stats.hedged == 4
+    assert pool.hedge_stats.over_budget == 6
+    pool.close()
+
+
+def test_losing_multiplexed_attempt_is_cancelled_and_not_counted_as_failure():
+    silent, answering = FakeMultiplexedProxy("silent"), FakeMultiplexedProxy("answering")
+    answering.answer = b"ok"
+    pool = _pool([silent, answering], min_delay=0.01)
+    assert pool.send_command("GET_STATUS", {}) == b"ok"
+    assert pool.hedge_stats.hedge_wins == 1
+    assert len(silent.cancelled) == 1
+    assert all(w.healthy and w.outstanding == 0 and w.consecutive_failures == 0 for w in pool.workers)
+
+
+def test_worker_that_cannot_take_the_command_is_released():
+    closed = FakeMultiplexedProxy("closed")
+    closed.closed = True
+    pool = _pool([closed, FakeMultiplexedProxy("spare", answer=b"ok")])
+    assert pool.send_command("GET_STATUS", {}) is None
+    failed = pool.workers[0]
+    assert failed.outstanding == 0 and failed.consecutive_failures == 1
+
+
+def test_failed_hedge_keeps_waiting_for_the_primary():
+    slow, closed = FakeMultiplexedProxy("slow"), FakeMultiplexedProxy("closed")
+    closed.closed = True
+    pool = _pool([slow, closed], min_delay=0.01)
+    slow.submit = lambda command, payload: _answer_later(b"primary", 0.1)
+    assert pool.send_command("GET_STATUS", {}) == b"primary"
+    assert pool.hedge_stats.hedged == 1 and pool.hedge_stats.hedge_wins == 0
+    assert all(w.outstanding == 0 for w in pool.workers)
+    assert pool.workers[1].consecutive_failures == 1
+
+
+def _answer_later(answer, delay):
+    future = Future()
+    threading.Timer(delay, future.set_result, args=(answer,)).start()
+    return future
+
+
+def test_hedge_delay_follows_latency_percentile(fake_proxy):
+    pool = _pool([fake_proxy("a")], min_delay=0.001, min_samples=5)
+    assert pool.hedge_delay() == 0.001
+    for latency in (0.01, 0.02, 0.03, 0.04, 0.5):
+        pool.latencies.record(latency)
+    assert pool.hedge_delay() == 0.5
+
+
+def test_latency_tracker_percentile():
+    tracker = LatencyTracker(window=100)
+    assert tracker.percentile(50) is None
+    for i in range(1, 101):
+        tracker.record(i / 100)
+    assert tracker.percentile(50) == 0.5
+    assert tracker.percentile(99) == 0.99
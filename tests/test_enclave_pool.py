@@ -0,0 +1,106 @@
+import random
+import threading
+
+import pytest
+
+from signal_assistant.host.pool import (
+    BALANCE_LEAST_OUTSTANDING,
+    BALANCE_P2C,
+    EnclavePool,
+    NoHealthyWorkerError,
+)
+
+
+def _run_concurrently(pool, clients, commands_each):
+    def client():
+        for _ in range(commands_each):
+            pool.send_command("PROCESS_MESSAGE", {})
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+
+@pytest.mark.parametrize("balancing", [BALANCE_LEAST_OUTSTANDING, BALANCE_P2C])
+def test_slow_worker_gets_less_traffic(balancing, fake_proxy):
+    fast, slow = fake_proxy("fast", delay=0.005), fake_proxy("slow", delay=0.1)
+    pool = EnclavePool([fast, slow], balancing=balancing, rng=random.Random(7))
+    _run_concurrently(pool, clients=4, commands_each=10)
+    # The slow worker stays busy, so balancing sends most commands to the fast one.
+    assert len(fast.commands) > 3 * len(slow.commands)
+    assert sum(w.outstanding for w in pool.workers) == 0
+
+
+def test_least_outstanding_spreads_ties(fake_proxy):
+    proxies = [fake_proxy(str(i)) for i in range(3)]
+    pool = EnclavePool(proxies, balancing=BALANCE_LEAST_OUTSTANDING)
+    for _ in range(6):
+        pool.send_command("GET_STATUS", {})
+    assert [len(p.commands) for p in proxies] == [2, 2, 2]
+
+
+def test_failing_worker_is_ejected_and_readmitted(fake_proxy):
+    good, bad = fake_proxy("good"), fake_proxy("bad")
+    bad.down = True
+    pool = EnclavePool([good, bad], balancing=BALANCE_LEAST_OUTSTANDING, failure_threshold=2, ejection_period=0)
+    for _ in range(6):
+        pool.send_command("PROCESS_MESSAGE", {})
+    bad_worker = pool.workers[1]
+    assert not bad_worker.healthy and bad_worker.ejections == 1
+    sent_to_bad = len(bad.commands)
+    for _ in range(4):
+        assert pool.send_command("PROCESS_MESSAGE", {}) == b"good:PROCESS_MESSAGE"
+    assert len(bad.commands) == sent_to_bad
+
+    pool.check_health()
+    assert not bad_worker.healthy
+    bad.down = False
+    pool.check_health()
+    assert bad_worker.healthy
+    assert bad.commands[-1] == "GET_STATUS"
+
+
+def test_ejected_worker_waits_out_ejection_period(fake_proxy):
+    proxy = fake_proxy("only")
+    proxy.down = True
+    pool = EnclavePool([proxy], failure_threshold=1, ejection_period=60)
+    assert pool.send_command("PROCESS_MESSAGE", {}) is None
+    proxy.down = False
+    pool.check_health()
+    assert proxy.commands == ["PROCESS_MESSAGE"]
+    with pytest.raises(NoHealthyWorkerError):
+        pool.send_command("PROCESS_MESSAGE", {})
+
+
+def test_health_probe_failures_eject_idle_worker(fake_proxy):
+    proxy = fake_proxy("idle")
+    pool = EnclavePool([proxy], failure_threshold=2)
+    proxy.down = True
+    pool.check_health()
+    pool.check_health()
+    assert pool.snapshot()["enclave-0"]["healthy"] is False
+
+
+def test_eak_is_provisioned_on_every_worker_and_close_propagates(fake_proxy):
+    proxies = [fake_proxy("a"), fake_proxy("b")]
+    pool = EnclavePool(proxies)
+    assert pool.send_eak_to_enclave("eak", True)
+    assert not pool.send_eak_to_enclave("eak", False)
+    pool.close()
+    assert all(p.closed for p in proxies)
+
+
+def test_worker_names_are_not_reused_after_retirement(fake_proxy):
+    first, second, third = fake_proxy("a"), fake_proxy("b"), fake_proxy("c")
+    pool = EnclavePool([first, second])
+    pool.retire_worker("enclave-0", drain_timeout=0).join(timeout=1)
+    added = pool.add_worker(third)
+    assert added.name == "enclave-2"
+    assert sorted(pool.snapshot()) == ["enclave-1", "enclave-2"]
+    pool.retire_worker("enclave-1", drain_timeout=0).join(timeout=1)
+    assert second.closed and not third.closed
+    assert [w.proxy for w in pool.workers] == [third]
+    with pytest.raises(ValueError):
+        pool.add_worker(fake_proxy("d"), name="enclave-2")
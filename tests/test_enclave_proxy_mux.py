@@ -0,0 +1,138 @@
+import threading
+import time
+
+import pytest
+
+from signal_assistant.host.channel_backend import ChannelQueue
+from signal_assistant.host.envelope import Envelope, EnvelopeError
+from signal_assistant.host.proxy import EnclaveProxy
+from signal_assistant.host.transport import SecureChannel
+from signal_assistant_enclave.serialization import CommandSerializer
+
+
+class EchoEnclave:
+    """
+    Minimal multiplexing peer: answers every command with '<COMMAND> done',
+    delaying SLOW_COMMAND so that later requests overtake it.
+    """
+    def __init__(self, host_to_enclave: ChannelQueue, enclave_to_host: ChannelQueue):
+        self.channel = SecureChannel(host_to_enclave, enclave_to_host)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join(timeout=2)
+
+    def _run(self):
+        while not self._stop.is_set():
+            data = self.channel._receive_message(0.05)
+            if data is None:
+                continue
+            envelope = Envelope.unpack(data)
+            threading.Thread(target=self._answer, args=(envelope,), daemon=True).start()
+
+    def _answer(self, envelope: Envelope):
+        command, _ = CommandSerializer.deserialize(envelope.body)
+        if command == "SLOW_COMMAND":
+            time.sleep(0.5)
+        self.channel.send(Envelope(envelope.request_id, f"{command} done".encode()).pack())
+
+
+@pytest.fixture
+def mux_pair():
+    host_to_enclave, enclave_to_host = ChannelQueue(), ChannelQueue()
+    proxy = EnclaveProxy(host_to_enclave, enclave_to_host, multiplexed=True, response_timeout=2)
+    enclave = EchoEnclave(host_to_enclave, enclave_to_host)
+    enclave.channel.fernet = proxy.secure_channel.fernet
+    enclave.start()
+    yield proxy, enclave
+    proxy.close()
+    enclave.stop()
+
+
+def test_envelope_round_trip():
+    packed = Envelope(42, b"body").pack()
+    assert Envelope.unpack(packed) == Envelope(42, b"body")
+    with pytest.raises(EnvelopeError):
+        Envelope.unpack(b"\x01")
+
+
+def test_responses_matched_by_request_id(mux_pair):
+    proxy, _ = mux_pair
+    slow = proxy.submit("SLOW_COMMAND", {})
+    fast = proxy.submit("GET_STATUS", {})
+    assert fast.result(timeout=2) == b"GET_STATUS done"
+    assert not slow.done()
+    assert slow.result(timeout=2) == b"SLOW_COMMAND done"
+
+
+def test_many_commands_in_flight(mux_pair):
+    proxy, _ = mux_pair
+    results = {}
+
+    def worker(i):
+        results[i] = proxy.send_command(f"CMD_{i}", {"index": i})
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(100)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(timeout=5)
+    assert results == {i: f"CMD_{i} done".encode() for i in range(100)}
+    assert proxy.in_flight == 0
+
+
+def test_timeout_frees_pending_slot(mux_pair):
+    proxy, _ = mux_pair
+    proxy.response_timeout = 0.1
+    assert proxy.send_command("SLOW_COMMAND", {}) is None
+    assert proxy.in_flight == 0
+
+
+def test_close_fails_pending_requests(mux_pair):
+    proxy, _ = mux_pair
+    future = proxy.submit("SLOW_COMMAND", {})
+    proxy.close()
+    with pytest.raises(ConnectionError):
+        future.result(timeout=1)
+
+
+class LosableChannel:
+    """Channel stand-in whose transport goes away once `lose()` is called."""
+    def __init__(self):
+        self.sent = []
+        self._lost = threading.Event()
+        self.receive_calls = 0
+
+    def send(self, frame):
+        self.sent.append(frame)
+
+    def _receive_message(self, timeout=None):
+        self.receive_calls += 1
+        if self._lost.wait(timeout):
+            raise ConnectionError("transport closed")
+        return None
+
+    def lose(self):
+        self._lost.set()
+
+
+def test_lost_connection_fails_pending_requests_and_stops_reader():
+    channel = LosableChannel()
+    proxy = EnclaveProxy(secure_channel=channel, multiplexed=True, response_timeout=5)
+    future = proxy.submit("SLOW_COMMAND", {})
+    start = time.monotonic()
+    channel.lose()
+    with pytest.raises(ConnectionError):
+        future.result(timeout=1)
+    assert time.monotonic() - start < 1
+    proxy._reader_thread.join(timeout=1)
+    assert not proxy._reader_thread.is_alive()
+    assert channel.receive_calls == 1
+    with pytest.raises(ConnectionError):
+        proxy.submit("GET_STATUS", {})
+    proxy.close()
@@ -79,3 +79,62 @@ def test_no_false_positives_for_safe_content():
         logging_client.info("user123", "Another safe message.", {"safe_key": "safe_value"})
     except ValueError as e:
         pytest.fail(f"False positive PII detection: {e}")
+
+def test_first_rule_in_check_order_is_reported():
+    # 'response:' appears first in the text, but 'signal_id' is checked first.
+    with pytest.raises(ValueError, match=re.escape("Attempted to log forbidden keyword 'signal_id' in message.")):
+        logging_client.info(None, "Response: for SIGNAL_ID pending")
+    # Keywords are checked before PII patterns.
+    with pytest.raises(ValueError, match=re.escape("Attempted to log forbidden keyword 'prompt:' in metadata.")):
+        logging_client.info(None, "Some message", {"contact": "test@example.com", "note": "Prompt: hi"})
+
+def test_check_loggable_matches_rule_by_rule_scan():
+    from signal_assistant.host.logging_client import FORBIDDEN_KEYWORDS, PII_PATTERNS, check_loggable
+
+    def reference(text):
+        for keyword in FORBIDDEN_KEYWORDS:
+            if keyword in text.lower():
+                return f"Attempted to log forbidden keyword '{keyword}' in message."
+        for pattern_str in PII_PATTERNS:
+            if re.search(pattern_str, text):
+                return f"Attempted to log potential PII pattern '{pattern_str}' in message."
+        return None
+
+    samples = ["plain text", "SignalID here", "ſignalid", "a@b.co", "A@B.CO", "call 555 123 4567", "12345678901",
+               "prompt", "prompt:", "MESSAGE BODY: x", "x@y", "response_len 1024", "id 5551234567 and a@b.io"]
+    for text in samples:
+        try:
+            check_loggable(text, "message")
+            outcome = None
+        except ValueError as e:
+            outcome = str(e)
+        assert outcome == reference(text), text
+
+def test_disabled_levels_are_not_scanned():
+    # DEBUG is below the client's default INFO level, so the record is dropped before any checks run.
+    logging_client.debug(None, "Dropped prompt: never emitted")
+
+def test_nested_metadata_is_checked_leaf_by_leaf():
+    with pytest.raises(ValueError, match=re.escape(f"Attempted to log potential PII pattern '{PII_EMAIL_PATTERN}' in metadata.")):
+        logging_client.info(None, "Some message", {"outer": {"contacts": ["ok", ("test@example.com",)]}})
+    with pytest.raises(ValueError, match=re.escape("Attempted to log forbidden keyword 'signalid' in metadata.")):
+        logging_client.info(None, "Some message", {"SignalId": True})
+    # A phone number stored as an int is still caught; ordinary counters are skipped.
+    with pytest.raises(ValueError, match=re.escape(f"Attempted to log potential PII pattern '{PII_PHONE_PATTERN}' in metadata.")):
+        logging_client.info(None, "Some message", {"n": 5551234567})
+    logging_client.info(None, "Counters.", {"response_len": 123456789, "ok": True, "ratio": 0.5, "none": None})
+
+def test_self_referencing_metadata_terminates():
+    metadata = {"name": "loop"}
+    metadata["self"] = metadata
+    logging_client.info(None, "Cyclic metadata.", metadata)
+
+def test_metadata_verdicts_are_cached():
+    from signal_assistant.host.logging_client import _metadata_verdict
+    _metadata_verdict.cache_clear()
+    for _ in range(10):
+        logging_client.info(None, "Cached shape.", {"worker": "enclave-0", "data_len": 42})
+    info = _metadata_verdict.cache_info()
+    # "worker", "enclave-0" and "data_len" are scanned once; 42 is skipped outright.
+    assert info.misses == 3
+    assert info.hits == 27
@@ -0,0 +1,127 @@
+import io
+import logging
+import threading
+import time
+
+import pytest
+
+from signal_assistant.host.logging_client import (
+    OVERFLOW_BLOCK,
+    OVERFLOW_DROP_OLDEST,
+    LoggingClient,
+    LogPipeline,
+    start_log_pipeline,
+    stop_log_pipeline,
+)
+
+
+class SlowStream(io.StringIO):
+    """A stream whose writes stall until `release` is set, like a blocked stderr pipe."""
+    def __init__(self):
+        super().__init__()
+        self.release = threading.Event()
+        self.writes = 0
+
+    def write(self, s):
+        self.release.wait(5)
+        self.writes += 1
+        return super().write(s)
+
+
+def _logger(name, stream):
+    logger = logging.getLogger(name)
+    logger.handlers = []
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(logging.Formatter("%(levelname)s %(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    return logger
+
+
+def test_slow_stream_does_not_block_callers_and_writes_in_batches():
+    stream = SlowStream()
+    logger = _logger("PipelineBatching", stream)
+    pipeline = LogPipeline(capacity=1000, batch_size=100)
+    pipeline.attach(logger)
+    pipeline.start()
+    for i in range(50):
+        logger.info("record %d", i)  # Would hang for 5 s each if written on this thread.
+    stream.release.set()
+    assert pipeline.flush(timeout=5)
+    pipeline.stop()
+    lines = stream.getvalue().splitlines()
+    assert lines == [f"INFO record {i}" for i in range(50)]
+    assert stream.writes < 50
+    assert pipeline.stats.snapshot()["written"] == 50
+    assert logger.handlers[0].stream is stream
+
+
+def test_drop_oldest_keeps_newest_records():
+    stream = SlowStream()
+    logger = _logger("PipelineDropOldest", stream)
+    pipeline = LogPipeline(capacity=10, overflow=OVERFLOW_DROP_OLDEST, batch_size=1)
+    pipeline.attach(logger)
+    pipeline.start()
+    for i in range(100):
+        logger.info("record %d", i)
+    stream.release.set()
+    pipeline.flush(timeout=5)
+    pipeline.stop()
+    lines = stream.getvalue().splitlines()
+    assert lines[-1] == "INFO record 99"
+    assert pipeline.stats.dropped == 100 - len(lines)
+    assert pipeline.stats.dropped >= 89
+
+
+def test_block_policy_waits_then_counts_drops():
+    stream = SlowStream()
+    logger = _logger("PipelineBlock", stream)
+    pipeline = LogPipeline(capacity=2, overflow=OVERFLOW_BLOCK, batch_size=1, block_timeout=0.05)
+    pipeline.attach(logger)
+    pipeline.start()
+    for i in range(6):
+        logger.info("record %d", i)
+    assert pipeline.stats.dropped >= 1
+    stream.release.set()
+    pipeline.stop()
+    assert pipeline.stats.written + pipeline.stats.dropped == 6
+
+
+def test_block_policy_waits_a_bounded_time_by_default():
+    stream = SlowStream()
+    logger = _logger("PipelineBlockDefault", stream)
+    pipeline = LogPipeline(capacity=1, overflow=OVERFLOW_BLOCK, batch_size=1)
+    pipeline.attach(logger)
+    pipeline.start()
+    started = time.monotonic()
+    for i in range(4):
+        logger.info("record %d", i)
+    assert time.monotonic() - started < 2
+    assert pipeline.stats.dropped >= 1
+    stream.release.set()
+    pipeline.stop()
+
+
+def test_records_put_after_stop_are_counted_as_dropped():
+    pipeline = LogPipeline().start()
+    pipeline.stop()
+    pipeline.put(logging.LogRecord("PipelineStopped", logging.INFO, __file__, 1, "late", None, None))
+    assert pipeline.stats.dropped == 1
+    assert pipeline.stats.enqueued == 0
+
+
+def test_client_checks_run_before_enqueueing():
+    client = LoggingClient("PipelineChecks")
+    pipeline = start_log_pipeline(capacity=10)
+    try:
+        assert client.logger.handlers[0].__class__.__name__ == "_PipelineHandler"
+        with pytest.raises(ValueError):
+            client.info(None, "prompt: should never be queued")
+        assert pipeline.stats.enqueued == 0
+        client.info(None, "Safe line.")
+        assert pipeline.flush(timeout=5)
+        assert pipeline.stats.written == 1
+    finally:
+        stop_log_pipeline()
+    assert client.logger.handlers[0].__class__ is logging.StreamHandler
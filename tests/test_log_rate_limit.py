@@ -0,0 +1,127 @@
+import logging
+import random
+import time
+
+import pytest
+
+from signal_assistant.host.logging_client import (
+    LoggingClient,
+    LogRateLimit,
+    LogRateLimiter,
+    configure_rate_limits,
+    start_log_pipeline,
+    stop_log_pipeline,
+)
+
+
+class Capture(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+@pytest.fixture
+def client():
+    client = LoggingClient("RateLimitTest")
+    capture = Capture()
+    client.logger.handlers = [capture]
+    client.logger.propagate = False
+    client.capture = capture
+    yield client
+    configure_rate_limits(None)
+
+
+def _chatty(client, n):
+    for i in range(n):
+        client.info(None, f"Host EnclaveProxy sending command: {i}")
+
+
+def test_each_call_site_gets_its_own_bucket_and_summary(client, fake_clock):
+    limiter = LogRateLimiter({logging.INFO: LogRateLimit(rate=1, burst=5)}, summary_interval=10, clock=fake_clock)
+    configure_rate_limits(limiter)
+    _chatty(client, 100)
+    client.info(None, "Different line.")
+    messages = [r.getMessage() for r in client.capture.records]
+    assert len([m for m in messages if m.startswith("Host EnclaveProxy")]) == 5
+    assert "Different line." in messages
+    assert limiter.stats.snapshot()["suppressed"] == 95
+
+    fake_clock.now = 11
+    _chatty(client, 1)
+    summaries = [r for r in client.capture.records if r.getMessage() == "Host log rate limit suppressed records."]
+    assert len(summaries) == 1
+    assert summaries[0].metadata["suppressed"] == 95
+    assert summaries[0].metadata["site"].startswith("test_log_rate_limit.py:")
+
+
+def test_refill_and_unlimited_levels(client, fake_clock):
+    configure_rate_limits(LogRateLimiter({logging.INFO: LogRateLimit(rate=2, burst=1)}, clock=fake_clock))
+    _chatty(client, 3)
+    fake_clock.now = 1.0
+    _chatty(client, 3)
+    for _ in range(20):
+        client.error(None, "Errors are never limited here.")
+    messages = [r.getMessage() for r in client.capture.records]
+    assert len([m for m in messages if m.startswith("Host EnclaveProxy")]) == 2
+    assert messages.count("Errors are never limited here.") == 20
+
+
+def test_sampling_keeps_a_fraction(client):
+    configure_rate_limits(LogRateLimiter({logging.INFO: LogRateLimit(sample=0.1)}, rng=random.Random(1)))
+    _chatty(client, 2000)
+    kept = len(client.capture.records)
+    assert 120 < kept < 280
+
+
+def test_violations_raise_even_when_suppressed(client):
+    configure_rate_limits(LogRateLimiter({logging.INFO: LogRateLimit(sample=0.0)}))
+    client.info(None, "Dropped by sampling.")
+    assert client.capture.records == []
+    with pytest.raises(ValueError):
+        client.info(None, "prompt: still rejected")
+
+
+def test_from_level_names():
+    limiter = LogRateLimiter.from_level_names({"info": 20}, {"DEBUG": 0.5}, burst=7)
+    assert limiter.limits[logging.INFO] == LogRateLimit(rate=20, burst=7, sample=1.0)
+    assert limiter.limits[logging.DEBUG] == LogRateLimit(rate=None, burst=7, sample=0.5)
+    with pytest.raises(ValueError):
+        LogRateLimiter.from_level_names({"LOUD": 1}, {})
+
+
+def test_sampling_applies_within_the_burst(client):
+    configure_rate_limits(LogRateLimiter({logging.INFO: LogRateLimit(rate=1, burst=100, sample=0.0)}))
+    _chatty(client, 10)
+    assert client.capture.records == []
+
+
+def _summaries(client):
+    return [r for r in client.capture.records if r.getMessage() == "Host log rate limit suppressed records."]
+
+
+def test_quiet_call_site_is_summarized_by_the_timer(client):
+    configure_rate_limits(LogRateLimiter({logging.INFO: LogRateLimit(rate=1, burst=2)}, summary_interval=0.05))
+    _chatty(client, 10)
+    # Nothing else is logged, yet the summary still arrives.
+    deadline = time.monotonic() + 2
+    while not _summaries(client) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert [r.metadata["suppressed"] for r in _summaries(client)] == [8]
+
+
+def test_pending_summaries_go_through_the_pipeline_at_shutdown(client, fake_clock):
+    configure_rate_limits(LogRateLimiter({logging.INFO: LogRateLimit(rate=1, burst=2)}, clock=fake_clock))
+    pipeline = start_log_pipeline()
+    try:
+        _chatty(client, 10)
+        assert pipeline.flush(timeout=2)
+        assert _summaries(client) == []
+        # The shutdown order main.py uses: remove the limiter, then stop the pipeline.
+        configure_rate_limits(None)
+        assert pipeline.flush(timeout=2)
+        assert [r.metadata["suppressed"] for r in _summaries(client)] == [8]
+    finally:
+        stop_log_pipeline()
@@ -0,0 +1,182 @@
+import json
+from datetime import date, datetime, timezone
+
+import pytest
+
+from signal_assistant.host.logging_client import (
+    LoggingClient,
+    attach_log_store,
+    detach_log_store,
+    start_log_pipeline,
+    stop_log_pipeline,
+)
+from signal_assistant.host.storage.log_store import INDEX_FILE, RECORDS_FILE, LogStore
+
+DAY = 86400.0
+
+
+def _ts(day, hour=12):
+    return datetime(2026, 10, day, hour, tzinfo=timezone.utc).timestamp()
+
+
+@pytest.fixture
+def store(tmp_path, fake_clock):
+    fake_clock.now = _ts(10)
+    store = LogStore(tmp_path / "logs", clock=fake_clock)
+    yield store
+    store.close()
+
+
+def test_records_land_in_day_partitions_with_an_index(store):
+    store.append(_ts(1), "INFO", "HostApp", "Routed command.", internal_user_id="user-a", metadata={"size": 12})
+    store.append(_ts(1, 23), "INFO", "HostApp", "Host started.")
+    store.append(_ts(2, 0), "ERROR", "HostApp", "Routing failed.", internal_user_id="user-b", metadata={"code": 3})
+    assert store.partitions() == [date(2026, 10, 1), date(2026, 10, 2)]
+
+    first = store.partition_path(date(2026, 10, 1))
+    lines = (first / RECORDS_FILE).read_bytes().splitlines()
+    assert len(lines) == 2 and b" " not in lines[0].replace(b"Routed command.", b"")
+    assert (first / INDEX_FILE).read_text() == '"user-a"\t0\n'
+
+
+def test_query_reads_only_the_users_records(store):
+    for i in range(200):
+        store.append(_ts(1 + i % 5, i % 24), "INFO", "HostApp", f"Event {i}.", internal_user_id=f"user-{i % 7}")
+    records = list(store.query("user-3", now=_ts(10)))
+    expected = sorted(range(3, 200, 7), key=lambda i: (i % 5, i))
+    assert [r["message"] for r in records] == [f"Event {i}." for i in expected]
+    assert all(r["internal_user_id"] == "user-3" for r in records)
+    assert store.stats.records_read == len(expected)
+
+    window = list(store.query("user-3", since=_ts(2, 0), until=_ts(3, 0), now=_ts(10)))
+    assert window and all(_ts(2, 0) <= r["timestamp"] < _ts(3, 0) for r in window)
+    assert list(store.query("user-unknown", now=_ts(10))) == []
+
+
+def test_index_picks_up_appends_after_a_query(store):
+    store.append(_ts(1), "INFO", "HostApp", "First.", internal_user_id="user-a")
+    assert len(list(store.query("user-a", now=_ts(2)))) == 1
+    store.append(_ts(1, 13), "INFO", "HostApp", "Second.", internal_user_id="user-a")
+    assert [r["message"] for r in store.query("user-a", now=_ts(2))] == ["First.", "Second."]
+
+
+def test_expiry_drops_whole_partitions(store):
+    for day in (1, 2, 3):
+        store.append(_ts(day), "INFO", "HostApp", "Tick.", internal_user_id="user-a")
+    # 30 days after Oct 2 12:00 the Oct 2 partition's first record would be older than the TTL.
+    dropped = store.expire(now=_ts(2) + 30 * DAY)
+    assert dropped == [date(2026, 10, 1), date(2026, 10, 2)]
+    assert store.partitions() == [date(2026, 10, 3)]
+    assert store.stats.expired_partitions == 2
+
+
+def test_query_never_returns_records_past_the_ttl(store):
+    store.append(_ts(1, 1), "INFO", "HostApp", "Old.", internal_user_id="user-a")
+    store.append(_ts(1, 20), "INFO", "HostApp", "Newer.", internal_user_id="user-a")
+    now = _ts(1, 10) + 30 * DAY
+    assert [r["message"] for r in store.query("user-a", now=now)] == ["Newer."]
+
+
+def test_expiry_runs_once_the_clock_passes_midnight(tmp_path, fake_clock):
+    fake_clock.now = _ts(2)
+    store = LogStore(tmp_path / "logs", retention_days=2, clock=fake_clock)
+    store.append(_ts(1), "INFO", "HostApp", "Tick.", internal_user_id="user-a")
+    store.append(_ts(2), "INFO", "HostApp", "Tick.")
+    fake_clock.now = _ts(3, 13)
+    # No append needed: a query (or any append) after midnight drops the expired day.
+    assert list(store.query("user-a")) == []
+    assert store.partitions() == [date(2026, 10, 2)]
+    assert store.stats.expired_partitions == 1
+    store.close()
+
+
+def test_backdated_records_do_not_recreate_expired_partitions(tmp_path, fake_clock):
+    fake_clock.now = _ts(3, 13)
+    store = LogStore(tmp_path / "logs", retention_days=2, clock=fake_clock)
+    store.append(_ts(3), "INFO", "HostApp", "Tick.")
+    store.append(_ts(1, 23), "INFO", "HostApp", "Late.", internal_user_id="user-a")
+    store.append(_ts(2), "INFO", "HostApp", "Still within the TTL.")
+    assert store.partitions() == [date(2026, 10, 2), date(2026, 10, 3)]
+    assert store.stats.rejected_expired == 1
+    assert store.stats.appended == 2
+    store.close()
+
+
+def test_user_ids_cannot_break_the_index_format(store):
+    awkward = 'user\t"7"\nx'
+    store.append(_ts(1), "INFO", "HostApp", "Odd id.", internal_user_id=awkward)
+    store.append(_ts(1), "INFO", "HostApp", "Plain id.", internal_user_id="user")
+    assert [r["message"] for r in store.query(awkward, now=_ts(2))] == ["Odd id."]
+    assert [r["message"] for r in store.query("user", now=_ts(2))] == ["Plain id."]
+
+
+def test_torn_lines_left_by_a_crash_are_skipped(tmp_path, fake_clock):
+    fake_clock.now = _ts(2)
+    store = LogStore(tmp_path / "logs", clock=fake_clock)
+    store.append(_ts(1), "INFO", "HostApp", "Before the crash.", internal_user_id="user-a")
+    store.close()
+    partition = store.partition_path(date(2026, 10, 1))
+    with open(partition / RECORDS_FILE, "ab") as f:
+        f.write(b'{"t":17')
+    with open(partition / INDEX_FILE, "ab") as f:
+        f.write(b'"user-b"\t4')
+
+    restarted = LogStore(tmp_path / "logs", clock=fake_clock)
+    restarted.append(_ts(1, 13), "INFO", "HostApp", "After the restart.", internal_user_id="user-b")
+    assert [r["message"] for r in restarted.query("user-a")] == ["Before the crash."]
+    assert [r["message"] for r in restarted.query("user-b")] == ["After the restart."]
+    restarted.close()
+
+
+def test_read_only_store_leaves_the_disk_alone(tmp_path, fake_clock):
+    missing = LogStore(tmp_path / "missing", clock=fake_clock, read_only=True)
+    assert list(missing.query("user-a")) == []
+    assert not (tmp_path / "missing").exists()
+
+    fake_clock.now = _ts(1)
+    writer = LogStore(tmp_path / "logs", retention_days=2, clock=fake_clock)
+    writer.append(_ts(1), "INFO", "HostApp", "Tick.", internal_user_id="user-a")
+    writer.close()
+    fake_clock.now = _ts(5)
+    reader = LogStore(tmp_path / "logs", retention_days=2, clock=fake_clock, read_only=True)
+    # Past the TTL, so not returned, but the partition is left for the writer's expiry.
+    assert list(reader.query("user-a")) == []
+    assert reader.partitions() == [date(2026, 10, 1)]
+    with pytest.raises(RuntimeError):
+        reader.append(_ts(5), "INFO", "HostApp", "Tick.")
+    with pytest.raises(RuntimeError):
+        reader.expire()
+
+
+@pytest.mark.parametrize("pipeline", [False, True])
+def test_logging_client_records_are_persisted(tmp_path, pipeline):
+    # Real records carry the wall-clock time, so this store uses the real clock.
+    store = LogStore(tmp_path / "logs")
+    client = LoggingClient("LogStoreTest")
+    client.logger.propagate = False
+    attach_log_store(store)
+    if pipeline:
+        start_log_pipeline()
+    try:
+        client.info("user-42", "Host routed command.", metadata={"response_len": 512})
+        client.info(None, "Host heartbeat.")
+    finally:
+        stop_log_pipeline()
+        detach_log_store()
+
+    records = list(store.query("user-42"))
+    assert len(records) == 1
+    assert records[0]["logger"] == "LogStoreTest"
+    assert records[0]["metadata"] == {"response_len": 512}
+    assert records[0]["message"].endswith("Host routed command.")
+    assert store.stats.appended == 2
+    # Detached: later records stay out of the store.
+    client.info("user-42", "After detach.")
+    assert store.stats.appended == 2
+    store.close()
+
+
+def test_metadata_that_is_not_json_is_stored_as_text(store):
+    store.append(_ts(1), "INFO", "HostApp", "Odd metadata.", internal_user_id="user-a", metadata={"when": date(2026, 10, 1)})
+    line = (store.partition_path(date(2026, 10, 1)) / RECORDS_FILE).read_bytes()
+    assert json.loads(line)["d"] == {"when": "2026-10-01"}
@@ -0,0 +1,100 @@
+import queue
+import time
+
+import pytest
+
+from signal_assistant.host.envelope import Envelope
+from signal_assistant.host.proxy import EnclaveProxy
+from signal_assistant.host.scheduler import (
+    LANE_CONTROL,
+    LANE_DATA,
+    SCHEDULE_STRICT,
+    SCHEDULE_WEIGHTED,
+    LaneScheduler,
+    command_lane,
+)
+from signal_assistant_enclave.serialization import CommandSerializer
+
+
+class SlowChannel:
+    """A channel that takes `send_delay` per frame (e.g. waiting for credit) and answers every command."""
+    def __init__(self, send_delay=0.01):
+        self.send_delay = send_delay
+        self.sent_commands = []
+        self._responses = queue.Queue()
+
+    def send(self, data):
+        time.sleep(self.send_delay)
+        envelope = Envelope.unpack(data)
+        command, _ = CommandSerializer.deserialize(envelope.body)
+        self.sent_commands.append(command)
+        self._responses.put(Envelope(envelope.request_id, f"{command} done".encode()).pack())
+
+    def _receive_message(self, timeout):
+        try:
+            return self._responses.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+def test_command_lanes():
+    assert command_lane("GET_STATUS") == LANE_CONTROL
+    assert command_lane("CHECK_LE_POLICY") == LANE_CONTROL
+    assert command_lane("INBOUND_MESSAGE") == LANE_DATA
+
+
+def test_strict_scheduler_drains_control_first():
+    scheduler = LaneScheduler(SCHEDULE_STRICT)
+    for i in range(3):
+        scheduler.put(LANE_DATA, f"data-{i}")
+    scheduler.put(LANE_CONTROL, "control")
+    assert [scheduler.get(timeout=0) for _ in range(4)] == ["control", "data-0", "data-1", "data-2"]
+    assert scheduler.get(timeout=0) is None
+
+
+def test_weighted_scheduler_interleaves_by_weight():
+    scheduler = LaneScheduler(SCHEDULE_WEIGHTED, {LANE_CONTROL: 2, LANE_DATA: 1})
+    for i in range(4):
+        scheduler.put(LANE_CONTROL, f"c{i}")
+        scheduler.put(LANE_DATA, f"d{i}")
+    order = [scheduler.get(timeout=0) for _ in range(8)]
+    assert order == ["c0", "c1", "d0", "c2", "c3", "d1", "d2", "d3"]
+    assert scheduler.stats.dispatched == {LANE_CONTROL: 4, LANE_DATA: 4}
+
+
+def test_scheduler_rejects_bad_configuration():
+    with pytest.raises(ValueError):
+        LaneScheduler("fifo")
+    with pytest.raises(ValueError):
+        LaneScheduler(SCHEDULE_WEIGHTED, {LANE_CONTROL: 1, LANE_DATA: 0})
+
+
+def test_health_check_overtakes_data_backlog():
+    channel = SlowChannel()
+    proxy = EnclaveProxy(secure_channel=channel, multiplexed=True, scheduling=SCHEDULE_STRICT, response_timeout=2)
+    backlog = [proxy.submit("INBOUND_MESSAGE", {"n": i}) for i in range(30)]
+    started = time.monotonic()
+    status = proxy.submit("GET_STATUS", {})
+    assert status.result(timeout=1) == b"GET_STATUS done"
+    assert time.monotonic() - started < 0.1
+    assert channel.sent_commands.index("GET_STATUS") <= 2
+    assert all(f.result(timeout=2) == b"INBOUND_MESSAGE done" for f in backlog)
+    assert proxy.lane_stats["dispatched"] == {LANE_CONTROL: 1, LANE_DATA: 30}
+    proxy.close()
+
+
+def test_abandoned_queued_commands_are_not_sent():
+    channel = SlowChannel(send_delay=0.05)
+    proxy = EnclaveProxy(secure_channel=channel, multiplexed=True, scheduling=SCHEDULE_STRICT)
+    futures = [proxy.submit("INBOUND_MESSAGE", {"n": i}) for i in range(5)]
+    for future in futures[2:]:
+        proxy.cancel(future)
+    futures[1].result(timeout=1)
+    time.sleep(0.1)
+    assert channel.sent_commands == ["INBOUND_MESSAGE", "INBOUND_MESSAGE"]
+    proxy.close()
+
+
+def test_scheduling_requires_multiplexing():
+    with pytest.raises(ValueError):
+        EnclaveProxy(secure_channel=SlowChannel(), scheduling=SCHEDULE_STRICT)
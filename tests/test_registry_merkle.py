@@ -0,0 +1,155 @@
+import argparse
+import base64
+import hashlib
+import importlib
+import json
+import sys
+import time
+from pathlib import Path
+
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519
+
+from signal_assistant.host.registry import RegistryVerifier
+from signal_assistant.registry_merkle import (
+    build_proof,
+    inclusion_proof,
+    leaf_hash,
+    merkle_root,
+    node_hash,
+    registry_tree_head,
+    root_from_proof,
+    verify_proof,
+)
+
+
+def _reference_root(leaves):
+    # RFC 6962 section 2.1, written recursively.
+    if not leaves:
+        return hashlib.sha256(b"").digest()
+    if len(leaves) == 1:
+        return leaves[0]
+    k = 1
+    while k * 2 < len(leaves):
+        k *= 2
+    return node_hash(_reference_root(leaves[:k]), _reference_root(leaves[k:]))
+
+
+def _measurement(i, status="active"):
+    return {"mrenclave": f"sha256:{i:04x}", "version": f"1.{i}.0", "profile": "PROD", "status": status}
+
+
+@pytest.fixture
+def registry_tool(tmp_path, monkeypatch):
+    monkeypatch.syspath_prepend(str(Path(__file__).parent.parent / "tools"))
+    module = importlib.import_module("registry")
+    monkeypatch.setattr(module, "REGISTRY_PATH", tmp_path / "measurement_registry.json")
+    yield module
+    sys.modules.pop("registry", None)
+
+
+@pytest.fixture
+def keys(tmp_path):
+    private_key = ed25519.Ed25519PrivateKey.generate()
+    key_path, pub_path = tmp_path / "registry.key", tmp_path / "registry.pub"
+    key_path.write_bytes(private_key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8,
+                                                   serialization.NoEncryption()))
+    pub_path.write_bytes(private_key.public_key().public_bytes(serialization.Encoding.PEM,
+                                                               serialization.PublicFormat.SubjectPublicKeyInfo))
+    return key_path, pub_path
+
+
+def test_root_matches_rfc6962_definition():
+    for n in range(0, 33):
+        leaves = [leaf_hash(_measurement(i)) for i in range(n)]
+        assert merkle_root(leaves) == _reference_root(leaves)
+
+
+def test_every_inclusion_proof_verifies():
+    for n in (1, 2, 3, 7, 8, 13):
+        leaves = [leaf_hash(_measurement(i)) for i in range(n)]
+        root = merkle_root(leaves)
+        for index in range(n):
+            proof = inclusion_proof(index, leaves)
+            assert len(proof) <= max(1, (n - 1).bit_length())
+            assert root_from_proof(leaves[index], index, n, proof) == root
+
+
+def test_proof_for_wrong_index_or_size_is_rejected():
+    leaves = [leaf_hash(_measurement(i)) for i in range(6)]
+    root = merkle_root(leaves)
+    proof = inclusion_proof(4, leaves)
+    assert root_from_proof(leaves[4], 5, 6, proof) != root
+    with pytest.raises(ValueError):
+        root_from_proof(leaves[4], 4, 16, proof)
+
+
+def test_cli_sign_prove_and_verify_proof(registry_tool, keys, tmp_path, capsys):
+    key_path, pub_path = keys
+    measurements = [_measurement(i) for i in range(10)] + [_measurement(10, status="revoked")]
+    registry_tool.write_registry_file(registry_tool.REGISTRY_PATH,
+                                      {"schema_version": "1.0", "measurements": measurements, "signatures": []})
+    registry_tool.cmd_sign(argparse.Namespace(key=str(key_path), merkle=True))
+    registry_tool.cmd_verify_signature(argparse.Namespace(key=str(pub_path)))
+
+    proof_path = tmp_path / "proof.json"
+    registry_tool.cmd_prove(argparse.Namespace(mrenclave="sha256:0005", output=str(proof_path)))
+    assert proof_path.stat().st_size < 1024
+    registry_tool.cmd_verify_proof(argparse.Namespace(proof=str(proof_path), key=str(pub_path), mrenclave="sha256:0005",
+                                                      max_age=60))
+    assert "VERIFIED: sha256:0005 is ACTIVE" in capsys.readouterr().out
+
+    registry_tool.cmd_prove(argparse.Namespace(mrenclave="sha256:000a", output=str(proof_path)))
+    with pytest.raises(SystemExit):
+        registry_tool.cmd_verify_proof(argparse.Namespace(proof=str(proof_path), key=str(pub_path), mrenclave=None,
+                                                          max_age=60))
+
+    # Host verification of the full registry accepts the Merkle signature too.
+    verifier = RegistryVerifier(registry_tool.REGISTRY_PATH, pub_path)
+    assert verifier.check("sha256:0003")
+    assert not verifier.check("sha256:000a")
+
+
+def test_tampered_entry_fails_proof(keys):
+    key_path, pub_path = keys
+    private_key = serialization.load_pem_private_key(key_path.read_bytes(), password=None)
+    measurements = [_measurement(i) for i in range(5)]
+    issued_at = int(time.time())
+    signature = {"signature": base64.b64encode(private_key.sign(registry_tree_head(measurements, issued_at))).decode(),
+                 "issued_at": issued_at}
+    proof = build_proof(measurements, 2, signature)
+    public_key = serialization.load_pem_public_key(pub_path.read_bytes())
+    assert verify_proof(proof, public_key)["mrenclave"] == "sha256:0002"
+
+    forged = json.loads(json.dumps(proof))
+    forged["entry"]["status"] = "active"
+    forged["entry"]["version"] = "9.9.9"
+    with pytest.raises(ValueError):
+        verify_proof(forged, public_key)
+
+
+def test_stale_or_undated_proof_is_rejected(keys):
+    key_path, pub_path = keys
+    private_key = serialization.load_pem_private_key(key_path.read_bytes(), password=None)
+    public_key = serialization.load_pem_public_key(pub_path.read_bytes())
+    measurements = [_measurement(i) for i in range(3)]
+    issued_at = 1_700_000_000
+    signature = {"signature": base64.b64encode(private_key.sign(registry_tree_head(measurements, issued_at))).decode(),
+                 "issued_at": issued_at}
+    proof = build_proof(measurements, 1, signature)
+    assert verify_proof(proof, public_key, max_age=3600, now=issued_at + 60)["mrenclave"] == "sha256:0001"
+    with pytest.raises(ValueError, match="signed 7200s ago"):
+        verify_proof(proof, public_key, max_age=3600, now=issued_at + 7200)
+
+    # The issue time is signed: moving it forward breaks the signature.
+    refreshed = dict(proof, issued_at=issued_at + 7200)
+    with pytest.raises(ValueError, match="signature"):
+        verify_proof(refreshed, public_key, max_age=3600, now=issued_at + 7200)
+
+    # Heads signed before issue times existed only pass with the age check turned off.
+    undated = build_proof(measurements, 1, {"signature": base64.b64encode(
+        private_key.sign(registry_tree_head(measurements))).decode()})
+    with pytest.raises(ValueError, match="no issue time"):
+        verify_proof(undated, public_key)
+    assert verify_proof(undated, public_key, max_age=None)["mrenclave"] == "sha256:0001"
@@ -0,0 +1,131 @@
+import argparse
+import importlib
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519
+
+from signal_assistant.host.registry import RegistryVerifier
+
+ROOT = Path(__file__).parent.parent
+
+
+@pytest.fixture
+def tools(tmp_path, monkeypatch):
+    monkeypatch.syspath_prepend(str(ROOT / "tools"))
+    registry = importlib.import_module("registry")
+    store = importlib.import_module("registry_store")
+    registry_path = tmp_path / "measurement_registry.json"
+    registry_path.write_bytes((ROOT / "measurement_registry.json").read_bytes())
+    monkeypatch.setattr(registry, "REGISTRY_PATH", registry_path)
+    yield registry, store
+    sys.modules.pop("registry", None)
+    sys.modules.pop("registry_store", None)
+
+
+def _add_args(store, mrenclave, version="1.1.0", profile="PROD"):
+    return argparse.Namespace(store=store, mrenclave=mrenclave, version=version, commit="def5678", profile=profile,
+                              status="active", name="signal-assistant-enclave", tag=None)
+
+
+def test_import_export_is_byte_identical(tools, tmp_path):
+    registry, _ = tools
+    db = str(tmp_path / "registry.db")
+    original = registry.REGISTRY_PATH.read_bytes()
+    registry.cmd_import(argparse.Namespace(store=db))
+    exported = tmp_path / "exported.json"
+    registry.cmd_export(argparse.Namespace(store=db, output=str(exported)))
+    assert exported.read_bytes() == original
+
+
+def test_canonical_bytes_match_json_form(tools, tmp_path):
+    registry, store_module = tools
+    store = store_module.SqliteRegistryStore(tmp_path / "registry.db")
+    store.import_registry(registry.load_registry())
+    for i in range(20):
+        store.add({"mrenclave": f"sha256:{i}", "version": "2.0.0", "profile": "DEV", "status": "active",
+                   "note": "ünïcode"})
+    assert store.canonical_bytes() == json.dumps(store.measurements(), sort_keys=True).encode("utf-8")
+
+
+def test_store_lookups_and_duplicates(tools, tmp_path):
+    registry, store_module = tools
+    db = str(tmp_path / "registry.db")
+    registry.cmd_import(argparse.Namespace(store=db))
+    registry.cmd_add(_add_args(db, "sha256:new", version="1.1.0", profile="STAGE"))
+    with pytest.raises(SystemExit):
+        registry.cmd_add(_add_args(db, "sha256:new"))
+
+    store = store_module.SqliteRegistryStore(Path(db))
+    assert store.get("sha256:new")["profile"] == "STAGE"
+    assert [m["mrenclave"] for m in store.find(profile="STAGE")] == ["sha256:new"]
+    assert [m["mrenclave"] for m in store.find(version="1.0.0")] == ["sha256:dummy_for_test"]
+    assert store.get("sha256:missing") is None
+
+
+def test_signed_store_exports_a_registry_the_host_accepts(tools, tmp_path):
+    registry, _ = tools
+    private_key = ed25519.Ed25519PrivateKey.generate()
+    key_path, pub_path = tmp_path / "registry.key", tmp_path / "registry.pub"
+    key_path.write_bytes(private_key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8,
+                                                   serialization.NoEncryption()))
+    pub_path.write_bytes(private_key.public_key().public_bytes(serialization.Encoding.PEM,
+                                                               serialization.PublicFormat.SubjectPublicKeyInfo))
+    db = str(tmp_path / "registry.db")
+    registry.cmd_import(argparse.Namespace(store=db))
+    registry.cmd_add(_add_args(db, "sha256:release"))
+    for merkle in (False, True):
+        registry.cmd_sign(argparse.Namespace(store=db, key=str(key_path), merkle=merkle))
+        registry.cmd_verify_signature(argparse.Namespace(store=db, key=str(pub_path)))
+        registry.cmd_export(argparse.Namespace(store=db, output=None))
+        assert RegistryVerifier(registry.REGISTRY_PATH, pub_path).check("sha256:release")
+
+
+def test_json_backend_still_default(tools, capsys):
+    registry, _ = tools
+    registry.cmd_add(_add_args(None, "sha256:json-entry"))
+    with pytest.raises(SystemExit) as exit_info:
+        registry.cmd_verify(argparse.Namespace(mrenclave="sha256:json-entry"))
+    assert exit_info.value.code == 0
+    saved = json.loads(registry.REGISTRY_PATH.read_text())
+    assert saved["measurements"][-1]["mrenclave"] == "sha256:json-entry"
+
+
+def test_registry_file_keeps_its_permissions(tools, tmp_path):
+    registry, store_module = tools
+    os.chmod(registry.REGISTRY_PATH, 0o640)
+    registry.cmd_add(_add_args(None, "sha256:kept-mode"))
+    assert registry.REGISTRY_PATH.stat().st_mode & 0o777 == 0o640
+
+    fresh = tmp_path / "fresh.json"
+    store_module.write_registry_file(fresh, registry.load_registry())
+    assert fresh.stat().st_mode & 0o777 == 0o644
+
+
+def test_import_reports_duplicate_measurements(tools, tmp_path, capsys):
+    registry, store_module = tools
+    saved = json.loads(registry.REGISTRY_PATH.read_text())
+    saved["measurements"].append(dict(saved["measurements"][0]))
+    registry.REGISTRY_PATH.write_text(json.dumps(saved))
+    db = tmp_path / "registry.db"
+    with pytest.raises(SystemExit) as exit_info:
+        registry.cmd_import(argparse.Namespace(store=str(db)))
+    assert exit_info.value.code == 1
+    assert "appears more than once" in capsys.readouterr().err
+    store = store_module.SqliteRegistryStore(db)
+    assert len(store) == 0
+    store.close()
+
+
+@pytest.mark.parametrize("tool", ["registry.py", "verify_enclave.py"])
+def test_tools_run_directly_from_any_directory(tool, tmp_path):
+    env = {k: v for k, v in os.environ.items() if k != "PYTHONPATH"}
+    result = subprocess.run([sys.executable, str(ROOT / "tools" / tool), "--help"], cwd=tmp_path, env=env,
+                            capture_output=True, text=True, timeout=30)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.startswith("usage:")
@@ -0,0 +1,175 @@
+import asyncio
+import base64
+import json
+import os
+import threading
+import time
+
+import pytest
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519
+
+from signal_assistant.host.pool import EnclavePool
+from signal_assistant.host.proxy import EnclaveProxy
+from signal_assistant.host.registry import RegistryVerifier, RegistryWatcher
+from signal_assistant.host.stream_transport import open_frame_connection, start_frame_server
+from signal_assistant.host.transport import SecureChannel
+
+
+def _write_registry(path, private_key, measurements):
+    data = json.dumps(measurements, sort_keys=True).encode("utf-8")
+    signature = base64.b64encode(private_key.sign(data)).decode()
+    registry = {"schema_version": "1.0", "measurements": measurements,
+                "signatures": [{"signature": signature, "algorithm": "ed25519"}]}
+    path.write_text(json.dumps(registry, indent=2) + "\n")
+
+
+def _measurement(mrenclave, status="active", version="1.0.0"):
+    return {"name": "signal-assistant-enclave", "mrenclave": mrenclave, "version": version, "status": status}
+
+
+def _verifier(tmp_path, measurements):
+    private_key = ed25519.Ed25519PrivateKey.generate()
+    pub_key_path = tmp_path / "registry.pub"
+    pub_key_path.write_bytes(private_key.public_key().public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo))
+    registry_path = tmp_path / "measurement_registry.json"
+    _write_registry(registry_path, private_key, measurements)
+    return RegistryVerifier(registry_path, pub_key_path), private_key
+
+
+def test_repeated_checks_verify_the_signature_once(tmp_path):
+    verifier, _ = _verifier(tmp_path, [_measurement("sha256:a"), _measurement("sha256:b", status="revoked")])
+    for _ in range(50):
+        assert verifier.check("sha256:a")
+        assert not verifier.check("sha256:b")
+        assert not verifier.check("sha256:missing")
+    assert verifier.signature_checks == 1
+
+
+def test_changed_registry_is_reverified(tmp_path):
+    verifier, private_key = _verifier(tmp_path, [_measurement("sha256:a")])
+    assert verifier.check("sha256:a")
+    _write_registry(verifier.registry_path, private_key, [_measurement("sha256:a", status="revoked")])
+    assert not verifier.check("sha256:a")
+    assert verifier.signature_checks == 2
+
+
+def test_touched_but_unchanged_registry_skips_signature_check(tmp_path):
+    verifier, _ = _verifier(tmp_path, [_measurement("sha256:a")])
+    assert verifier.check("sha256:a")
+    stat = os.stat(verifier.registry_path)
+    os.utime(verifier.registry_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert verifier.check("sha256:a")
+    assert verifier.signature_checks == 1
+
+
+def test_tampered_registry_fails_and_is_not_cached(tmp_path):
+    verifier, _ = _verifier(tmp_path, [_measurement("sha256:a", status="revoked")])
+    registry = json.loads(verifier.registry_path.read_text())
+    registry["measurements"][0]["status"] = "active"
+    verifier.registry_path.write_text(json.dumps(registry))
+    assert not verifier.check("sha256:a")
+    assert not verifier.check("sha256:a")
+    assert verifier.signature_checks == 2
+
+
+def test_first_duplicate_entry_wins(tmp_path):
+    verifier, _ = _verifier(tmp_path, [_measurement("sha256:a", version="1.0.0"),
+                                       _measurement("sha256:a", status="revoked", version="0.9.0")])
+    assert verifier.load().measurements["sha256:a"]["version"] == "1.0.0"
+    assert verifier.load().status("sha256:a") == "active"
+
+
+def _wait_for(predicate, timeout=3.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return predicate()
+
+
+@pytest.mark.parametrize("use_inotify", [True, False])
+def test_watcher_reports_revocation_without_restart(tmp_path, use_inotify):
+    verifier, private_key = _verifier(tmp_path, [_measurement("sha256:a")])
+    changes = []
+    watcher = RegistryWatcher(verifier, changes.append, poll_interval=0.05, use_inotify=use_inotify)
+    watcher.start()
+    try:
+        _write_registry(verifier.registry_path, private_key, [_measurement("sha256:a", status="revoked")])
+        assert _wait_for(lambda: changes)
+        assert changes[-1].status("sha256:a") == "revoked"
+    finally:
+        watcher.close()
+
+
+def test_watcher_keeps_last_verified_registry_on_bad_write(tmp_path):
+    verifier, _ = _verifier(tmp_path, [_measurement("sha256:a")])
+    changes = []
+    watcher = RegistryWatcher(verifier, changes.append)
+    watcher.current = verifier.load()
+    verifier.registry_path.write_text("{not json")
+    assert watcher.refresh().status("sha256:a") == "active"
+    assert watcher.rejected == 1
+    assert changes == []
+
+
+def test_verifier_checks_against_last_verified_registry_after_bad_write(tmp_path):
+    verifier, _ = _verifier(tmp_path, [_measurement("sha256:a"), _measurement("sha256:b", status="revoked")])
+    watcher = RegistryWatcher(verifier, lambda registry: None)
+    watcher.current = verifier.load()
+    verifier.registry_path.write_text("{not json")
+    watcher.refresh()
+    # A reconnecting Enclave is judged by the registry the watcher still holds.
+    assert verifier.last_verified is watcher.current
+    assert verifier.check("sha256:a")
+    assert not verifier.check("sha256:b")
+
+
+def test_revoked_worker_is_drained_then_closed():
+    class SlowProxy:
+        closed = False
+
+        def send_command(self, command, payload):
+            time.sleep(0.2)
+            return b"ok"
+
+        def close(self):
+            self.closed = True
+
+    proxy = SlowProxy()
+    pool = EnclavePool([proxy])
+    sender = threading.Thread(target=pool.send_command, args=("PROCESS_MESSAGE", {}))
+    sender.start()
+    assert _wait_for(lambda: pool.workers[0].outstanding == 1)
+    drain = pool.retire_worker("enclave-0", drain_timeout=2)
+    assert pool.workers == []
+    assert not proxy.closed
+    drain.join(timeout=2)
+    sender.join(timeout=2)
+    assert proxy.closed
+
+
+def test_retired_stream_worker_closes_its_connection():
+    async def scenario():
+        accepted = asyncio.get_running_loop().create_future()
+
+        async def on_connect(transport):
+            accepted.set_result(transport)
+
+        server = await start_frame_server(0, on_connect, use_vsock=False)
+        enclave_side = await open_frame_connection(server.sockets[0].getsockname()[1], use_vsock=False)
+        host_side = await accepted
+        pool = EnclavePool([EnclaveProxy(secure_channel=SecureChannel.over_stream(host_side))])
+        # Retirement drains and closes on a thread, as it does from the registry watcher.
+        drain = pool.retire_worker("enclave-0", drain_timeout=1)
+        await asyncio.to_thread(drain.join, 3)
+        with pytest.raises(ConnectionError):
+            await enclave_side.receive_frame(2)
+        assert enclave_side.closed and host_side.closed
+        pool.close()
+        server.close()
+
+    asyncio.run(scenario())
@@ -0,0 +1,131 @@
+import asyncio
+import time
+
+import pytest
+
+from signal_assistant.host.channel_backend import ChannelQueue
+from signal_assistant.host.envelope import FLAG_END, FLAG_STREAM, Envelope
+from signal_assistant.host.proxy import AsyncEnclaveProxy
+from signal_assistant.host.transport import SecureChannel
+from signal_assistant_enclave.serialization import CommandSerializer
+
+
+class StreamingEnclave:
+    """
+    Answers GENERATE with `parts` chunks spaced `interval` apart; SHUFFLED sends
+    its chunks out of order; anything else gets one plain (unstreamed) response.
+    """
+    def __init__(self, channel: SecureChannel, parts: int = 4, interval: float = 0.05):
+        self.channel = channel
+        self.parts = parts
+        self.interval = interval
+        self.task = None
+
+    def start(self):
+        self.task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        self.task.cancel()
+        await asyncio.gather(self.task, return_exceptions=True)
+
+    async def _run(self):
+        while True:
+            data = await self.channel._receive_message_async(0.05)
+            if data is None:
+                continue
+            envelope = Envelope.unpack(data)
+            asyncio.get_running_loop().create_task(self._answer(envelope))
+
+    async def _answer(self, request: Envelope):
+        command, _ = CommandSerializer.deserialize(request.body)
+        if command == "GENERATE" and request.streamed:
+            for seq in range(self.parts):
+                await asyncio.sleep(self.interval)
+                flags = FLAG_STREAM | (FLAG_END if seq == self.parts - 1 else 0)
+                await self.channel.send_async(Envelope(request.request_id, f"part-{seq} ".encode(), flags, seq).pack())
+        elif command == "SHUFFLED":
+            for seq in (2, 0, 1):
+                flags = FLAG_STREAM | (FLAG_END if seq == 2 else 0)
+                await self.channel.send_async(Envelope(request.request_id, f"{seq}".encode(), flags, seq).pack())
+        else:
+            await self.channel.send_async(Envelope(request.request_id, f"{command} done".encode()).pack())
+
+
+def _run(scenario, **enclave_options):
+    async def main():
+        host_to_enclave, enclave_to_host = ChannelQueue(), ChannelQueue()
+        host_channel = SecureChannel(enclave_to_host, host_to_enclave)
+        enclave_channel = SecureChannel(host_to_enclave, enclave_to_host)
+        enclave_channel.fernet = host_channel.fernet
+        proxy = AsyncEnclaveProxy(host_channel, multiplexed=True, response_timeout=2)
+        enclave = StreamingEnclave(enclave_channel, **enclave_options)
+        enclave.start()
+        try:
+            await scenario(proxy)
+        finally:
+            await proxy.close()
+            await enclave.stop()
+
+    asyncio.run(main())
+
+
+def test_extended_envelope_round_trip():
+    chunk = Envelope(7, b"partial", FLAG_STREAM, 3)
+    assert Envelope.unpack(chunk.pack()) == chunk
+    assert not chunk.final
+    assert Envelope(7, b"plain").pack()[0] == 1
+    assert Envelope.unpack(Envelope(7, b"plain").pack()).final
+
+
+def test_first_chunk_arrives_before_generation_finishes():
+    async def scenario(proxy):
+        started = time.monotonic()
+        arrivals, chunks = [], []
+        async for chunk in proxy.stream_command("GENERATE", {}):
+            arrivals.append(time.monotonic() - started)
+            chunks.append(chunk)
+        assert chunks == [b"part-0 ", b"part-1 ", b"part-2 ", b"part-3 "]
+        assert arrivals[0] < arrivals[-1] - 0.1
+        assert proxy.in_flight == 0
+
+    _run(scenario)
+
+
+def test_chunks_are_reordered_by_seq():
+    async def scenario(proxy):
+        assert [c async for c in proxy.stream_command("SHUFFLED", {})] == [b"0", b"1", b"2"]
+
+    _run(scenario)
+
+
+def test_unstreamed_answer_is_a_single_chunk():
+    async def scenario(proxy):
+        assert [c async for c in proxy.stream_command("GET_STATUS", {})] == [b"GET_STATUS done"]
+
+    _run(scenario)
+
+
+def test_stopping_early_releases_slot():
+    async def scenario(proxy):
+        stream = proxy.stream_command("GENERATE", {})
+        async for chunk in stream:
+            assert chunk == b"part-0 "
+            break
+        await stream.aclose()
+        assert proxy.in_flight == 0
+        await asyncio.sleep(0.3)
+        assert await proxy.send_command("GET_STATUS", {}) == b"GET_STATUS done"
+
+    _run(scenario)
+
+
+def test_stream_deadline():
+    async def scenario(proxy):
+        chunks = []
+        with pytest.raises(asyncio.TimeoutError):
+            async for chunk in proxy.stream_command("GENERATE", {}, deadline=time.monotonic() + 0.25):
+                chunks.append(chunk)
+        assert chunks == [b"part-0 ", b"part-1 "]
+        assert proxy.in_flight == 0
+
+    _run(scenario, interval=0.1)
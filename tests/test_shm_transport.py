@@ -0,0 +1,147 @@
+import asyncio
+import multiprocessing
+import threading
+import time
+from queue import Empty
+
+import pytest
+from cryptography.fernet import Fernet
+
+from signal_assistant.host.shm_transport import RingFullError, ShmRing, ShmTransport
+from signal_assistant.host.transport import SecureChannel
+
+
+@pytest.fixture
+def shm_pair(tmp_path):
+    prefix = str(tmp_path / "ring")
+    host = ShmTransport.create(prefix, capacity=256, put_timeout=0.2)
+    enclave = ShmTransport.attach(prefix, put_timeout=0.2)
+    yield host, enclave
+    enclave.close()
+    host.close()
+    host.unlink()
+
+
+def test_frames_cross_in_both_directions(shm_pair):
+    host, enclave = shm_pair
+    host.put(b"command")
+    enclave.put(b"response")
+    assert enclave.get(timeout=1) == b"command"
+    assert host.get(timeout=1) == b"response"
+    with pytest.raises(Empty):
+        host.get(timeout=0.01)
+
+
+def test_records_wrap_around_the_ring_end(shm_pair):
+    host, enclave = shm_pair
+    # 60-byte records do not divide the 256-byte ring, so writes straddle the end.
+    for i in range(50):
+        frame = bytes([i]) * 56
+        host.put(frame)
+        assert enclave.get(timeout=1) == frame
+
+
+def test_full_ring_waits_for_consumer_then_times_out(shm_pair):
+    host, enclave = shm_pair
+    for _ in range(4):
+        host.put(b"x" * 56)
+    with pytest.raises(RingFullError):
+        host.put(b"y" * 56)
+    assert enclave.get(timeout=1) == b"x" * 56
+    host.put(b"y" * 56)
+
+
+def test_oversized_frame_rejected(shm_pair):
+    host, _ = shm_pair
+    with pytest.raises(ValueError):
+        host.put(b"z" * 300)
+
+
+def test_largest_frame_fits_an_empty_ring_at_any_position(tmp_path):
+    ring = ShmRing.create(str(tmp_path / "ring"), capacity=1000)
+    assert ring.max_frame == 496
+    for size in (1, 37, 300, 496):
+        # Leave the empty ring's position just past a record of `size` bytes, then write the largest frame.
+        assert ring.try_write(b"a" * size)
+        assert ring.try_read() == b"a" * size
+        assert ring.try_write(b"b" * ring.max_frame)
+        assert ring.try_read() == b"b" * ring.max_frame
+    with pytest.raises(ValueError):
+        ring.try_write(b"c" * 600)
+    ring.close()
+
+
+def test_doorbell_wakes_blocked_consumer(shm_pair):
+    host, enclave = shm_pair
+    received = []
+    reader = threading.Thread(target=lambda: received.append(enclave.get(timeout=2)))
+    reader.start()
+    host.put(b"wake up")
+    reader.join(timeout=2)
+    assert received == [b"wake up"]
+
+
+def test_async_consumer_wakes_on_doorbell(shm_pair):
+    host, enclave = shm_pair
+
+    async def scenario():
+        waiter = asyncio.ensure_future(enclave.get_async(timeout=2))
+        await asyncio.sleep(0.05)
+        await host.put_async(b"async frame")
+        assert await waiter == b"async frame"
+        with pytest.raises(Empty):
+            await enclave.get_async(timeout=0.01)
+
+    asyncio.run(scenario())
+
+
+def test_concurrent_async_consumers_each_get_a_frame(shm_pair):
+    host, enclave = shm_pair
+
+    async def scenario():
+        waiters = [asyncio.ensure_future(enclave.get_async(timeout=2)) for _ in range(3)]
+        await asyncio.sleep(0.05)
+        start = time.monotonic()
+        for i in range(3):
+            await host.put_async(bytes([i]))
+            await asyncio.sleep(0.01)
+        assert sorted(await asyncio.gather(*waiters)) == [b"\x00", b"\x01", b"\x02"]
+        # Woken by the doorbell, not by their timeouts.
+        assert time.monotonic() - start < 1
+        with pytest.raises(Empty):
+            await enclave.get_async(timeout=0.01)
+
+    asyncio.run(scenario())
+
+
+def _enclave_echo(prefix, key, count):
+    transport = ShmTransport.attach(prefix)
+    channel = SecureChannel(transport, transport, key=key)
+    for _ in range(count):
+        channel.send(channel.receive(timeout=5))
+    transport.close()
+
+
+def test_secure_channel_across_processes(tmp_path):
+    prefix = str(tmp_path / "ring")
+    key = Fernet.generate_key()
+    host_transport = ShmTransport.create(prefix, capacity=64 * 1024)
+    host = SecureChannel(host_transport, host_transport, key=key)
+    peer = multiprocessing.get_context("fork").Process(target=_enclave_echo, args=(prefix, key, 20))
+    peer.start()
+    try:
+        for i in range(20):
+            host.send(f"command-{i}".encode())
+            assert host.receive(timeout=5) == f"command-{i}".encode()
+    finally:
+        peer.join(timeout=5)
+        host_transport.close()
+        host_transport.unlink()
+    assert peer.exitcode == 0
+
+
+def test_attach_rejects_foreign_file(tmp_path):
+    path = tmp_path / "not-a-ring"
+    path.write_bytes(b"\x00" * 512)
+    with pytest.raises(ValueError):
+        ShmRing.attach(str(path))
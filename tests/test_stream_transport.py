@@ -0,0 +1,208 @@
+import asyncio
+import threading
+
+import pytest
+
+from signal_assistant.host import stream_transport
+from signal_assistant.host.stream_transport import (
+    FRAME_HEADER,
+    MAX_FRAME_SIZE,
+    FramingError,
+    StreamTransport,
+    open_frame_connection,
+    read_frame,
+    start_frame_server,
+)
+from signal_assistant.host.transport import SecureChannel
+
+
+async def _connected_pair():
+    """Returns (server_side, client_side, server) StreamTransports over loopback TCP."""
+    accepted = asyncio.get_running_loop().create_future()
+
+    async def on_connect(transport: StreamTransport):
+        accepted.set_result(transport)
+
+    server = await start_frame_server(0, on_connect, use_vsock=False)
+    port = server.sockets[0].getsockname()[1]
+    client = await open_frame_connection(port, use_vsock=False)
+    return await accepted, client, server
+
+
+def test_frames_round_trip_over_tcp():
+    async def scenario():
+        host_side, enclave_side, server = await _connected_pair()
+        await host_side.send_frame(b"first")
+        await host_side.send_frame(b"")
+        await host_side.send_frame(b"x" * 100_000)
+        assert await enclave_side.receive_frame(1) == b"first"
+        assert await enclave_side.receive_frame(1) == b""
+        assert await enclave_side.receive_frame(1) == b"x" * 100_000
+        assert await enclave_side.receive_frame(0.05) is None
+        await enclave_side.close()
+        server.close()
+
+    asyncio.run(scenario())
+
+
+def test_secure_channel_async_api_over_stream():
+    async def scenario():
+        host_side, enclave_side, server = await _connected_pair()
+        host_channel = SecureChannel.over_stream(host_side)
+        enclave_channel = SecureChannel.over_stream(enclave_side)
+        enclave_channel.fernet = host_channel.fernet
+
+        await host_channel.send_async(b"command bytes")
+        assert await enclave_channel.receive_async(timeout=1) == b"command bytes"
+        await enclave_channel.send_async(b"response bytes")
+        assert await host_channel.receive_async(timeout=1) == b"response bytes"
+        await host_side.close()
+        server.close()
+
+    asyncio.run(scenario())
+
+
+def test_blocking_send_receive_from_worker_thread():
+    """The original Queue-style send/receive keep working for callers off the loop."""
+    async def scenario():
+        host_side, enclave_side, server = await _connected_pair()
+        host_channel = SecureChannel.over_stream(host_side)
+        enclave_channel = SecureChannel.over_stream(enclave_side)
+        enclave_channel.fernet = host_channel.fernet
+
+        def worker():
+            host_channel.send(b"ping")
+            return host_channel.receive(timeout=2)
+
+        pending = asyncio.get_running_loop().run_in_executor(None, worker)
+        assert await enclave_channel.receive_async(timeout=2) == b"ping"
+        await enclave_channel.send_async(b"pong")
+        assert await pending == b"pong"
+        await host_side.close()
+        server.close()
+
+    asyncio.run(scenario())
+
+
+def test_blocking_get_on_loop_thread_is_rejected():
+    async def scenario():
+        host_side, enclave_side, server = await _connected_pair()
+        with pytest.raises(RuntimeError):
+            host_side.get(timeout=0.1)
+        await host_side.close()
+        server.close()
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_receive_does_not_lose_frames():
+    async def scenario():
+        host_side, enclave_side, server = await _connected_pair()
+        waiting = asyncio.ensure_future(enclave_side.receive_frame())
+        await asyncio.sleep(0.01)
+        waiting.cancel()
+        await host_side.send_frame(b"after cancel")
+        assert await enclave_side.receive_frame(1) == b"after cancel"
+
+        # Frame arrives in the same loop iteration as the cancellation.
+        racing = asyncio.ensure_future(enclave_side.receive_frame())
+        await asyncio.sleep(0)
+        enclave_side._inbound.put_nowait(b"raced")
+        racing.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await racing
+        assert enclave_side.qsize() == 1
+        assert await enclave_side.receive_frame(1) == b"raced"
+        await enclave_side.close()
+        server.close()
+
+    asyncio.run(scenario())
+
+
+def test_oversized_frame_is_rejected():
+    async def scenario():
+        reader = asyncio.StreamReader()
+        reader.feed_data(FRAME_HEADER.pack(MAX_FRAME_SIZE + 1))
+        with pytest.raises(FramingError):
+            await read_frame(reader)
+
+        truncated = asyncio.StreamReader()
+        truncated.feed_data(FRAME_HEADER.pack(10) + b"short")
+        truncated.feed_eof()
+        with pytest.raises(FramingError):
+            await read_frame(truncated)
+
+        clean = asyncio.StreamReader()
+        clean.feed_eof()
+        assert await read_frame(clean) is None
+
+    asyncio.run(scenario())
+
+
+def test_receive_after_peer_closes_raises_connection_error():
+    async def scenario():
+        host_side, enclave_side, server = await _connected_pair()
+        await host_side.send_frame(b"last words")
+        await host_side.close()
+        # Frames sent before the close are still delivered, then the closure is reported.
+        assert await enclave_side.receive_frame(1) == b"last words"
+        with pytest.raises(ConnectionError):
+            await enclave_side.receive_frame(1)
+        with pytest.raises(ConnectionError):
+            await enclave_side.get_async(1)
+        with pytest.raises(ConnectionError):
+            await asyncio.to_thread(enclave_side.get, 1)
+        server.close()
+
+    asyncio.run(scenario())
+
+
+def test_frames_queued_when_the_connection_closes_are_counted_as_lost():
+    async def scenario():
+        host_side, enclave_side, server = await _connected_pair()
+
+        def put_two():
+            enclave_side.put(b"one")
+            enclave_side.put(b"two")
+
+        # Block the loop while another thread queues, so both frames wait in the outbox.
+        thread = threading.Thread(target=put_two)
+        thread.start()
+        thread.join()
+        enclave_side._closed.set()
+        await asyncio.sleep(0.01)
+        assert enclave_side.stats.frames_lost == 2
+        assert enclave_side.stats.frames_sent == 0
+        await enclave_side.close()
+        await host_side.close()
+        server.close()
+
+    asyncio.run(scenario())
+
+
+def test_failed_vsock_connect_falls_back_to_tcp(monkeypatch):
+    async def refused(cid, port):
+        raise ConnectionRefusedError("no vsock peer")
+
+    monkeypatch.setattr(stream_transport, "vsock_available", lambda: True)
+    monkeypatch.setattr(stream_transport, "_vsock_connect", refused)
+
+    async def scenario():
+        accepted = asyncio.get_running_loop().create_future()
+
+        async def on_connect(transport):
+            accepted.set_result(transport)
+
+        server = await start_frame_server(0, on_connect, use_vsock=False)
+        port = server.sockets[0].getsockname()[1]
+        client = await open_frame_connection(port)
+        host_side = await accepted
+        await client.send_frame(b"over tcp")
+        assert await host_side.receive_frame(1) == b"over tcp"
+        with pytest.raises(ConnectionRefusedError):
+            await open_frame_connection(port, use_vsock=True)
+        await client.close()
+        await host_side.close()
+        server.close()
+
+    asyncio.run(scenario())
@@ -0,0 +1,94 @@
+import asyncio
+import importlib
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+
+@pytest.fixture
+def verify_enclave(monkeypatch):
+    monkeypatch.syspath_prepend(str(Path(__file__).parent.parent / "tools"))
+    module = importlib.import_module("verify_enclave")
+    yield module
+    sys.modules.pop("verify_enclave", None)
+
+
+REGISTRY = {"measurements": [
+    {"mrenclave": "sha256:good", "version": "1.0.0", "profile": "PROD", "status": "active"},
+    {"mrenclave": "sha256:old", "version": "0.9.0", "profile": "PROD", "status": "revoked",
+     "revocation_reason": "CVE fix"},
+]}
+
+
+def _fake_fleet(monkeypatch, module, quotes, delay=0.1):
+    def fetch(target, verbose=True):
+        time.sleep(delay)
+        if quotes[target] is None:
+            raise ConnectionError("refused")
+        if quotes[target] == "hang":
+            time.sleep(1)
+        return {"mrenclave": quotes[target]}
+
+    monkeypatch.setattr(module, "get_remote_attestation", fetch)
+
+
+def test_fleet_is_checked_concurrently_with_per_target_verdicts(verify_enclave, monkeypatch):
+    quotes = {f"host-{i}": "sha256:good" for i in range(20)}
+    quotes.update({"stale": "sha256:old", "rogue": "sha256:unknown", "down": None})
+    _fake_fleet(monkeypatch, verify_enclave, quotes)
+    summary = asyncio.run(verify_enclave.verify_fleet(list(quotes), REGISTRY, concurrency=32))
+
+    assert summary["targets"] == 23
+    assert summary["trusted"] == 20
+    assert summary["failed"] == 3
+    # 23 fetches of 0.1 s each in parallel, not 2.3 s back to back.
+    assert summary["elapsed_ms"] < 1000
+    by_target = {r["target"]: r for r in summary["results"]}
+    assert by_target["stale"]["reason"] == "CVE fix"
+    assert "not found" in by_target["rogue"]["reason"]
+    assert "refused" in by_target["down"]["reason"]
+    assert all(r["latency_ms"] >= 100 for r in summary["results"])
+
+
+def test_concurrency_limit_and_timeout(verify_enclave, monkeypatch):
+    quotes = {"a": "sha256:good", "b": "sha256:good", "slow": "hang"}
+    _fake_fleet(monkeypatch, verify_enclave, quotes, delay=0.1)
+    summary = asyncio.run(verify_enclave.verify_fleet(list(quotes), REGISTRY, concurrency=1, timeout=0.3))
+    by_target = {r["target"]: r for r in summary["results"]}
+    assert by_target["a"]["trusted"] and by_target["b"]["trusted"]
+    assert "no attestation quote" in by_target["slow"]["reason"]
+    # One at a time: the two quick targets run back to back.
+    assert summary["elapsed_ms"] >= 200
+
+
+def test_concurrency_is_not_capped_by_the_default_executor(verify_enclave, monkeypatch):
+    in_flight, peak, lock = [0], [0], threading.Lock()
+
+    def fetch(target, verbose=True):
+        with lock:
+            in_flight[0] += 1
+            peak[0] = max(peak[0], in_flight[0])
+        time.sleep(0.2)
+        with lock:
+            in_flight[0] -= 1
+        return {"mrenclave": "sha256:good"}
+
+    monkeypatch.setattr(verify_enclave, "get_remote_attestation", fetch)
+    targets = [f"host-{i}" for i in range(64)]
+    summary = asyncio.run(verify_enclave.verify_fleet(targets, REGISTRY, concurrency=64))
+    assert summary["trusted"] == 64
+    assert peak[0] == 64
+
+
+@pytest.mark.parametrize("concurrency", ["0", "-3"])
+def test_concurrency_below_one_is_rejected(verify_enclave, monkeypatch, capsys, concurrency):
+    monkeypatch.setattr(sys, "argv", ["verify_enclave.py", "--targets", "a", "--concurrency", concurrency])
+    with pytest.raises(SystemExit) as exc:
+        verify_enclave.main()
+    assert exc.value.code == 2
+    assert "--concurrency must be at least 1" in capsys.readouterr().err
+    with pytest.raises(ValueError):
+        asyncio.run(verify_enclave.verify_fleet(["a"], REGISTRY, concurrency=0))
@@ -3,12 +3,23 @@ import argparse
 import json
 import sys
 import datetime
+import time
+from contextlib import closing
 from typing import List, Optional, Dict, Any
 from pathlib import Path
 from cryptography.hazmat.primitives.asymmetric import ed25519
 from cryptography.hazmat.primitives import serialization
 import base64
 
+# Runnable straight from a checkout (`python3 tools/registry.py ...`) as well as from
+# anywhere else: the Merkle helpers live in src/ and registry_store next to this file.
+TOOLS_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(TOOLS_DIR.parent / "src"))
+sys.path.insert(0, str(TOOLS_DIR))
+
+from signal_assistant.registry_merkle import DEFAULT_MAX_PROOF_AGE, MERKLE_SCHEME, build_proof, merkle_root, tree_head_bytes, verify_proof  # noqa: E402
+from registry_store import DuplicateMeasurementError, JsonRegistryStore, SqliteRegistryStore, write_registry_file  # noqa: E402
+
 REGISTRY_PATH = Path(__file__).parent.parent / "measurement_registry.json"
 
 
@@ -29,20 +40,17 @@ def load_registry() -> Dict[str, Any]:
         print(f"Error: Failed to parse registry: {e}", file=sys.stderr)
         sys.exit(1)
 
-def save_registry(registry: Dict[str, Any]):
-    with open(REGISTRY_PATH, "w") as f:
-        json.dump(registry, f, indent=2)
-        f.write("\n") # Add trailing newline
+def open_store(args):
+    """
+    The registry backend: the SQLite store given by --store, else measurement_registry.json.
+    Callers close it when done (`with closing(open_store(args)) as store`).
+    """
+    store_path = getattr(args, "store", None)
+    if store_path:
+        return SqliteRegistryStore(Path(store_path))
+    return JsonRegistryStore(REGISTRY_PATH, load_registry())
 
 def cmd_add(args):
-    registry = load_registry()
-    
-    # Check if mrenclave already exists
-    for m in registry.get("measurements", []):
-        if m["mrenclave"] == args.mrenclave:
-            print(f"Error: Measurement {args.mrenclave} already exists in registry.", file=sys.stderr)
-            sys.exit(1)
-
     tag = args.tag or normalize_tag(args.version)
 
     new_entry = {
@@ -57,34 +65,34 @@ def cmd_add(args):
         "revocation_reason": None
     }
     
-    registry.setdefault("measurements", []).append(new_entry)
-    save_registry(registry)
+    with closing(open_store(args)) as store:
+        try:
+            store.add(new_entry)
+        except DuplicateMeasurementError:
+            print(f"Error: Measurement {args.mrenclave} already exists in registry.", file=sys.stderr)
+            sys.exit(1)
     print(f"Added measurement: {args.mrenclave} ({args.version})")
 
 def cmd_verify(args):
-    registry = load_registry()
-    found = False
-    for m in registry.get("measurements", []):
-        if m["mrenclave"] == args.mrenclave:
-            found = True
-            if m["status"] == "active":
-                print(f"VERIFIED: {args.mrenclave} is ACTIVE (Version: {m['version']}, Profile: {m['profile']})")
-                sys.exit(0)
-            else:
-                print(f"FAILED: {args.mrenclave} is found but status is '{m['status']}'")
-                if m.get("revocation_reason"):
-                    print(f"Reason: {m['revocation_reason']}")
-                sys.exit(1)
+    with closing(open_store(args)) as store:
+        m = store.get(args.mrenclave)
+    if m is not None:
+        if m["status"] == "active":
+            print(f"VERIFIED: {args.mrenclave} is ACTIVE (Version: {m['version']}, Profile: {m['profile']})")
+            sys.exit(0)
+        else:
+            print(f"FAILED: {args.mrenclave} is found but status is '{m['status']}'")
+            if m.get("revocation_reason"):
+                print(f"Reason: {m['revocation_reason']}")
+            sys.exit(1)
     
     print(f"FAILED: {args.mrenclave} not found in registry.")
     sys.exit(1)
 
 def cmd_list(args):
-    registry = load_registry()
-    measurements = registry.get("measurements", [])
-    
-    if args.active_only:
-        measurements = [m for m in measurements if m["status"] == "active"]
+    with closing(open_store(args)) as store:
+        measurements = store.find(version=getattr(args, "version", None), profile=getattr(args, "profile", None),
+                                  status="active" if args.active_only else None)
         
     if not measurements:
         print("No measurements found.")
@@ -121,47 +129,52 @@ def cmd_keygen(args):
         
     print(f"Keys generated in {out_dir}")
 
-def _get_canonical_bytes(registry):
+def _get_canonical_bytes(store, scheme=None, issued_at=None):
+    if scheme == MERKLE_SCHEME:
+        # Merkle mode signs the tree head, so single entries can be proven later
+        leaves = store.leaf_hashes()
+        return tree_head_bytes(merkle_root(leaves), len(leaves), issued_at)
     # Canonicalize measurements for signing
     # Simple approach: serialize the 'measurements' list with sort_keys=True
-    measurements = registry.get("measurements", [])
-    return json.dumps(measurements, sort_keys=True).encode('utf-8')
+    return store.canonical_bytes()
 
 def cmd_sign(args):
-    registry = load_registry()
-    
     with open(args.key, "rb") as f:
         priv_key = serialization.load_pem_private_key(f.read(), password=None)
     
-    data = _get_canonical_bytes(registry)
-    signature = priv_key.sign(data)
-    
-    sig_b64 = base64.b64encode(signature).decode('utf-8')
-    
-    new_sig_entry = {
-        "signature": sig_b64,
-        "algorithm": "ed25519"
-    }
-    
-    # Overwrite signatures for now
-    registry["signatures"] = [new_sig_entry]
-    
-    save_registry(registry)
+    with closing(open_store(args)) as store:
+        scheme = MERKLE_SCHEME if args.merkle else None
+        # Dates the tree head, so proof verifiers can refuse proofs issued before a revocation
+        issued_at = int(time.time()) if scheme else None
+        data = _get_canonical_bytes(store, scheme, issued_at)
+        signature = priv_key.sign(data)
+        
+        sig_b64 = base64.b64encode(signature).decode('utf-8')
+        
+        new_sig_entry = {
+            "signature": sig_b64,
+            "algorithm": "ed25519"
+        }
+        if scheme:
+            new_sig_entry["scheme"] = scheme
+            new_sig_entry["issued_at"] = issued_at
+        
+        # Overwrite signatures for now
+        store.set_signatures([new_sig_entry])
     print("Registry signed.")
 
 def cmd_verify_signature(args):
-    registry = load_registry()
-    if not registry.get("signatures"):
-        print("No signatures found in registry.")
-        sys.exit(1)
-        
-    with open(args.key, "rb") as f:
-        pub_key = serialization.load_pem_public_key(f.read())
-        
-    data = _get_canonical_bytes(registry)
-    
-    # Verify the first signature
-    sig_entry = registry["signatures"][0]
+    with closing(open_store(args)) as store:
+        if not store.signatures:
+            print("No signatures found in registry.")
+            sys.exit(1)
+            
+        with open(args.key, "rb") as f:
+            pub_key = serialization.load_pem_public_key(f.read())
+            
+        # Verify the first signature
+        sig_entry = store.signatures[0]
+        data = _get_canonical_bytes(store, sig_entry.get("scheme"), sig_entry.get("issued_at"))
     sig_bytes = base64.b64decode(sig_entry["signature"])
     
     try:
@@ -171,8 +184,69 @@ def cmd_verify_signature(args):
         print(f"Signature verification FAILED: {e}")
         sys.exit(1)
 
+def cmd_prove(args):
+    with closing(open_store(args)) as store:
+        sig_entry = (store.signatures or [{}])[0]
+        measurements = store.measurements()
+    if sig_entry.get("scheme") != MERKLE_SCHEME:
+        print("Error: Registry is not signed in Merkle mode (run 'sign --merkle').", file=sys.stderr)
+        sys.exit(1)
+
+    index = next((i for i, m in enumerate(measurements) if m["mrenclave"] == args.mrenclave), None)
+    if index is None:
+        print(f"Error: Measurement {args.mrenclave} not found in registry.", file=sys.stderr)
+        sys.exit(1)
+
+    proof = json.dumps(build_proof(measurements, index, sig_entry), indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(proof + "\n")
+        print(f"Proof written to {args.output}")
+    else:
+        print(proof)
+
+def cmd_verify_proof(args):
+    with open(args.key, "rb") as f:
+        pub_key = serialization.load_pem_public_key(f.read())
+    with open(args.proof, "r") as f:
+        proof = json.load(f)
+
+    try:
+        m = verify_proof(proof, pub_key, max_age=args.max_age)
+    except (ValueError, KeyError) as e:
+        print(f"Proof verification FAILED: {e}")
+        sys.exit(1)
+
+    if args.mrenclave and m["mrenclave"] != args.mrenclave:
+        print(f"FAILED: Proof is for {m['mrenclave']}, not {args.mrenclave}")
+        sys.exit(1)
+    if m["status"] != "active":
+        print(f"FAILED: {m['mrenclave']} is proven but status is '{m['status']}'")
+        sys.exit(1)
+    print(f"VERIFIED: {m['mrenclave']} is ACTIVE (Version: {m['version']}, Profile: {m['profile']})")
+
+def cmd_import(args):
+    with closing(SqliteRegistryStore(Path(args.store))) as store:
+        if len(store):
+            print(f"Error: Store {args.store} is not empty.", file=sys.stderr)
+            sys.exit(1)
+        try:
+            store.import_registry(load_registry())
+        except DuplicateMeasurementError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(1)
+        print(f"Imported {len(store)} measurements into {args.store}")
+
+def cmd_export(args):
+    with closing(SqliteRegistryStore(Path(args.store))) as store:
+        registry = store.export_registry()
+    output = Path(args.output) if args.output else REGISTRY_PATH
+    write_registry_file(output, registry)
+    print(f"Exported {len(registry['measurements'])} measurements to {output}")
+
 def main():
     parser = argparse.ArgumentParser(description="Manage the Signal Assistant Enclave Measurement Registry")
+    parser.add_argument("--store", help="Use this SQLite registry store instead of measurement_registry.json")
     subparsers = parser.add_subparsers(dest="command", required=True)
 
     # Add command
@@ -194,6 +268,8 @@ def main():
     # List command
     list_parser = subparsers.add_parser("list", help="List measurements")
     list_parser.add_argument("--all", action="store_false", dest="active_only", help="Show all measurements (including revoked)")
+    list_parser.add_argument("--version", help="Only measurements with this version")
+    list_parser.add_argument("--profile", choices=["DEV", "TEST", "STAGE", "PROD"], help="Only measurements with this profile")
     list_parser.set_defaults(func=cmd_list)
 
     # Keygen command
@@ -204,6 +280,7 @@ def main():
     # Sign command
     sign_parser = subparsers.add_parser("sign", help="Sign the registry")
     sign_parser.add_argument("--key", required=True, help="Path to private key")
+    sign_parser.add_argument("--merkle", action="store_true", help="Sign a Merkle tree head so entries can be proven individually")
     sign_parser.set_defaults(func=cmd_sign)
 
     # Verify Signature command
@@ -211,7 +288,31 @@ def main():
     verify_sig_parser.add_argument("--key", required=True, help="Path to public key")
     verify_sig_parser.set_defaults(func=cmd_verify_signature)
 
+    # Prove command
+    prove_parser = subparsers.add_parser("prove", help="Emit an inclusion proof for one measurement (Merkle mode)")
+    prove_parser.add_argument("mrenclave", help="The MRENCLAVE hash to prove")
+    prove_parser.add_argument("--output", help="Write the proof to this file instead of stdout")
+    prove_parser.set_defaults(func=cmd_prove)
+
+    # Verify Proof command
+    verify_proof_parser = subparsers.add_parser("verify-proof", help="Verify an inclusion proof against the registry key")
+    verify_proof_parser.add_argument("--proof", required=True, help="Path to the proof file")
+    verify_proof_parser.add_argument("--key", required=True, help="Path to public key")
+    verify_proof_parser.add_argument("--mrenclave", help="Also require the proof to be for this MRENCLAVE")
+    verify_proof_parser.add_argument("--max-age", type=float, default=DEFAULT_MAX_PROOF_AGE,
+                                     help="Reject proofs whose tree head was signed more than this many seconds ago")
+    verify_proof_parser.set_defaults(func=cmd_verify_proof)
+
+    # Import / Export commands (SQLite store <-> measurement_registry.json)
+    import_parser = subparsers.add_parser("import", help="Load measurement_registry.json into an empty --store")
+    import_parser.set_defaults(func=cmd_import)
+    export_parser = subparsers.add_parser("export", help="Write --store back out as measurement_registry.json")
+    export_parser.add_argument("--output", help="Write to this file instead of measurement_registry.json")
+    export_parser.set_defaults(func=cmd_export)
+
     args = parser.parse_args()
+    if args.func in (cmd_import, cmd_export) and not args.store:
+        parser.error(f"'{args.command}' requires --store")
     args.func(args)
 
 if __name__ == "__main__":
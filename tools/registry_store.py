@@ -0,0 +1,216 @@
+import json
+import os
+import sqlite3
+import stat
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from signal_assistant.registry_merkle import canonical_entry, leaf_hash
+
+SCHEMA_VERSION = "1.0"
+
+
+class DuplicateMeasurementError(ValueError):
+    """Raised when adding a measurement whose MRENCLAVE is already in the registry."""
+    pass
+
+
+def dump_registry(registry: Dict[str, Any]) -> str:
+    """
+    The on-disk JSON form of measurement_registry.json.
+    """
+    return json.dumps(registry, indent=2) + "\n"
+
+
+def write_registry_file(path: Path, registry: Dict[str, Any]):
+    """
+    Writes the registry to a temporary file and renames it into place, so readers never see a partial file.
+    The file keeps its permissions (0644 for a new file); mkstemp alone would leave it 0600.
+    """
+    path = Path(path)
+    try:
+        mode = stat.S_IMODE(path.stat().st_mode)
+    except FileNotFoundError:
+        mode = 0o644
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(dump_registry(registry))
+        os.chmod(tmp, mode)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+class JsonRegistryStore:
+    """
+    The plain measurement_registry.json file, behind the same interface as
+    SqliteRegistryStore. Every write rewrites the whole file.
+    """
+    def __init__(self, path: Path, registry: Dict[str, Any]):
+        self.path = Path(path)
+        self.registry = registry
+
+    def close(self):
+        pass
+
+    def _save(self):
+        write_registry_file(self.path, self.registry)
+
+    def add(self, entry: Dict[str, Any]):
+        if self.get(entry["mrenclave"]) is not None:
+            raise DuplicateMeasurementError(f"Measurement {entry['mrenclave']} already exists in registry.")
+        self.registry.setdefault("measurements", []).append(entry)
+        self._save()
+
+    def get(self, mrenclave: str) -> Optional[Dict[str, Any]]:
+        return next((m for m in self.measurements() if m["mrenclave"] == mrenclave), None)
+
+    def find(self, version: Optional[str] = None, profile: Optional[str] = None,
+             status: Optional[str] = None) -> List[Dict[str, Any]]:
+        return [m for m in self.measurements()
+                if (version is None or m.get("version") == version)
+                and (profile is None or m.get("profile") == profile)
+                and (status is None or m.get("status") == status)]
+
+    def measurements(self) -> List[Dict[str, Any]]:
+        return self.registry.get("measurements", [])
+
+    def __len__(self) -> int:
+        return len(self.measurements())
+
+    def leaf_hashes(self) -> List[bytes]:
+        return [leaf_hash(m) for m in self.measurements()]
+
+    def canonical_bytes(self) -> bytes:
+        return json.dumps(self.measurements(), sort_keys=True).encode('utf-8')
+
+    @property
+    def signatures(self) -> List[Dict[str, Any]]:
+        return self.registry.get("signatures", [])
+
+    def set_signatures(self, signatures: List[Dict[str, Any]]):
+        self.registry["signatures"] = signatures
+        self._save()
+
+    def export_registry(self) -> Dict[str, Any]:
+        return self.registry
+
+
+class SqliteRegistryStore:
+    """
+    Indexed registry backend for tools/registry.py.
+
+    Each measurement is one row keyed by insertion order, with unique and
+    secondary indexes on mrenclave, version and profile, so lookups are
+    O(log n) and an append is a single transaction. Rows keep the entry's
+    original JSON (for byte-identical exports), its canonical sorted-key form
+    and its Merkle leaf hash, so signing never re-serializes old entries.
+    """
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.db = sqlite3.connect(str(self.path))
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS measurements (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                mrenclave TEXT NOT NULL UNIQUE,
+                version TEXT,
+                profile TEXT,
+                status TEXT,
+                entry TEXT NOT NULL,
+                canonical TEXT NOT NULL,
+                leaf_hash BLOB NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS measurements_version ON measurements (version);
+            CREATE INDEX IF NOT EXISTS measurements_profile ON measurements (profile);
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+        """)
+
+    def close(self):
+        self.db.close()
+
+    @staticmethod
+    def _row(entry: Dict[str, Any]):
+        return (entry["mrenclave"], entry.get("version"), entry.get("profile"), entry.get("status"),
+                json.dumps(entry), canonical_entry(entry).decode("utf-8"), leaf_hash(entry))
+
+    def add(self, entry: Dict[str, Any]):
+        try:
+            with self.db:
+                self.db.execute("INSERT INTO measurements (mrenclave, version, profile, status, entry, canonical, "
+                                "leaf_hash) VALUES (?, ?, ?, ?, ?, ?, ?)", self._row(entry))
+        except sqlite3.IntegrityError as e:
+            raise DuplicateMeasurementError(f"Measurement {entry['mrenclave']} already exists in registry.") from e
+
+    def get(self, mrenclave: str) -> Optional[Dict[str, Any]]:
+        row = self.db.execute("SELECT entry FROM measurements WHERE mrenclave = ?", (mrenclave,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def find(self, version: Optional[str] = None, profile: Optional[str] = None,
+             status: Optional[str] = None) -> List[Dict[str, Any]]:
+        clauses, params = [], []
+        for column, value in (("version", version), ("profile", profile), ("status", status)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self.db.execute(f"SELECT entry FROM measurements{where} ORDER BY seq", params)
+        return [json.loads(entry) for (entry,) in rows]
+
+    def measurements(self) -> List[Dict[str, Any]]:
+        return self.find()
+
+    def __len__(self) -> int:
+        return self.db.execute("SELECT COUNT(*) FROM measurements").fetchone()[0]
+
+    def leaf_hashes(self) -> List[bytes]:
+        return [h for (h,) in self.db.execute("SELECT leaf_hash FROM measurements ORDER BY seq")]
+
+    def canonical_bytes(self) -> bytes:
+        """
+        Equal to json.dumps(measurements, sort_keys=True), assembled from the stored canonical entries.
+        """
+        rows = self.db.execute("SELECT canonical FROM measurements ORDER BY seq")
+        return ("[" + ", ".join(c for (c,) in rows) + "]").encode("utf-8")
+
+    def _meta(self, key: str, default: Any) -> Any:
+        row = self.db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def _set_meta(self, key: str, value: Any):
+        with self.db:
+            self.db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, json.dumps(value)))
+
+    @property
+    def signatures(self) -> List[Dict[str, Any]]:
+        return self._meta("signatures", [])
+
+    def set_signatures(self, signatures: List[Dict[str, Any]]):
+        self._set_meta("signatures", signatures)
+
+    def import_registry(self, registry: Dict[str, Any]):
+        """
+        Loads a JSON registry into an empty store, keeping entry order and any extra top-level fields.
+        Raises DuplicateMeasurementError, and loads nothing, if an MRENCLAVE appears twice.
+        """
+        extra = {k: v for k, v in registry.items() if k not in ("measurements", "signatures")}
+        seen = set()
+        for m in registry.get("measurements", []):
+            if m["mrenclave"] in seen:
+                raise DuplicateMeasurementError(f"Measurement {m['mrenclave']} appears more than once in the registry.")
+            seen.add(m["mrenclave"])
+        with self.db:
+            self.db.executemany("INSERT INTO measurements (mrenclave, version, profile, status, entry, canonical, "
+                                "leaf_hash) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                                (self._row(m) for m in registry.get("measurements", [])))
+            self.db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", ("header", json.dumps(extra)))
+            self.db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                            ("signatures", json.dumps(registry.get("signatures", []))))
+
+    def export_registry(self) -> Dict[str, Any]:
+        registry = dict(self._meta("header", {"schema_version": SCHEMA_VERSION}))
+        registry["measurements"] = self.measurements()
+        registry["signatures"] = self.signatures
+        return registry
@@ -1,9 +1,19 @@
 #!/usr/bin/env python3
 import argparse
+import asyncio
+import concurrent.futures
 import json
 import sys
+import time
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
+
+from cryptography.hazmat.primitives import serialization
+
+# Runnable straight from a checkout (`python3 tools/verify_enclave.py ...`): the Merkle helpers live in src/.
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from signal_assistant.registry_merkle import DEFAULT_MAX_PROOF_AGE, verify_proof  # noqa: E402
 
 def load_registry(registry_path: Path) -> Dict[str, Any]:
     if not registry_path.exists():
@@ -16,11 +26,12 @@ def load_registry(registry_path: Path) -> Dict[str, Any]:
         print(f"Error: Failed to parse registry: {e}", file=sys.stderr)
         sys.exit(1)
 
-def get_remote_attestation(target: str) -> Dict[str, str]:
+def get_remote_attestation(target: str, verbose: bool = True) -> Dict[str, str]:
     """
     Simulates fetching an attestation quote from a remote Signal Assistant instance.
     """
-    print(f"Connecting to {target} to retrieve attestation quote...")
+    if verbose:
+        print(f"Connecting to {target} to retrieve attestation quote...")
     # Mock response
     return {
         "mrenclave": "sha256:simulated_mrenclave_for_dev",
@@ -47,12 +58,119 @@ def verify_mrenclave(mrenclave: str, registry: Dict[str, Any]) -> bool:
     print("FAILURE: MRENCLAVE not found in registry.")
     return False
 
+def verify_mrenclave_proof(mrenclave: str, proof: Dict[str, Any], pub_key_path: Path,
+                           max_age: Optional[float] = DEFAULT_MAX_PROOF_AGE) -> bool:
+    """
+    Verifies MRENCLAVE against a Merkle inclusion proof instead of the full registry.
+    Proofs whose tree head is older than `max_age` seconds are rejected.
+    """
+    print(f"Verifying MRENCLAVE: {mrenclave} (inclusion proof, tree size {proof.get('tree_size')})")
+    with open(pub_key_path, "rb") as f:
+        pub_key = serialization.load_pem_public_key(f.read())
+    try:
+        entry = verify_proof(proof, pub_key, max_age=max_age)
+    except (ValueError, KeyError) as e:
+        print(f"FAILURE: Inclusion proof rejected: {e}")
+        return False
+    if entry["mrenclave"] != mrenclave:
+        print("FAILURE: Proof is for a different MRENCLAVE.")
+        return False
+    return verify_mrenclave(mrenclave, {"measurements": [entry]})
+
+def index_registry(registry: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """
+    MRENCLAVE -> entry, keeping the first entry for a measurement as verify_mrenclave does.
+    """
+    index: Dict[str, Dict[str, Any]] = {}
+    for m in registry.get("measurements", []):
+        index.setdefault(m["mrenclave"], m)
+    return index
+
+def check_measurement(mrenclave: str, index: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    m = index.get(mrenclave)
+    if m is None:
+        return {"trusted": False, "reason": "MRENCLAVE not found in registry"}
+    result = {"trusted": m["status"] == "active", "status": m["status"], "version": m.get("version"),
+              "profile": m.get("profile")}
+    if not result["trusted"]:
+        result["reason"] = m.get("revocation_reason") or f"status is '{m['status']}'"
+    return result
+
+async def verify_target(target: str, index: Dict[str, Dict[str, Any]], limit: asyncio.Semaphore,
+                        timeout: float, executor: concurrent.futures.Executor) -> Dict[str, Any]:
+    async with limit:
+        started = time.perf_counter()
+        fetch = asyncio.get_running_loop().run_in_executor(executor, get_remote_attestation, target, False)
+        try:
+            quote_data = await asyncio.wait_for(fetch, timeout)
+        except asyncio.TimeoutError:
+            result = {"trusted": False, "reason": f"no attestation quote within {timeout}s"}
+        except Exception as e:
+            result = {"trusted": False, "reason": f"attestation fetch failed: {e}"}
+        else:
+            result = {"mrenclave": quote_data["mrenclave"], **check_measurement(quote_data["mrenclave"], index)}
+        result["latency_ms"] = round((time.perf_counter() - started) * 1000, 3)
+        return {"target": target, **result}
+
+async def verify_fleet(targets: List[str], registry: Dict[str, Any], concurrency: int = 32,
+                       timeout: float = 10) -> Dict[str, Any]:
+    """
+    Fetches and checks every target's quote concurrently (at most `concurrency` at once)
+    against one in-memory index of the registry. The blocking fetches run on a
+    pool of `concurrency` threads, so the default executor's size does not cap them.
+    """
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1")
+    index = index_registry(registry)
+    limit = asyncio.Semaphore(concurrency)
+    started = time.perf_counter()
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="attestation-fetch")
+    try:
+        results = await asyncio.gather(*(verify_target(t, index, limit, timeout, executor) for t in targets))
+    finally:
+        # Fetches that timed out may still be running; do not wait for them.
+        executor.shutdown(wait=False, cancel_futures=True)
+    trusted = sum(1 for r in results if r["trusted"])
+    return {
+        "targets": len(results),
+        "trusted": trusted,
+        "failed": len(results) - trusted,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 3),
+        "results": list(results),
+    }
+
+def read_targets(args) -> List[str]:
+    targets = list(args.targets or [])
+    if args.targets_file:
+        with open(args.targets_file, "r") as f:
+            targets.extend(line.strip() for line in f if line.strip() and not line.lstrip().startswith("#"))
+    return targets
+
 def main():
     parser = argparse.ArgumentParser(description="Client-side Enclave Verification Tool")
-    parser.add_argument("--target", required=True, help="URL/Address of the Signal Assistant")
+    target_group = parser.add_mutually_exclusive_group(required=True)
+    target_group.add_argument("--target", help="URL/Address of the Signal Assistant")
+    target_group.add_argument("--targets", nargs="+", help="Verify a fleet: several addresses, checked concurrently")
+    target_group.add_argument("--targets-file", help="Verify a fleet: file with one address per line")
     parser.add_argument("--registry", default="measurement_registry.json", help="Path to trusted registry")
+    parser.add_argument("--proof", help="Verify against this inclusion proof (from 'registry.py prove') instead of the full registry")
+    parser.add_argument("--key", default="keys/registry.pub", help="Registry public key, used with --proof")
+    parser.add_argument("--max-age", type=float, default=DEFAULT_MAX_PROOF_AGE,
+                        help="With --proof: reject proofs signed more than this many seconds ago")
+    parser.add_argument("--concurrency", type=int, default=32, help="Fleet mode: attestation fetches in flight at once")
+    parser.add_argument("--timeout", type=float, default=10, help="Fleet mode: seconds to wait for each target's quote")
     
     args = parser.parse_args()
+    if args.concurrency < 1:
+        parser.error("--concurrency must be at least 1")
+    
+    if args.proof:
+        if not args.target:
+            parser.error("--proof verifies a single --target")
+        with open(args.proof, "r") as f:
+            proof = json.load(f)
+        quote_data = get_remote_attestation(args.target)
+        sys.exit(0 if verify_mrenclave_proof(quote_data["mrenclave"], proof, Path(args.key), args.max_age) else 1)
     
     registry_path = Path(args.registry)
     if not registry_path.exists():
@@ -61,6 +179,12 @@ def main():
     
     registry = load_registry(registry_path)
     
+    if args.targets or args.targets_file:
+        summary = asyncio.run(verify_fleet(read_targets(args), registry, args.concurrency, args.timeout))
+        summary["registry"] = str(registry_path)
+        print(json.dumps(summary, indent=2))
+        sys.exit(0 if summary["targets"] and summary["failed"] == 0 else 1)
+    
     quote_data = get_remote_attestation(args.target)
     mrenclave = quote_data["mrenclave"]
     